@@ -84,7 +84,9 @@ except ImportError:
             return None
         def add_registration(self, data):
             return True, "Success", "RWT-TEST123", None
-        def export_to_csv(self, filepath):
+        def add_registrations_bulk(self, records, chunk_size=500, ticket_prefix="RWT"):
+            return {'inserted': len(list(records)), 'ticket_ids': [], 'failed': []}
+        def export_to_csv(self, filepath, all_events=False):
             # Create sample data
             data = {
                 'ticket_id': ['RWT-ABC123', 'RWT-DEF456'],
@@ -96,8 +98,8 @@ except ImportError:
             df = pd.DataFrame(data)
             df.to_csv(filepath, index=False)
             return True
-        def import_from_csv(self, filepath):
-            return True
+        def import_from_csv(self, filepath, chunk_size=5000):
+            return {'inserted': 0, 'replaced': 0, 'rejected': 0, 'error': None}
     
     class BarcodeGenerator:
         def create_registration_qr(self):
@@ -625,6 +627,23 @@ if 'ticket' in query_params and 'action' in query_params:
 # Create sidebar and get selected page
 selected_page = create_sidebar()
 
+# Active event: scopes stats, search, exports and check-in to one tour stop
+if hasattr(st.session_state.db, 'list_events'):
+    events = st.session_state.db.list_events()
+    if not events.empty:
+        event_labels = {None: "All events"}
+        for _, event in events.iterrows():
+            event_labels[int(event['id'])] = f"{event['event_name']} ({event['event_date']})"
+        event_ids = list(event_labels)
+        current_event = st.session_state.db.active_event_id
+        active_event = st.sidebar.selectbox(
+            "Active Event",
+            event_ids,
+            index=event_ids.index(current_event) if current_event in event_ids else 0,
+            format_func=lambda event_id: event_labels[event_id]
+        )
+        st.session_state.db.set_active_event(active_event)
+
 # Update page based on sidebar selection
 if selected_page != st.session_state.page:
     st.session_state.page = selected_page
@@ -1244,15 +1263,22 @@ elif st.session_state.page == "Check-in":
         
         if manual_ticket:
             # Search for ticket
-            conn = st.session_state.db.get_connection()
-            if conn:
-                cursor = conn.cursor()
-                cursor.execute(
-                    "SELECT first_name, last_name, status FROM registrations WHERE ticket_id = ?",
-                    (manual_ticket,)
-                )
-                result = cursor.fetchone()
-                conn.close()
+            cached_lookup = hasattr(st.session_state.db, 'get_attendee')
+            conn = None if cached_lookup else st.session_state.db.get_connection()
+            if cached_lookup or conn:
+                if cached_lookup:
+                    # Served from the attendee cache on repeat lookups
+                    attendee = st.session_state.db.get_attendee(manual_ticket)
+                    result = (attendee['first_name'], attendee['last_name'],
+                              attendee['status']) if attendee else None
+                else:
+                    cursor = conn.cursor()
+                    cursor.execute(
+                        "SELECT first_name, last_name, status FROM registrations WHERE ticket_id = ?",
+                        (manual_ticket,)
+                    )
+                    result = cursor.fetchone()
+                    conn.close()
                 
                 if result:
                     first_name, last_name, status = result
@@ -1309,6 +1335,13 @@ elif st.session_state.page == "Check-in":
         st.metric("Check-in Rate", stats.get('checkin_rate', '0%'))
         st.metric("Pending", stats.get('pending', 0))
         
+        if hasattr(st.session_state.db, 'get_ticket_filter_stats'):
+            filter_stats = st.session_state.db.get_ticket_filter_stats()
+            st.caption(
+                f"🛡️ Unknown tickets rejected instantly: {filter_stats['rejected']} "
+                f"of {filter_stats['passed'] + filter_stats['rejected']} scans"
+            )
+        
         st.markdown("---")
         
         # Recent scans
@@ -1351,7 +1384,12 @@ elif st.session_state.page == "Dashboard":
     # Get data for dashboard
     conn = st.session_state.db.get_connection()
     if conn:
-        df = pd.read_sql_query("SELECT * FROM registrations", conn)
+        active_event = getattr(st.session_state.db, 'active_event_id', None)
+        if active_event is not None:
+            df = pd.read_sql_query("SELECT * FROM registrations WHERE event_id = ?",
+                                   conn, params=(active_event,))
+        else:
+            df = pd.read_sql_query("SELECT * FROM registrations", conn)
         conn.close()
     else:
         # Create sample data for demo
@@ -1388,9 +1426,15 @@ elif st.session_state.page == "Dashboard":
     
     st.markdown("---")
     
+    # Hour buckets maintained by the database rollup
+    if hasattr(st.session_state.db, 'get_activity_timeline'):
+        timeline = st.session_state.db.get_activity_timeline(bucket_size='hour')
+    else:
+        timeline = pd.DataFrame(columns=['bucket', 'registrations', 'checkins'])
+    
     # Create and display charts
     if not df.empty:
-        charts = create_dashboard_charts(stats, df)
+        charts = create_dashboard_charts(stats, df, timeline)
         
         # Display charts in tabs
         tab1, tab2, tab3, tab4 = st.tabs(["📈 Overview", "⏰ Time Analysis", "👥 Demographics", "📋 Raw Data"])
@@ -1427,17 +1471,19 @@ elif st.session_state.page == "Dashboard":
         with tab2:
             col1, col2 = st.columns(2)
             with col1:
-                # Hourly registrations
-                df['hour'] = pd.to_datetime(df['registration_time']).dt.hour
-                hour_counts = df['hour'].value_counts().sort_index()
+                # Hourly registrations, summed across days from the rollup
+                hour_counts = timeline.groupby(timeline['bucket'].str[11:13])['registrations'].sum()
                 fig_hours = px.bar(
-                    x=hour_counts.index,
+                    x=hour_counts.index.astype(int),
                     y=hour_counts.values,
                     title="Registrations by Hour",
                     labels={'x': 'Hour of Day', 'y': 'Registrations'},
                     color_discrete_sequence=['#4CAF50']
                 )
                 st.plotly_chart(fig_hours, use_container_width=True)
+            with col2:
+                if 'activity_chart' in charts:
+                    st.plotly_chart(charts['activity_chart'], use_container_width=True)
         
         with tab3:
             # Team distribution
@@ -1480,13 +1526,45 @@ elif st.session_state.page == "Dashboard":
                 search_term = st.text_input("Search by name or email:")
             
             # Apply filters
-            filtered_df = df.copy()
-            if status_filter and 'status' in df.columns:
-                filtered_df = filtered_df[filtered_df['status'].isin(status_filter)]
-            if search_term:
-                filtered_df = filtered_df[
-                    filtered_df.apply(lambda row: search_term.lower() in str(row).lower(), axis=1)
-                ]
+            if hasattr(st.session_state.db, 'get_registrations_page'):
+                if search_term:
+                    filtered_df = st.session_state.db.search_registrations(search_term)
+                    if status_filter:
+                        filtered_df = filtered_df[filtered_df['status'].isin(status_filter)]
+                else:
+                    # Browse one keyset page at a time; restart when filters change
+                    page_filter = tuple(sorted(status_filter))
+                    if st.session_state.get('raw_data_filter') != page_filter:
+                        st.session_state.raw_data_filter = page_filter
+                        st.session_state.raw_data_cursors = [None]
+                    
+                    statuses = None if set(status_filter) >= set(df['status'].unique()) else list(status_filter)
+                    filtered_df, next_cursor = st.session_state.db.get_registrations_page(
+                        after=st.session_state.raw_data_cursors[-1],
+                        page_size=100,
+                        status=statuses
+                    )
+                    
+                    col_prev, col_page, col_next = st.columns([1, 2, 1])
+                    with col_prev:
+                        if st.button("⬅️ Previous", disabled=len(st.session_state.raw_data_cursors) == 1,
+                                     use_container_width=True):
+                            st.session_state.raw_data_cursors.pop()
+                            st.rerun()
+                    with col_page:
+                        st.caption(f"Page {len(st.session_state.raw_data_cursors)} • 100 per page")
+                    with col_next:
+                        if st.button("Next ➡️", disabled=next_cursor is None, use_container_width=True):
+                            st.session_state.raw_data_cursors.append(next_cursor)
+                            st.rerun()
+            else:
+                filtered_df = df.copy()
+                if status_filter and 'status' in df.columns:
+                    filtered_df = filtered_df[filtered_df['status'].isin(status_filter)]
+                if search_term:
+                    filtered_df = filtered_df[
+                        filtered_df.apply(lambda row: search_term.lower() in str(row).lower(), axis=1)
+                    ]
             
             st.dataframe(
                 filtered_df,
@@ -1523,7 +1601,7 @@ elif st.session_state.page == "Manage":
             num_tickets = st.number_input(
                 "Number of tickets to generate",
                 min_value=1,
-                max_value=100,
+                max_value=2000,
                 value=10,
                 help="Generate multiple tickets for distribution"
             )
@@ -1545,7 +1623,6 @@ elif st.session_state.page == "Manage":
                     tickets = []
                     for i in range(num_tickets):
                         ticket_id = st.session_state.barcode_gen.generate_ticket_id(ticket_prefix)
-                        qr_img = st.session_state.barcode_gen.create_checkin_qr(ticket_id)
                         
                         # Create a simple registration for each ticket
                         ticket_data = {
@@ -1557,18 +1634,28 @@ elif st.session_state.page == "Manage":
                             'scanned_data': ticket_id
                         }
                         
-                        # Add to database
-                        st.session_state.db.add_registration(ticket_data)
-                        
+                        # QR images are rendered when a ticket is previewed
                         tickets.append({
                             'ticket_id': ticket_id,
-                            'qr_image': qr_img,
+                            'qr_image': None,
                             'type': ticket_type,
                             'data': ticket_data
                         })
                     
-                    st.session_state.generated_tickets = tickets
-                    st.success(f"Generated {num_tickets} {ticket_type} tickets!")
+                    # Add to database in one batch
+                    result = st.session_state.db.add_registrations_bulk(
+                        [ticket['data'] for ticket in tickets]
+                    )
+                    
+                    # Only tickets that were actually saved can be checked in
+                    saved = set(result['ticket_ids'])
+                    st.session_state.generated_tickets = [
+                        ticket for ticket in tickets if ticket['ticket_id'] in saved
+                    ]
+                    st.session_state.pop('tickets_zip', None)
+                    st.success(f"Generated {result['inserted']} {ticket_type} tickets!")
+                    if result['failed']:
+                        st.warning(f"{len(result['failed'])} tickets could not be saved")
         
         with col2:
             if 'generated_tickets' in st.session_state:
@@ -1578,6 +1665,8 @@ elif st.session_state.page == "Manage":
                 preview_count = min(3, len(st.session_state.generated_tickets))
                 for i in range(preview_count):
                     ticket = st.session_state.generated_tickets[i]
+                    if ticket['qr_image'] is None:
+                        ticket['qr_image'] = st.session_state.barcode_gen.create_checkin_qr(ticket['ticket_id'])
                     with st.expander(f"Ticket {i+1}: {ticket['ticket_id']}"):
                         if ticket['qr_image']:
                             st.image(ticket['qr_image'])
@@ -1599,7 +1688,35 @@ elif st.session_state.page == "Manage":
                 
                 # Bulk download option
                 st.markdown("---")
-                if st.button("📦 Download All as ZIP (Simulated)", use_container_width=True):
+                if hasattr(st.session_state.barcode_gen, 'build_tickets_zip'):
+                    # Rendered only when asked for; kept for this exact set of tickets
+                    ticket_ids = tuple(ticket['ticket_id'] for ticket in st.session_state.generated_tickets)
+                    cached_zip = st.session_state.get('tickets_zip')
+                    if cached_zip is None or cached_zip['ticket_ids'] != ticket_ids:
+                        cached_zip = None
+                        if st.button(f"📦 Prepare ZIP of All {len(ticket_ids)} Tickets", use_container_width=True):
+                            progress_bar = st.progress(0.0, text="Rendering tickets...")
+                            
+                            def show_progress(done, total):
+                                progress_bar.progress(done / total, text=f"Rendered {done} of {total} tickets")
+                            
+                            cached_zip = {
+                                'ticket_ids': ticket_ids,
+                                'data': st.session_state.barcode_gen.build_tickets_zip(
+                                    ticket_ids, progress=show_progress
+                                )
+                            }
+                            st.session_state.tickets_zip = cached_zip
+                            progress_bar.empty()
+                    if cached_zip is not None:
+                        st.download_button(
+                            label=f"📦 Download All {len(ticket_ids)} Tickets as ZIP",
+                            data=cached_zip['data'],
+                            file_name="tickets.zip",
+                            mime="application/zip",
+                            use_container_width=True
+                        )
+                elif st.button("📦 Download All as ZIP (Simulated)", use_container_width=True):
                     st.info("In a full implementation, this would create a ZIP file with all QR codes")
                 
                 # Print instructions
@@ -1650,33 +1767,20 @@ elif st.session_state.page == "Manage":
                 st.dataframe(df_import.head())
                 
                 if st.button("Import to Database", type="primary"):
-                    import_count = 0
-                    for _, row in df_import.iterrows():
-                        ticket_data = {
-                            'first_name': row.get('first_name', ''),
-                            'last_name': row.get('last_name', ''),
-                            'email': row.get('email', ''),
-                            'phone': str(row.get('phone', '')),
-                            'scanned_data': ''
-                        }
-                        success, _, _, _ = st.session_state.db.add_registration(ticket_data)
-                        if success:
-                            import_count += 1
+                    columns = [c for c in ['first_name', 'last_name', 'email', 'phone']
+                               if c in df_import.columns]
+                    import_df = df_import[columns].assign(scanned_data='')
+                    result = st.session_state.db.add_registrations_bulk(import_df)
                     
-                    st.success(f"Imported {import_count} records!")
+                    st.success(f"Imported {result['inserted']} records!")
+                    if result['failed']:
+                        st.warning(f"{len(result['failed'])} rows failed to import")
         
         elif operation == "Bulk Check-in":
-            st.warning("This will check-in all registered attendees.")
+            st.warning("This will check-in all registered attendees of the active event.")
             if st.button("Check-in All Registered", type="secondary"):
-                conn = st.session_state.db.get_connection()
-                if conn:
-                    cursor = conn.cursor()
-                    cursor.execute(
-                        "UPDATE registrations SET status = 'checked_in', checkin_time = CURRENT_TIMESTAMP WHERE status = 'registered'"
-                    )
-                    updated = cursor.rowcount
-                    conn.commit()
-                    conn.close()
+                if st.session_state.db:
+                    updated = st.session_state.db.checkin_all_registered()
                     st.success(f"Checked in {updated} attendees!")
                 else:
                     st.error("Database not connected")
@@ -1694,7 +1798,7 @@ elif st.session_state.page == "Manage":
                 with tempfile.NamedTemporaryFile(suffix='.csv', delete=False) as tmp_file:
                     backup_path = tmp_file.name
                     if hasattr(st.session_state.db, 'export_to_csv'):
-                        success = st.session_state.db.export_to_csv(backup_path)
+                        success = st.session_state.db.export_to_csv(backup_path, all_events=True)
                         if success:
                             with open(backup_path, 'rb') as f:
                                 data = f.read()
@@ -1711,6 +1815,32 @@ elif st.session_state.page == "Manage":
                     else:
                         st.info("Database backup simulation")
             
+            if hasattr(st.session_state.db, 'rebuild_stats'):
+                if st.button("Rebuild Dashboard Stats", use_container_width=True):
+                    st.session_state.db.rebuild_stats()
+                    st.session_state.db.rebuild_rollups()
+                    st.success("Dashboard counters rebuilt from registrations!")
+            
+            if hasattr(st.session_state.db, 'archive_finished_events'):
+                if st.button("Archive Finished Events", use_container_width=True,
+                             help="Move past events' registrations to archive files and compact the database"):
+                    with st.spinner("Archiving..."):
+                        try:
+                            reports = st.session_state.db.archive_finished_events()
+                        except Exception as e:
+                            st.error(f"Archiving failed: {str(e)}")
+                            reports = None
+                    if reports:
+                        archived = sum(report['registrations'] for report in reports)
+                        compaction = reports[-1]['compaction']
+                        st.success(
+                            f"✅ Archived {len(reports)} event(s), {archived} registrations. "
+                            f"Database: {compaction['size_before'] / 1e6:.1f} MB → "
+                            f"{compaction['size_after'] / 1e6:.1f} MB"
+                        )
+                    elif reports is not None:
+                        st.info("No finished events to archive")
+            
             st.markdown("---")
             st.markdown("### 🚨 System Reset")
             
@@ -1757,16 +1887,25 @@ elif st.session_state.page == "Manage":
                                     cursor.execute("DELETE FROM events")
                                     cursor.execute("DELETE FROM checkin_stations")
                                     
-                                    # Reset auto-increment counters
-                                    cursor.execute("DELETE FROM sqlite_sequence")
+                                    # Reset the cleared tables' auto-increment counters. Not the
+                                    # change log's: backups and caches track its ids
+                                    cursor.execute(
+                                        "DELETE FROM sqlite_sequence "
+                                        "WHERE name IN ('registrations', 'events', 'checkin_stations')"
+                                    )
                                     
                                     conn.commit()
                                     conn.close()
                                     
+                                    # Give the freed pages back to the filesystem
+                                    if hasattr(st.session_state.db, 'compact'):
+                                        st.session_state.db.compact()
+                                    
                                     # Clear session state
                                     st.session_state.scan_history = []
                                     if 'generated_tickets' in st.session_state:
                                         del st.session_state.generated_tickets
+                                    st.session_state.pop('tickets_zip', None)
                                     st.session_state.last_scanned = None
                                     
                                     st.success(f"✅ Data cleared! Deleted {count_before} registrations.")
@@ -1784,30 +1923,41 @@ elif st.session_state.page == "Manage":
                                     
                                     # Create backup if requested
                                     if create_backup and os.path.exists(db_path):
-                                        import shutil
                                         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
                                         backup_dir = "backups"
                                         os.makedirs(backup_dir, exist_ok=True)
                                         backup_file = f"{backup_dir}/event_registration_backup_{timestamp}.db"
-                                        shutil.copy2(db_path, backup_file)
-                                        st.info(f"✅ Backup created: {backup_file}")
+                                        if hasattr(st.session_state.db, 'online_backup'):
+                                            report = st.session_state.db.online_backup(backup_file)
+                                            if report['integrity'] != 'ok':
+                                                raise Exception(f"Backup integrity check failed: {report['integrity']}")
+                                            st.info(
+                                                f"✅ Backup created: {backup_file} "
+                                                f"({report['pages']} pages in {report['duration']:.2f}s, "
+                                                f"{report['pages_per_second']:.0f} pages/s)"
+                                            )
+                                        else:
+                                            shutil.copy2(db_path, backup_file)
+                                            st.info(f"✅ Backup created: {backup_file}")
                                     
-                                    # Close any existing connection
-                                    conn = st.session_state.db.get_connection()
-                                    if conn:
-                                        conn.close()
+                                    # Close pooled connections before removing the file
+                                    if hasattr(st.session_state.db, 'close'):
+                                        st.session_state.db.close()
                                     
-                                    # Delete the database file
+                                    # Delete the database file and its WAL side files
                                     if os.path.exists(db_path):
                                         os.remove(db_path)
                                         st.info("🗑️ Database file deleted")
+                                    for side_file in (f"{db_path}-wal", f"{db_path}-shm"):
+                                        if os.path.exists(side_file):
+                                            os.remove(side_file)
                                     
                                     # Reinitialize the database
                                     from database import EventDatabase
                                     st.session_state.db = EventDatabase()
                                     
                                     # Clear all session state
-                                    for key in ['scan_history', 'generated_tickets', 'last_scanned']:
+                                    for key in ['scan_history', 'generated_tickets', 'tickets_zip', 'last_scanned']:
                                         if key in st.session_state:
                                             del st.session_state[key]
                                     
@@ -1958,19 +2108,50 @@ elif st.session_state.page == "Manage":
             help="Create a folder for backups"
         )
         
+        backup_type = st.radio(
+            "Backup Type:",
+            ["Full (CSV)", "Differential (changes since last backup)"],
+            horizontal=True,
+            help="Differential backups upload only rows changed since the previous backup. The first one uploads a full base snapshot."
+        )
+        
         col_backup1, col_backup2 = st.columns(2)
         
         with col_backup1:
             if st.button("📤 Upload Backup", type="primary", use_container_width=True):
                 if st.session_state.google_auth_status != "Connected":
                     st.error("Please connect to Google Drive first")
+                elif backup_type.startswith("Differential") and hasattr(st.session_state.db, 'create_differential_backup'):
+                    with st.spinner("Creating differential backup..."):
+                        try:
+                            # Recorded in the chain only once the upload succeeded. A new
+                            # base is needed when the change log no longer reaches back
+                            since_change_id = st.session_state.db.last_backup_change_id()
+                            if (since_change_id is None or
+                                    not st.session_state.db.change_log_covers(since_change_id)):
+                                report = st.session_state.db.create_snapshot_backup(record=False)
+                                label = "Base snapshot"
+                            else:
+                                report = st.session_state.db.create_differential_backup(record=False)
+                                label = f"Differential backup ({report['upserts']} changed, {report['deletes']} deleted)"
+                            
+                            success, message = st.session_state.drive_manager.upload_file(
+                                report['path'], os.path.basename(report['path'])
+                            )
+                            if success:
+                                st.session_state.db.record_backup(report)
+                                st.success(f"✅ {label} uploaded: {message}")
+                            else:
+                                st.error(f"❌ Upload failed: {message}")
+                        except Exception as e:
+                            st.error(f"Backup creation failed: {str(e)}")
                 else:
                     with st.spinner("Creating backup..."):
                         # Create temporary backup file
                         with tempfile.NamedTemporaryFile(suffix='.csv', delete=False) as tmp_file:
                             backup_path = tmp_file.name
                             if hasattr(st.session_state.db, 'export_to_csv'):
-                                success = st.session_state.db.export_to_csv(backup_path)
+                                success = st.session_state.db.export_to_csv(backup_path, all_events=True)
                                 if success:
                                     # Upload to Google Drive
                                     success, message = st.session_state.drive_manager.upload_file(
@@ -2020,12 +2201,16 @@ elif st.session_state.page == "Manage":
                                     if success:
                                         # Import from CSV
                                         if hasattr(st.session_state.db, 'import_from_csv'):
-                                            import_success = st.session_state.db.import_from_csv(restore_path)
-                                            if import_success:
-                                                st.success(f"✅ Restored from {file['name']}")
+                                            summary = st.session_state.db.import_from_csv(restore_path)
+                                            if not summary.get('error'):
+                                                st.success(
+                                                    f"✅ Restored from {file['name']}: "
+                                                    f"{summary['inserted']} added, {summary['replaced']} updated, "
+                                                    f"{summary['rejected']} rejected"
+                                                )
                                                 st.balloons()
                                             else:
-                                                st.error("Import failed")
+                                                st.error(f"Import failed: {summary['error']}")
                                         else:
                                             st.info("Restore simulation complete")
                                     else:
@@ -2081,7 +2266,7 @@ elif st.session_state.page == "Export":
         
         export_format = st.selectbox(
             "Export Format:",
-            ["CSV", "Excel", "JSON", "PDF Report"]
+            ["CSV", "Excel", "JSON", "Parquet", "PDF Report"]
         )
     
     with col2:
@@ -2093,19 +2278,24 @@ elif st.session_state.page == "Export":
     
     if conn:
         # Build query based on filters
-        query = "SELECT * FROM registrations WHERE date(registration_time) BETWEEN ? AND ?"
-        params = [start_date, end_date]
+        where = "date(registration_time) BETWEEN ? AND ?"
+        params = [str(start_date), str(end_date)]
         
         if export_type == "Checked-in Only":
-            query += " AND status = 'checked_in'"
+            where += " AND status = 'checked_in'"
         elif export_type == "Pending Check-in":
-            query += " AND status = 'registered'"
+            where += " AND status = 'registered'"
         elif export_type == "Worship Team":
-            query += " AND worship_team = 1"
+            where += " AND worship_team = 1"
         elif export_type == "Volunteers":
-            query += " AND volunteer = 1"
+            where += " AND volunteer = 1"
         
-        query += " ORDER BY registration_time DESC"
+        active_event = getattr(st.session_state.db, 'active_event_id', None)
+        if active_event is not None:
+            where += " AND event_id = ?"
+            params.append(active_event)
+        
+        query = f"SELECT * FROM registrations WHERE {where} ORDER BY registration_time DESC"
         
         df = pd.read_sql_query(query, conn, params=params)
         conn.close()
@@ -2132,6 +2322,28 @@ elif st.session_state.page == "Export":
                     mime="text/csv",
                     use_container_width=True
                 )
+            
+            if export_format == "Parquet":
+                if hasattr(st.session_state.db, 'export_snapshot'):
+                    try:
+                        # Typed columns, streamed from the cursor in row groups;
+                        # where already carries the event filter
+                        output = io.BytesIO()
+                        st.session_state.db.export_snapshot(
+                            output, format="parquet", all_events=True,
+                            where=where, params=params
+                        )
+                        st.download_button(
+                            label="🗂️ Download Parquet",
+                            data=output.getvalue(),
+                            file_name=f"registrations_{start_date}_to_{end_date}.parquet",
+                            mime="application/vnd.apache.parquet",
+                            use_container_width=True
+                        )
+                    except Exception as e:
+                        st.error(f"Parquet export failed: {str(e)}")
+                else:
+                    st.info("Parquet export is not available")
         
         with col_exp2:
             if export_format == "Excel":
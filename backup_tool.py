@@ -0,0 +1,65 @@
+"""Create, list and verify registration backup artifacts.
+
+    python backup_tool.py create [--db event_registration.db] [--dir backups]
+    python backup_tool.py list [--dir backups]
+    python backup_tool.py verify ARTIFACT [ARTIFACT ...] [--deep]
+"""
+import argparse
+import sys
+
+from database import EventDatabase
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Registration backup artifacts")
+    commands = parser.add_subparsers(dest='command', required=True)
+    
+    create = commands.add_parser('create', help="write a new backup artifact")
+    create.add_argument('--db', default="event_registration.db")
+    create.add_argument('--dir', default="backups")
+    
+    listing = commands.add_parser('list', help="show artifacts from their manifests")
+    listing.add_argument('--dir', default="backups")
+    
+    verify = commands.add_parser('verify', help="check artifacts against their manifests")
+    verify.add_argument('paths', nargs='+')
+    verify.add_argument('--deep', action='store_true',
+                        help="also run integrity_check and compare row counts")
+    
+    args = parser.parse_args(argv)
+    
+    if args.command == 'create':
+        db = EventDatabase(args.db)
+        report = db.create_backup_artifact(args.dir)
+        manifest = report['manifest']
+        print(f"{report['path']}  {report['size']} bytes  "
+              f"{manifest['row_counts'].get('registrations', 0)} registrations  "
+              f"schema v{manifest['schema_version']}")
+        return 0
+    
+    if args.command == 'list':
+        for entry in EventDatabase.list_backup_artifacts(args.dir):
+            if 'error' in entry:
+                print(f"{entry['path']}  ERROR: {entry['error']}")
+                continue
+            note = f"  duplicate of {entry['duplicate_of']}" if entry['duplicate_of'] else ""
+            print(f"{entry['path']}  {entry['created_at']}  {entry['size']} bytes  "
+                  f"{entry['registrations']} registrations  schema v{entry['schema_version']}  "
+                  f"change {entry['change_id']}{note}")
+        return 0
+    
+    failed = 0
+    for path in args.paths:
+        report = EventDatabase.verify_backup_artifact(path, deep=args.deep)
+        if report['ok']:
+            print(f"OK      {path}")
+        else:
+            failed += 1
+            print(f"FAILED  {path}")
+            for error in report['errors']:
+                print(f"    {error}")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,12 +1,180 @@
 import qrcode
 from PIL import Image, ImageDraw, ImageFont
 import io
+import multiprocessing
+import os
 import streamlit as st
+import threading
 import uuid
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import lru_cache
+
+# Texts and colours of the check-in ticket; pass overrides to EventQRGenerator
+TICKET_BRANDING = {
+    'title': "🌿 ROOTED WORLD TOUR",
+    'subtitle': "Worship Night Encounter",
+    'primary_color': "#1a5319",
+    'accent_color': "#4CAF50",
+    'highlight_color': "#FFD700",
+    'footer': "Digital Ticket • Valid for one entry",
+}
+
+CHECKIN_INSTRUCTIONS = [
+    "📱 CHECK-IN INSTRUCTIONS:",
+    "1. Present this QR code at event entry",
+    "2. Staff will scan with phone or webcam",
+    "3. Instant verification and entry",
+    "4. Keep this ticket safe!"
+]
+
+
+@lru_cache(maxsize=None)
+def load_font(name, size):
+    """TrueType font, read from disk once per name and size; PIL's built-in
+    font when the file is not available"""
+    try:
+        return ImageFont.truetype(name, size)
+    except Exception:
+        return ImageFont.load_default()
+
+
+class TicketTemplate:
+    """Static chrome of a check-in ticket for one QR size and branding.
+
+    Header, titles, info box, instructions and footer are drawn once; a
+    ticket is a copy of that image with its QR pasted in and its id drawn.
+    """
+    
+    QR_Y = 120
+    
+    def __init__(self, qr_size, branding):
+        qr_width, qr_height = qr_size
+        self.branding = branding
+        self.width = max(400, qr_width + 100)  # Ensure minimum width
+        self.height = qr_height + 180  # Add space for text
+        self.qr_box = ((self.width - qr_width) // 2, self.QR_Y,
+                       (self.width - qr_width) // 2 + qr_width, self.QR_Y + qr_height)
+        self.info_y = self.QR_Y + qr_height + 30
+        self.image = self._render()
+    
+    def _render(self):
+        width, height, info_y = self.width, self.height, self.info_y
+        branding = self.branding
+        image = Image.new('RGB', (width, height), color='white')
+        draw = ImageDraw.Draw(image)
+        
+        # Header band
+        draw.rectangle([0, 0, width, 60], fill=branding['primary_color'])
+        
+        # Event title
+        draw.text((width // 2, 30),
+                 branding['title'],
+                 fill="white",
+                 font=load_font("arial.ttf", 28),
+                 anchor="mm")
+        
+        draw.text((width // 2, 65),
+                 branding['subtitle'],
+                 fill=branding['highlight_color'],
+                 font=load_font("arial.ttf", 18),
+                 anchor="mm")
+        
+        # Ticket info box
+        draw.rectangle([50, info_y, width-50, info_y + 120], 
+                      fill="#f8f9fa", 
+                      outline=branding['accent_color'], 
+                      width=2)
+        
+        # Check-in instructions
+        for i, instruction in enumerate(CHECKIN_INSTRUCTIONS):
+            y_pos = info_y + 50 + (i * 25)
+            color = branding['primary_color'] if i == 0 else "#333333"
+            font_size = load_font("arial.ttf", 20) if i == 0 else load_font("arial.ttf", 14)
+            draw.text((width // 2, y_pos),
+                     instruction,
+                     fill=color,
+                     font=font_size,
+                     anchor="mm")
+        
+        # Mobile instructions
+        draw.text((width // 2, height - 60),
+                 "📱 MOBILE CHECK-IN: Open phone camera → Point at QR → Tap link",
+                 fill=branding['accent_color'],
+                 font=load_font("arial.ttf", 14),
+                 anchor="mm")
+        
+        # Footer
+        draw.text((width // 2, height - 30),
+                 branding['footer'],
+                 fill="#666666",
+                 font=load_font("arial.ttf", 12),
+                 anchor="mm")
+        return image
+    
+    def render(self, qr_mask, ticket_id):
+        """Ticket image for a QR mask (mode '1', black = module) of this size"""
+        image = self.image.copy()
+        # The QR area of the template is white, so only modules are painted
+        image.paste(self.branding['primary_color'], self.qr_box, mask=qr_mask)
+        
+        # Ticket ID
+        ImageDraw.Draw(image).text((self.width // 2, self.info_y + 25),
+                 f"🎫 TICKET ID: {ticket_id}",
+                 fill=self.branding['primary_color'],
+                 font=load_font("arial.ttf", 20),
+                 anchor="mm")
+        return image
+
+
+# Generator of a ticket rendering worker process, set by _init_render_worker
+_worker_generator = None
+
+
+def _init_render_worker(base_url, branding):
+    global _worker_generator
+    _worker_generator = EventQRGenerator(branding, base_url=base_url)
+
+
+def _render_ticket_chunk(ticket_ids):
+    """Worker task: [(ticket_id, PNG bytes)] for a chunk of ticket ids"""
+    return [(ticket_id, _worker_generator.render_ticket_png(ticket_id))
+            for ticket_id in ticket_ids]
+
 
 class EventQRGenerator:
-    def __init__(self):
-        self.base_url = st.secrets.get("APP_URL", "https://event-registration-backup-system-2yuhtnkp6z9xhwq3wbqcoo.streamlit.app")
+    # Rendered templates by (QR size, branding), shared by all generators
+    _templates = {}
+    
+    # Worker processes for bulk rendering, started on first use and kept
+    # for later batches: (executor, base_url, branding, workers)
+    _render_pool = None
+    _render_pool_lock = threading.Lock()
+    
+    def __init__(self, branding=None, base_url=None):
+        default_url = "https://event-registration-backup-system-2yuhtnkp6z9xhwq3wbqcoo.streamlit.app"
+        if base_url is not None:
+            self.base_url = base_url
+        else:
+            try:
+                self.base_url = st.secrets.get("APP_URL", default_url)
+            except Exception:
+                # No secrets.toml, e.g. when run from scripts or benchmarks
+                self.base_url = default_url
+        self.branding = dict(TICKET_BRANDING, **(branding or {}))
+    
+    def ticket_template(self, qr_size):
+        """Cached TicketTemplate for a QR image size and this generator's branding"""
+        key = (qr_size, tuple(sorted(self.branding.items())))
+        template = self._templates.get(key)
+        if template is None:
+            template = self._templates[key] = TicketTemplate(qr_size, self.branding)
+        return template
+    
+    @classmethod
+    def clear_template_cache(cls):
+        cls._templates.clear()
+        load_font.cache_clear()
     
     def generate_ticket_id(self, prefix="RWT"):
         """Generate unique ticket ID with prefix"""
@@ -60,16 +228,9 @@ class EventQRGenerator:
         # Add text
         draw = ImageDraw.Draw(final_img)
         
-        # Try to load font
-        try:
-            font_large = ImageFont.truetype("Arial.ttf", 24)
-            font_medium = ImageFont.truetype("Arial.ttf", 18)
-            font_small = ImageFont.truetype("Arial.ttf", 14)
-        except:
-            # Use default font if Arial not available
-            font_large = ImageFont.load_default()
-            font_medium = ImageFont.load_default()
-            font_small = ImageFont.load_default()
+        font_large = load_font("Arial.ttf", 24)
+        font_medium = load_font("Arial.ttf", 18)
+        font_small = load_font("Arial.ttf", 14)
         
         # Calculate text positions
         text_y = qr_y + qr_height + 20
@@ -129,7 +290,7 @@ class EventQRGenerator:
     def create_checkin_qr(self, ticket_id):
         """Create QR code for check-in (after registration)"""
         # URL that mobile cameras will recognize
-        checkin_url = f"{self.base_url}/?ticket={ticket_id}&action=checkin"
+        checkin_url = self.checkin_url(ticket_id)
         
         # Make the QR code robust
         qr = qrcode.QRCode(
@@ -141,107 +302,14 @@ class EventQRGenerator:
         qr.add_data(checkin_url)
         qr.make(fit=True)
         
-        qr_img = qr.make_image(fill_color="#1a5319", back_color="white")
-        qr_img = qr_img.convert('RGB')
-        
-        # Get QR code dimensions
-        qr_width, qr_height = qr_img.size
-        
-        # Create ticket design
-        final_width = max(400, qr_width + 100)  # Ensure minimum width
-        final_height = qr_height + 180  # Add space for text
-        
-        final_img = Image.new('RGB', (final_width, final_height), color='white')
-        draw = ImageDraw.Draw(final_img)
-        
-        # Add header with gradient
-        for i in range(60):
-            y = i
-            draw.rectangle([0, y, final_width, y+1], fill=(26, 83, 25))
-        
-        # Try to load fonts
-        try:
-            font_title = ImageFont.truetype("arial.ttf", 28)
-            font_subtitle = ImageFont.truetype("arial.ttf", 18)
-            font_medium = ImageFont.truetype("arial.ttf", 20)
-            font_small = ImageFont.truetype("arial.ttf", 14)
-            font_tiny = ImageFont.truetype("arial.ttf", 12)
-        except:
-            # Fallback to default fonts
-            font_title = ImageFont.load_default()
-            font_subtitle = ImageFont.load_default()
-            font_medium = ImageFont.load_default()
-            font_small = ImageFont.load_default()
-            font_tiny = ImageFont.load_default()
-        
-        # Event title
-        draw.text((final_width // 2, 30),
-                 "🌿 ROOTED WORLD TOUR",
-                 fill="white",
-                 font=font_title,
-                 anchor="mm")
-        
-        draw.text((final_width // 2, 65),
-                 "Worship Night Encounter",
-                 fill="#FFD700",
-                 font=font_subtitle,
-                 anchor="mm")
-        
-        # Add QR code
-        qr_width, qr_height = qr_img.size
-        qr_x = (final_width - qr_width) // 2
-        qr_y = 120
-        
-        final_img.paste(qr_img, (qr_x, qr_y))
-        
-        # Ticket info box
-        info_y = qr_y + qr_height + 30
-        draw.rectangle([50, info_y, final_width-50, info_y + 120], 
-                      fill="#f8f9fa", 
-                      outline="#4CAF50", 
-                      width=2)
-        
-        # Ticket ID
-        draw.text((final_width // 2, info_y + 25),
-                 f"🎫 TICKET ID: {ticket_id}",
-                 fill="#1a5319",
-                 font=font_medium,
-                 anchor="mm")
-        
-        # Check-in instructions
-        instructions = [
-            "📱 CHECK-IN INSTRUCTIONS:",
-            "1. Present this QR code at event entry",
-            "2. Staff will scan with phone or webcam",
-            "3. Instant verification and entry",
-            "4. Keep this ticket safe!"
-        ]
-        
-        for i, instruction in enumerate(instructions):
-            y_pos = info_y + 50 + (i * 25)
-            color = "#1a5319" if i == 0 else "#333333"
-            font_size = font_medium if i == 0 else font_small
-            draw.text((final_width // 2, y_pos),
-                     instruction,
-                     fill=color,
-                     font=font_size,
-                     anchor="mm")
-        
-        # Mobile instructions
-        draw.text((final_width // 2, final_height - 60),
-                 "📱 MOBILE CHECK-IN: Open phone camera → Point at QR → Tap link",
-                 fill="#4CAF50",
-                 font=font_small,
-                 anchor="mm")
-        
-        # Footer
-        draw.text((final_width // 2, final_height - 30),
-                 "Digital Ticket • Valid for one entry",
-                 fill="#666666",
-                 font=font_tiny,
-                 anchor="mm")
+        # One pixel per module (border included), scaled up to box_size
+        matrix = qr.get_matrix()
+        modules = len(matrix)
+        qr_mask = Image.new('1', (modules, modules))
+        qr_mask.putdata([255 if cell else 0 for row in matrix for cell in row])
+        qr_mask = qr_mask.resize((modules * qr.box_size, modules * qr.box_size), Image.NEAREST)
         
-        return final_img
+        return self.ticket_template(qr_mask.size).render(qr_mask, ticket_id)
     
     def img_to_bytes(self, img):
         """Convert PIL image to bytes for download"""
@@ -250,18 +318,107 @@ class EventQRGenerator:
         buf.seek(0)
         return buf
     
-    def generate_bulk_qr_codes(self, count, prefix="RWT"):
-        """Generate multiple QR codes for print"""
-        tickets = []
-        for i in range(count):
-            ticket_id = self.generate_ticket_id(prefix)
-            qr_img = self.create_checkin_qr(ticket_id)
-            tickets.append({
+    def checkin_url(self, ticket_id):
+        return f"{self.base_url}/?ticket={ticket_id}&action=checkin"
+    
+    def render_ticket_png(self, ticket_id):
+        """Check-in ticket for ticket_id as encoded PNG bytes"""
+        buf = io.BytesIO()
+        self.create_checkin_qr(ticket_id).save(buf, format="PNG")
+        return buf.getvalue()
+    
+    def _render_executor(self, workers):
+        """Shared process pool for this base URL and branding"""
+        cls = type(self)
+        with cls._render_pool_lock:
+            key = (self.base_url, tuple(sorted(self.branding.items())), workers)
+            if cls._render_pool is not None and cls._render_pool[1:] != key:
+                cls._render_pool[0].shutdown(wait=False, cancel_futures=True)
+                cls._render_pool = None
+            if cls._render_pool is None:
+                # spawn: forking the threaded Streamlit server is unsafe
+                executor = ProcessPoolExecutor(
+                    max_workers=workers,
+                    mp_context=multiprocessing.get_context('spawn'),
+                    initializer=_init_render_worker,
+                    initargs=(self.base_url, self.branding)
+                )
+                cls._render_pool = (executor,) + key
+            return cls._render_pool[0]
+    
+    @classmethod
+    def shutdown_render_pool(cls):
+        with cls._render_pool_lock:
+            if cls._render_pool is not None:
+                cls._render_pool[0].shutdown()
+                cls._render_pool = None
+    
+    def render_tickets(self, ticket_ids, workers=None, chunk_size=16, progress=None):
+        """Render check-in tickets across a process pool.
+
+        Yields (ticket_id, PNG bytes) in completion order, not input order.
+        progress(done, total) is called after every finished chunk. With
+        workers=1, or a batch no bigger than one chunk, tickets are rendered
+        in this process and the pool is never started.
+        """
+        ticket_ids = list(ticket_ids)
+        total = len(ticket_ids)
+        workers = workers or os.cpu_count() or 1
+        done = 0
+        
+        if workers == 1 or total <= chunk_size:
+            for ticket_id in ticket_ids:
+                yield ticket_id, self.render_ticket_png(ticket_id)
+                done += 1
+                if progress is not None:
+                    progress(done, total)
+            return
+        
+        executor = self._render_executor(workers)
+        futures = [executor.submit(_render_ticket_chunk, ticket_ids[i:i + chunk_size])
+                   for i in range(0, total, chunk_size)]
+        try:
+            for future in as_completed(futures):
+                chunk = future.result()
+                yield from chunk
+                done += len(chunk)
+                if progress is not None:
+                    progress(done, total)
+        finally:
+            # Consumer stopped early or a chunk failed: drop queued chunks
+            for future in futures:
+                future.cancel()
+    
+    def generate_bulk_qr_codes(self, count, prefix="RWT", workers=None, progress=None):
+        """Generate multiple check-in tickets for print, in ticket order.
+
+        Each entry has 'ticket_id', 'qr_image' (PIL image, as before),
+        'qr_png' (the same ticket as PNG bytes) and 'qr_data'.
+        """
+        ticket_ids = [self.generate_ticket_id(prefix) for _ in range(count)]
+        rendered = dict(self.render_tickets(ticket_ids, workers=workers, progress=progress))
+        return [
+            {
                 'ticket_id': ticket_id,
-                'qr_image': qr_img,
-                'qr_data': f"{self.base_url}/?ticket={ticket_id}&action=checkin"
-            })               
-        return tickets
+                'qr_image': Image.open(io.BytesIO(rendered[ticket_id])),
+                'qr_png': rendered[ticket_id],
+                'qr_data': self.checkin_url(ticket_id)
+            }
+            for ticket_id in ticket_ids
+        ]
+    
+    def build_tickets_zip(self, ticket_ids, workers=None, progress=None):
+        """ZIP archive (bytes) of ticket_<id>.png for every ticket id.
+
+        Tickets are written as they finish rendering, so only the archive
+        itself is held in memory.
+        """
+        buf = io.BytesIO()
+        # PNGs are already compressed
+        with zipfile.ZipFile(buf, 'w', zipfile.ZIP_STORED) as archive:
+            for ticket_id, png in self.render_tickets(ticket_ids, workers=workers, progress=progress):
+                archive.writestr(f"ticket_{ticket_id}.png", png)
+        return buf.getvalue()
 
 # Use this class as BarcodeGenerator
 BarcodeGenerator = EventQRGenerator
@@ -0,0 +1 @@
+"""Standalone load benchmarks for the registration database."""
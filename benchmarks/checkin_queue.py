@@ -0,0 +1,77 @@
+"""Compare check-in throughput with and without the write-behind queue.
+
+Run from the repository root:
+
+    python -m benchmarks.checkin_queue --tickets 5000 --stations 8
+"""
+import argparse
+import os
+import tempfile
+import threading
+import time
+
+from database import EventDatabase
+
+
+def seed(db, tickets):
+    records = [
+        {
+            'first_name': f'Guest{i}',
+            'last_name': 'Bench',
+            'email': f'guest{i}@example.com',
+        }
+        for i in range(tickets)
+    ]
+    return db.add_registrations_bulk(records)['ticket_ids']
+
+
+def run_stations(db, ticket_ids, stations):
+    """Scan every ticket once, split across station threads; returns scans/sec"""
+    shares = [ticket_ids[i::stations] for i in range(stations)]
+    failures = []
+    
+    def station(share):
+        for ticket_id in share:
+            success, _ = db.quick_checkin(ticket_id)
+            if not success:
+                failures.append(ticket_id)
+    
+    threads = [threading.Thread(target=station, args=(share,)) for share in shares]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    
+    if failures:
+        raise RuntimeError(f"{len(failures)} check-ins failed")
+    return len(ticket_ids) / elapsed
+
+
+def benchmark(tickets, stations, write_behind):
+    with tempfile.TemporaryDirectory() as tmp:
+        db = EventDatabase(os.path.join(tmp, 'bench.db'), write_behind=write_behind)
+        try:
+            ticket_ids = seed(db, tickets)
+            return run_stations(db, ticket_ids, stations)
+        finally:
+            db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--tickets', type=int, default=5000)
+    parser.add_argument('--stations', type=int, default=8)
+    args = parser.parse_args()
+    
+    direct = benchmark(args.tickets, args.stations, write_behind=False)
+    queued = benchmark(args.tickets, args.stations, write_behind=True)
+    
+    print(f"{args.tickets} scans across {args.stations} stations")
+    print(f"  direct transactions: {direct:10.0f} scans/sec")
+    print(f"  write-behind queue:  {queued:10.0f} scans/sec ({queued / direct:.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
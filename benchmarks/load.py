@@ -0,0 +1,196 @@
+"""Synthetic-load benchmark for the EventDatabase read and write paths.
+
+Seeds a temporary database through EventDatabase with synthetic attendees
+at each size, then times quick_checkin, get_dashboard_stats,
+search_registrations and export_to_csv with a warm and a cold cache.
+Prints p50/p95/p99 latency and rows per second as JSON.
+
+    python -m benchmarks.load --sizes 10000 100000 1000000 --output load.json
+
+"Cold" closes every pooled connection and opens a fresh EventDatabase
+before each sample, which empties SQLite's page cache and the in-process
+ticket filter and attendee cache. The OS file cache is left alone, so cold
+numbers are an upper bound on a truly cold disk.
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import random
+import sqlite3
+import tempfile
+import time
+from datetime import datetime
+
+from database import EventDatabase
+
+FIRST_NAMES = [
+    'James', 'Mary', 'John', 'Patricia', 'Robert', 'Jennifer', 'Michael', 'Linda',
+    'David', 'Elizabeth', 'Grace', 'Samuel', 'Esther', 'Daniel', 'Ruth', 'Joseph',
+    'Chidi', 'Ngozi', 'Emeka', 'Amaka', 'Tunde', 'Funmi', 'Kwame', 'Ama',
+    'Luis', 'Sofia', 'Mateo', 'Camila', 'Wei', 'Mei', 'Arjun', 'Priya'
+]
+LAST_NAMES = [
+    'Smith', 'Johnson', 'Williams', 'Brown', 'Jones', 'Garcia', 'Miller', 'Davis',
+    'Okafor', 'Adeyemi', 'Mensah', 'Okonkwo', 'Balogun', 'Nwosu', 'Boateng', 'Eze',
+    'Martinez', 'Lopez', 'Gonzalez', 'Chen', 'Wang', 'Patel', 'Sharma', 'Kim'
+]
+DOMAINS = ['gmail.com', 'yahoo.com', 'outlook.com', 'icloud.com', 'church.org']
+
+
+def synthetic_attendees(count, rng):
+    for i in range(count):
+        first = rng.choice(FIRST_NAMES)
+        last = rng.choice(LAST_NAMES)
+        yield {
+            'first_name': first,
+            'last_name': last,
+            'email': f"{first.lower()}.{last.lower()}{i}@{rng.choice(DOMAINS)}",
+            'phone': f"+1{rng.randint(2000000000, 9999999999)}",
+            'emergency_contact': f"{rng.choice(FIRST_NAMES)} {last}",
+            'medical_notes': rng.choice(['', '', '', 'Asthma', 'Nut allergy', 'Wheelchair access']),
+            'worship_team': int(rng.random() < 0.05),
+            'volunteer': int(rng.random() < 0.1),
+        }
+
+
+def seed(db_path, size, rng, checked_in_ratio=0.3):
+    """Fill a database; returns (ticket ids still registered, seconds)"""
+    started = time.perf_counter()
+    db = EventDatabase(db_path)
+    ticket_ids = db.add_registrations_bulk(synthetic_attendees(size, rng), chunk_size=5000)['ticket_ids']
+    
+    # Part of the house is already in, as mid-event
+    rng.shuffle(ticket_ids)
+    cutoff = int(len(ticket_ids) * checked_in_ratio)
+    with db.transaction() as conn:
+        for ticket_id in ticket_ids[:cutoff]:
+            db.checkin_ticket(ticket_id, conn)
+    db.close()
+    return ticket_ids[cutoff:], time.perf_counter() - started
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    rank = max(1, int(round(pct / 100 * len(sorted_values))))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def measure(db_path, operation, samples, cold):
+    """Time operation(db) samples times; it returns the rows it touched"""
+    timings = []
+    rows = 0
+    db = None if cold else EventDatabase(db_path)
+    if db is not None:
+        operation(db)  # warm-up
+    
+    for _ in range(samples):
+        if cold:
+            if db is not None:
+                db.close()
+            db = EventDatabase(db_path)
+        started = time.perf_counter()
+        rows += operation(db)
+        timings.append(time.perf_counter() - started)
+    db.close()
+    
+    timings.sort()
+    total = sum(timings)
+    return {
+        'samples': samples,
+        'p50_ms': round(percentile(timings, 50) * 1000, 3),
+        'p95_ms': round(percentile(timings, 95) * 1000, 3),
+        'p99_ms': round(percentile(timings, 99) * 1000, 3),
+        'mean_ms': round(total / samples * 1000, 3),
+        'rows_per_second': round(rows / total, 1) if total else None,
+    }
+
+
+def operations(tickets, rng):
+    """The benchmarked calls, each returning the number of rows it touched"""
+    def checkin(db):
+        success, _ = db.quick_checkin(tickets.pop())
+        return 1 if success else 0
+    
+    def dashboard(db):
+        db.get_dashboard_stats()
+        return 1
+    
+    def search(db):
+        term = rng.choice([rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES),
+                           rng.choice(FIRST_NAMES)[:3].lower()])
+        return len(db.search_registrations(term))
+    
+    def export(db):
+        buffer = io.StringIO()
+        db.export_to_csv(buffer, all_events=True)
+        return buffer.getvalue().count('\n') - 1
+    
+    # Every check-in (and the warm-up call) uses up a seeded ticket, so on
+    # small databases the samples are capped, keeping enough for the cold run
+    checkin_cold = min(30, len(tickets))
+    checkin_warm = min(200, max(len(tickets) - checkin_cold - 1, 0))
+    
+    # (name, operation, warm samples, cold samples); cold samples reopen the
+    # database, which reloads the ticket filter, so they are kept fewer
+    return [
+        ('quick_checkin', checkin, checkin_warm, checkin_cold),
+        ('get_dashboard_stats', dashboard, 200, 30),
+        ('search_registrations', search, 100, 30),
+        ('export_to_csv', export, 5, 3),
+    ]
+
+
+def run(sizes, seed_value=42):
+    report = {
+        'generated_at': datetime.now().isoformat(),
+        'python': platform.python_version(),
+        'sqlite_version': sqlite3.sqlite_version,
+        'seed': seed_value,
+        'sizes': {},
+        'results': [],
+    }
+    
+    for size in sizes:
+        rng = random.Random(seed_value)
+        with tempfile.TemporaryDirectory() as tmp:
+            db_path = os.path.join(tmp, 'load.db')
+            tickets, seed_seconds = seed(db_path, size, rng)
+            report['sizes'][str(size)] = {
+                'seed_seconds': round(seed_seconds, 2),
+                'file_bytes': os.path.getsize(db_path),
+            }
+            
+            for cache in ('warm', 'cold'):
+                for name, operation, warm_samples, cold_samples in operations(tickets, rng):
+                    samples = cold_samples if cache == 'cold' else warm_samples
+                    if samples == 0:
+                        continue
+                    result = measure(db_path, operation, samples, cache == 'cold')
+                    result.update(size=size, operation=name, cache=cache)
+                    report['results'].append(result)
+    
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000, 1000000])
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help="write the JSON report here instead of stdout")
+    args = parser.parse_args()
+    
+    report = run(args.sizes, args.seed)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == '__main__':
+    main()
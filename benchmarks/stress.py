@@ -0,0 +1,339 @@
+"""Multi-station stress test: concurrent check-ins and registrations on one file.
+
+Every configuration runs processes x threads stations against a freshly
+seeded database. Each seeded ticket is scanned by several stations (so
+stations race for the same check-in) and every station also registers new
+attendees. Stations go through EventDatabase.quick_checkin and
+add_registration exactly as the app's sessions do.
+
+    python -m benchmarks.stress --processes 1 2 4 --threads 1 4 8 --output stress.json
+
+Reported per configuration: operations per second, check-in and registration
+latency percentiles, time spent waiting for the write lock (BEGIN IMMEDIATE,
+measured with an SQLTracer) and "database is locked" errors. After each run
+the database is checked: every seeded ticket must be checked in by exactly
+one scan, every acknowledged registration must exist, and the dashboard
+counters must agree with the rows. Exits with status 1 if any check fails.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+from benchmarks.load import percentile, synthetic_attendees
+from database import EventDatabase, SQLTracer
+
+LOCKED_MESSAGE = "database is locked"
+
+
+class LockWaitTracer(SQLTracer):
+    """Keeps only totals: write-lock waits and statements that hit a lock"""
+    
+    def __init__(self):
+        super().__init__(capacity=0)
+        self.waits = []
+        self.locked_statements = 0
+    
+    def _caller(self):
+        return None
+    
+    def record(self, entry):
+        with self._lock:
+            if entry['sql'] == 'BEGIN IMMEDIATE':
+                self.waits.append(entry['duration_ms'])
+            if entry['error'] and LOCKED_MESSAGE in entry['error']:
+                self.locked_statements += 1
+
+
+def station_plan(scans, registrations, rng):
+    """One station's operations in random order: ticket ids and None for
+    'register someone'"""
+    plan = list(scans) + [None] * registrations
+    rng.shuffle(plan)
+    return plan
+
+
+def run_station(db, plan, rng, results):
+    checkins = {}
+    registered = []
+    checkin_times = []
+    register_times = []
+    locked_errors = 0
+    other_errors = []
+    attendees = synthetic_attendees(len(plan), rng)
+    
+    for ticket_id in plan:
+        attendee = next(attendees)
+        while True:
+            started = time.perf_counter()
+            try:
+                if ticket_id is None:
+                    success, message, new_ticket_id, _ = db.add_registration(attendee)
+                    if not success and LOCKED_MESSAGE in message:
+                        raise sqlite3.OperationalError(message)
+                    if success:
+                        registered.append(new_ticket_id)
+                    elif "already exists" not in message:
+                        other_errors.append(message)
+                    register_times.append(time.perf_counter() - started)
+                else:
+                    success, _ = db.quick_checkin(ticket_id)
+                    checkins[ticket_id] = checkins.get(ticket_id, 0) + int(success)
+                    checkin_times.append(time.perf_counter() - started)
+                break
+            except sqlite3.OperationalError as e:
+                if LOCKED_MESSAGE not in str(e):
+                    other_errors.append(str(e))
+                    break
+                # A station operator simply scans again
+                locked_errors += 1
+    
+    results.append({
+        'checkins': checkins,
+        'registered': registered,
+        'checkin_times': checkin_times,
+        'register_times': register_times,
+        'locked_errors': locked_errors,
+        'other_errors': other_errors,
+    })
+
+
+def run_process(db_path, plans, seed_value, busy_timeout, write_behind, barrier, output):
+    """One station process: a thread per plan, started together with the
+    other processes"""
+    db = EventDatabase(db_path, write_behind=write_behind)
+    tracer = LockWaitTracer()
+    db.pool.set_tracer(tracer)
+    results = []
+    
+    def station(index, plan):
+        # The pool gives each thread its own connection
+        db.get_connection().execute(f"PRAGMA busy_timeout = {int(busy_timeout)}")
+        run_station(db, plan, random.Random(seed_value * 1000 + index), results)
+    
+    threads = [threading.Thread(target=station, args=(i, plan)) for i, plan in enumerate(plans)]
+    barrier.wait()
+    started = time.time()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    finished = time.time()
+    
+    db.close()
+    output.put({
+        'started': started,
+        'finished': finished,
+        'stations': results,
+        'lock_waits_ms': tracer.waits,
+        'locked_statements': tracer.locked_statements,
+    })
+
+
+def seed(db_path, tickets, rng):
+    db = EventDatabase(db_path)
+    ticket_ids = db.add_registrations_bulk(synthetic_attendees(tickets, rng), chunk_size=5000)['ticket_ids']
+    db.close()
+    return ticket_ids
+
+
+def verify(db_path, ticket_ids, checkins, registered):
+    """Correctness checks after a run; returns a list of failure messages"""
+    failures = []
+    double = sorted(t for t, count in checkins.items() if count > 1)
+    unacknowledged = sorted(t for t in ticket_ids if checkins.get(t, 0) == 0)
+    if double:
+        failures.append(f"{len(double)} tickets checked in more than once, e.g. {double[:5]}")
+    if unacknowledged:
+        failures.append(f"{len(unacknowledged)} tickets never got a successful scan, "
+                        f"e.g. {unacknowledged[:5]}")
+    
+    conn = sqlite3.connect(db_path)
+    try:
+        conn.execute("CREATE TEMP TABLE expected (ticket_id TEXT PRIMARY KEY, seeded INTEGER)")
+        conn.executemany("INSERT INTO expected VALUES (?, 1)", [(t,) for t in ticket_ids])
+        conn.executemany("INSERT OR IGNORE INTO expected VALUES (?, 0)", [(t,) for t in registered])
+        
+        not_checked_in = conn.execute('''
+        SELECT COUNT(*) FROM expected e JOIN registrations r USING (ticket_id)
+        WHERE e.seeded AND (r.status != 'checked_in' OR r.checkin_time IS NULL)
+        ''').fetchone()[0]
+        missing = conn.execute('''
+        SELECT COUNT(*) FROM expected e LEFT JOIN registrations r USING (ticket_id)
+        WHERE r.id IS NULL
+        ''').fetchone()[0]
+        total, checked_in = conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(status = 'checked_in'), 0) FROM registrations"
+        ).fetchone()
+        counted_total, counted_checked_in = conn.execute(
+            "SELECT COALESCE(SUM(total), 0), COALESCE(SUM(checked_in), 0) FROM registration_stats"
+        ).fetchone()
+    finally:
+        conn.close()
+    
+    if not_checked_in:
+        failures.append(f"{not_checked_in} seeded tickets are not checked in")
+    if missing:
+        failures.append(f"{missing} acknowledged tickets are missing from registrations")
+    if total != len(ticket_ids) + len(set(registered)):
+        failures.append(f"registrations has {total} rows, expected "
+                        f"{len(ticket_ids) + len(set(registered))}")
+    if (counted_total, counted_checked_in) != (total, checked_in):
+        failures.append(f"dashboard counters ({counted_total}, {counted_checked_in}) "
+                        f"disagree with rows ({total}, {checked_in})")
+    return failures
+
+
+def latency(timings):
+    timings = sorted(timings)
+    if not timings:
+        return None
+    return {
+        'count': len(timings),
+        'p50_ms': round(percentile(timings, 50) * 1000, 3),
+        'p95_ms': round(percentile(timings, 95) * 1000, 3),
+        'p99_ms': round(percentile(timings, 99) * 1000, 3),
+        'max_ms': round(timings[-1] * 1000, 3),
+    }
+
+
+def run_configuration(processes, threads, tickets, scans_per_ticket, registrations,
+                      busy_timeout, write_behind, seed_value):
+    rng = random.Random(seed_value)
+    stations = processes * threads
+    ctx = multiprocessing.get_context('spawn')
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'stress.db')
+        ticket_ids = seed(db_path, tickets, rng)
+        
+        # Each ticket goes to scans_per_ticket distinct stations where possible
+        scans = [[] for _ in range(stations)]
+        for ticket_id in ticket_ids:
+            for station in rng.sample(range(stations), min(scans_per_ticket, stations)):
+                scans[station].append(ticket_id)
+        plans = [station_plan(share, registrations, rng) for share in scans]
+        
+        barrier = ctx.Barrier(processes)
+        output = ctx.Queue()
+        workers = [
+            ctx.Process(target=run_process, args=(
+                db_path, plans[i * threads:(i + 1) * threads], seed_value + i,
+                busy_timeout, write_behind, barrier, output))
+            for i in range(processes)
+        ]
+        for worker in workers:
+            worker.start()
+        reports = [output.get() for _ in workers]
+        for worker in workers:
+            worker.join()
+        
+        checkins = {}
+        registered = []
+        checkin_times = []
+        register_times = []
+        lock_waits = []
+        locked_errors = locked_statements = 0
+        other_errors = []
+        for report in reports:
+            lock_waits.extend(report['lock_waits_ms'])
+            locked_statements += report['locked_statements']
+            for result in report['stations']:
+                for ticket_id, count in result['checkins'].items():
+                    checkins[ticket_id] = checkins.get(ticket_id, 0) + count
+                registered.extend(result['registered'])
+                checkin_times.extend(result['checkin_times'])
+                register_times.extend(result['register_times'])
+                locked_errors += result['locked_errors']
+                other_errors.extend(result['other_errors'])
+        
+        elapsed = (max(r['finished'] for r in reports) - min(r['started'] for r in reports))
+        failures = verify(db_path, ticket_ids, checkins, registered)
+    
+    operations = len(checkin_times) + len(register_times)
+    lock_waits.sort()
+    return {
+        'processes': processes,
+        'threads': threads,
+        'stations': stations,
+        'write_behind': write_behind,
+        'operations': operations,
+        'elapsed_seconds': round(elapsed, 3),
+        'operations_per_second': round(operations / elapsed, 1) if elapsed else None,
+        'checkin': latency(checkin_times),
+        'registration': latency(register_times),
+        'lock_wait': {
+            'transactions': len(lock_waits),
+            'total_ms': round(sum(lock_waits), 3),
+            'p95_ms': round(percentile(lock_waits, 95), 3) if lock_waits else None,
+            'max_ms': round(lock_waits[-1], 3) if lock_waits else None,
+        },
+        'locked_errors': locked_errors,
+        'locked_statements': locked_statements,
+        'other_errors': other_errors[:10],
+        'failures': failures,
+    }
+
+
+def run(processes, threads, tickets, scans_per_ticket, registrations, busy_timeout,
+        write_behind, seed_value=42):
+    report = {
+        'generated_at': datetime.now().isoformat(),
+        'python': platform.python_version(),
+        'sqlite_version': sqlite3.sqlite_version,
+        'cpu_count': os.cpu_count(),
+        'tickets': tickets,
+        'scans_per_ticket': scans_per_ticket,
+        'registrations_per_station': registrations,
+        'busy_timeout_ms': busy_timeout,
+        'results': [],
+    }
+    for process_count in processes:
+        for thread_count in threads:
+            report['results'].append(run_configuration(
+                process_count, thread_count, tickets, scans_per_ticket, registrations,
+                busy_timeout, write_behind, seed_value))
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--processes', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--threads', type=int, nargs='+', default=[1, 4, 8])
+    parser.add_argument('--tickets', type=int, default=2000)
+    parser.add_argument('--scans-per-ticket', type=int, default=2)
+    parser.add_argument('--registrations', type=int, default=25,
+                        help="new registrations per station")
+    parser.add_argument('--busy-timeout', type=int, default=15000,
+                        help="SQLite busy timeout per connection, in ms")
+    parser.add_argument('--write-behind', action='store_true',
+                        help="route each process's writes through its write queue")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help="write the JSON report here instead of stdout")
+    args = parser.parse_args()
+    
+    report = run(args.processes, args.threads, args.tickets, args.scans_per_ticket,
+                 args.registrations, args.busy_timeout, args.write_behind, args.seed)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    
+    failed = [r for r in report['results'] if r['failures']]
+    for result in failed:
+        print(f"FAILED {result['processes']}x{result['threads']}: " + "; ".join(result['failures']))
+    if failed:
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+"""Compare check-in ticket rendering with and without the template cache.
+
+Run from the repository root:
+
+    python -m benchmarks.tickets --tickets 200
+
+"uncached" clears the ticket templates and fonts before every ticket, which
+is what every create_checkin_qr call paid before templates: load the fonts,
+draw the header, titles, info box and instructions. "layout only" times the
+part after QR encoding, where the cache does its work; the rest of a ticket
+is the qrcode library choosing the best mask pattern.
+"""
+import argparse
+import time
+
+import qrcode
+from PIL import Image
+
+from barcode_generator import EventQRGenerator
+
+
+def tickets_per_second(generator, ticket_ids, cached):
+    started = time.perf_counter()
+    for ticket_id in ticket_ids:
+        if not cached:
+            EventQRGenerator.clear_template_cache()
+        generator.create_checkin_qr(ticket_id)
+    return len(ticket_ids) / (time.perf_counter() - started)
+
+
+def layout_per_second(generator, ticket_ids, cached):
+    """Tickets/sec for template lookup and rendering alone, on a fixed QR"""
+    qr = qrcode.QRCode(version=3, error_correction=qrcode.constants.ERROR_CORRECT_H,
+                       box_size=12, border=4)
+    qr.add_data(f"{generator.base_url}/?ticket={ticket_ids[0]}&action=checkin")
+    qr.make(fit=True)
+    modules = len(qr.get_matrix())
+    qr_mask = Image.new('1', (modules * qr.box_size,) * 2)
+    
+    started = time.perf_counter()
+    for ticket_id in ticket_ids:
+        if not cached:
+            EventQRGenerator.clear_template_cache()
+        generator.ticket_template(qr_mask.size).render(qr_mask, ticket_id)
+    return len(ticket_ids) / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--tickets', type=int, default=200)
+    args = parser.parse_args()
+    
+    generator = EventQRGenerator()
+    ticket_ids = [generator.generate_ticket_id() for _ in range(args.tickets)]
+    generator.create_checkin_qr(ticket_ids[0])  # warm-up
+    
+    uncached = tickets_per_second(generator, ticket_ids, cached=False)
+    cached = tickets_per_second(generator, ticket_ids, cached=True)
+    layout_uncached = layout_per_second(generator, ticket_ids, cached=False)
+    layout_cached = layout_per_second(generator, ticket_ids, cached=True)
+    
+    print(f"{args.tickets} check-in tickets")
+    print(f"  full ticket, uncached:   {uncached:10.1f} tickets/sec")
+    print(f"  full ticket, templates:  {cached:10.1f} tickets/sec ({cached / uncached:.1f}x)")
+    print(f"  layout only, uncached:   {layout_uncached:10.1f} tickets/sec")
+    print(f"  layout only, templates:  {layout_cached:10.1f} tickets/sec "
+          f"({layout_cached / layout_uncached:.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,21 +1,1339 @@
+import bisect
+import logging
+import os
+import queue
+import re
 import sqlite3
+import sys
+import sysconfig
+import threading
+import time
+from collections import OrderedDict, deque
+from functools import lru_cache
+from concurrent.futures import Future
+from contextlib import contextmanager
 import pandas as pd
-from datetime import datetime
+from datetime import datetime, timedelta
 import streamlit as st
 
+logger = logging.getLogger(__name__)
+
+
+class PooledConnection(sqlite3.Connection):
+    """SQLite connection owned by a ConnectionPool.
+
+    close() only rolls back unfinished work and hands the connection back to
+    the pool, so legacy callers that close the connection they got from
+    get_connection() return it for reuse.
+    """
+    
+    pool = None
+    tracer = None
+    
+    def close(self):
+        if self.in_transaction:
+            self.rollback()
+        if self.pool is not None:
+            self.pool.release(self)
+    
+    def close_for_real(self):
+        super().close()
+
+
+class TracedCursor(sqlite3.Cursor):
+    """Cursor whose statements are timed by the connection's SQLTracer"""
+    
+    def _traced(self, call, sql, *args):
+        return self.connection.tracer.run(self.connection, sql, call, sql, *args)
+    
+    def execute(self, sql, parameters=()):
+        return self._traced(super().execute, sql, parameters)
+    
+    def executemany(self, sql, seq_of_parameters):
+        return self._traced(super().executemany, sql, seq_of_parameters)
+    
+    def executescript(self, sql_script):
+        return self._traced(super().executescript, sql_script)
+
+
+class TracedConnection(PooledConnection):
+    """PooledConnection opened while the pool has an SQLTracer.
+
+    The pool picks the class when it opens a connection, so untraced
+    connections pay nothing and no connection changes class under a thread.
+    """
+    
+    def cursor(self, factory=TracedCursor):
+        return super().cursor(factory)
+    
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+    
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+    
+    def executescript(self, sql_script):
+        return self.cursor().executescript(sql_script)
+    
+    def commit(self):
+        if not self.in_transaction:
+            return super().commit()
+        return self.tracer.run(self, "COMMIT", super().commit)
+
+
+_SQL_STRING = re.compile(r"'(?:[^']|'')*'")
+_SQL_NUMBER = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?\b")
+_SQL_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_SQL_SPACE = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=1024)
+def normalize_sql(sql):
+    """Statement shape for grouping: literals become ?, placeholder lists
+    collapse and whitespace is squeezed"""
+    sql = _SQL_STRING.sub("?", sql)
+    sql = _SQL_NUMBER.sub("?", sql)
+    sql = _SQL_LIST.sub("(?, ...)", sql)
+    return _SQL_SPACE.sub(" ", sql).strip().rstrip(";")
+
+
+class SQLTracer:
+    """Opt-in statement log for the connections of a ConnectionPool.
+
+    Every execute/executemany/executescript and every commit is timed with
+    perf_counter and kept in a ring of the last `capacity` records: the
+    normalized statement, duration, rows affected (cursor.rowcount; None for
+    queries), the EventDatabase method (or other caller) that issued it, and
+    what SQLite itself reported through the connection callbacks: the trace
+    callback's count of statements run (implicit BEGINs and trigger programs
+    included) with the expanded text of the first, and the progress handler's
+    count of VM instructions, which separates real work from time spent
+    waiting on the write lock. Queries are timed to their first row.
+    
+    With log_path every record is also appended to that file as a JSON line.
+    """
+    
+    # Frames of these are plumbing, not the caller worth reporting
+    PLUMBING = ('PooledConnection.', 'TracedConnection.', 'TracedCursor.', 'SQLTracer.',
+                'ConnectionPool.')
+    LIBRARY_PATHS = tuple({sysconfig.get_paths()[key] for key in ('stdlib', 'purelib', 'platlib')})
+    
+    def __init__(self, capacity=1000, log_path=None, progress_steps=1000):
+        self.capacity = capacity
+        self.log_path = log_path
+        self.progress_steps = progress_steps
+        self._lock = threading.Lock()
+        self._records = deque(maxlen=capacity)
+        self._log = None
+        if log_path:
+            directory = os.path.dirname(log_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._log = open(log_path, 'a', encoding='utf-8', buffering=1)
+    
+    def install(self, conn):
+        """Hook the trace and progress callbacks into a new TracedConnection"""
+        state = conn._trace_state = {'statements': 0, 'steps': 0, 'expanded': None}
+        
+        def on_statement(sql):
+            state['statements'] += 1
+            if state['expanded'] is None and sql != 'BEGIN ':
+                state['expanded'] = sql
+        
+        def on_progress():
+            state['steps'] += 1
+            return 0
+        
+        conn.set_trace_callback(on_statement)
+        conn.set_progress_handler(on_progress, self.progress_steps)
+        conn.tracer = self
+    
+    def run(self, conn, sql, call, *args):
+        """Call call(*args) for conn, recording sql with its timing"""
+        state = conn._trace_state
+        state.update(statements=0, steps=0, expanded=None)
+        result = error = None
+        start = time.perf_counter()
+        try:
+            result = call(*args)
+            return result
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            duration = time.perf_counter() - start
+            rows = getattr(result, 'rowcount', -1)
+            self.record({
+                'at': time.time(),
+                'sql': normalize_sql(sql),
+                'duration_ms': duration * 1000,
+                'rows': rows if rows >= 0 else None,
+                'caller': self._caller(),
+                'thread': threading.current_thread().name,
+                'statements': state['statements'],
+                'vm_steps': state['steps'] * self.progress_steps,
+                'expanded': state['expanded'],
+                'error': error,
+            })
+    
+    def _caller(self):
+        """First frame in this module outside the plumbing, else the first
+        frame outside the standard library and installed packages"""
+        fallback = None
+        frame = sys._getframe(2)
+        while frame is not None:
+            code = frame.f_code
+            if code.co_filename == __file__:
+                name = getattr(code, 'co_qualname', code.co_name)
+                if not name.startswith(self.PLUMBING):
+                    return name
+            elif fallback is None and not code.co_filename.startswith(self.LIBRARY_PATHS):
+                fallback = f"{os.path.basename(code.co_filename)}:{code.co_name}"
+            frame = frame.f_back
+        return fallback
+    
+    def record(self, entry):
+        with self._lock:
+            self._records.append(entry)
+            if self._log is not None:
+                import json
+                self._log.write(json.dumps(entry) + "\n")
+    
+    def records(self):
+        """Ring contents, oldest first"""
+        with self._lock:
+            return list(self._records)
+    
+    def clear(self):
+        with self._lock:
+            self._records.clear()
+    
+    def summary(self, n=10, order_by='max_ms'):
+        """Top n statement shapes in the ring by max_ms, total_ms or mean_ms"""
+        if order_by not in ('max_ms', 'total_ms', 'mean_ms'):
+            raise ValueError("order_by must be 'max_ms', 'total_ms' or 'mean_ms'")
+        groups = {}
+        for entry in self.records():
+            group = groups.get(entry['sql'])
+            if group is None:
+                group = groups[entry['sql']] = {
+                    'sql': entry['sql'], 'count': 0, 'total_ms': 0.0, 'max_ms': 0.0,
+                    'rows': 0, 'vm_steps': 0, 'errors': 0, 'callers': set(),
+                    'slowest': None,
+                }
+            group['count'] += 1
+            group['total_ms'] += entry['duration_ms']
+            group['rows'] += entry['rows'] or 0
+            group['vm_steps'] += entry['vm_steps']
+            group['errors'] += entry['error'] is not None
+            if entry['caller']:
+                group['callers'].add(entry['caller'])
+            if group['slowest'] is None or entry['duration_ms'] > group['max_ms']:
+                group['max_ms'] = entry['duration_ms']
+                group['slowest'] = entry['expanded']
+        
+        for group in groups.values():
+            group['mean_ms'] = group['total_ms'] / group['count']
+            group['callers'] = sorted(group['callers'])
+        return sorted(groups.values(), key=lambda group: group[order_by], reverse=True)[:n]
+    
+    def close(self):
+        with self._lock:
+            if self._log is not None:
+                self._log.close()
+                self._log = None
+
+
+class ConnectionPool:
+    """Reuses SQLite connections for a database file.
+
+    A thread checks a connection out on first use and keeps it until its
+    outermost connection() block ends (or it closes a get_connection()
+    connection); then the connection goes back on the idle stack for the
+    next thread. Streamlit runs every rerun on a new thread, so connections
+    outlive the threads that use them. Connections still checked out by a
+    finished thread are reclaimed.
+    """
+    
+    # Applied to every new connection. journal_mode=WAL is persistent in the
+    # file, the rest are per-connection settings.
+    PRAGMAS = (
+        "PRAGMA journal_mode=WAL",
+        "PRAGMA synchronous=NORMAL",
+        "PRAGMA temp_store=MEMORY",
+        "PRAGMA cache_size=-16000",
+    )
+    
+    def __init__(self, db_path, timeout=15.0):
+        self.db_path = db_path
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._idle = []
+        self._checked_out = {}
+        self._depth = {}
+        self.tracer = None
+    
+    def set_tracer(self, tracer):
+        """Trace the pool's connections with tracer (None: stop).
+
+        Checked-out connections are left alone: idle ones are reopened with
+        the matching class when next checked out, and a thread holding one
+        switches on its next acquire() outside a transaction.
+        """
+        with self._lock:
+            previous, self.tracer = self.tracer, tracer
+        if previous is not None and previous is not tracer:
+            previous.close()
+    
+    def connect(self):
+        """A new connection outside the pool, for work that must stay on one
+        connection throughout; the caller closes it with close_for_real()"""
+        tracer = self.tracer
+        # timeout= installs SQLite's busy handler (PRAGMA busy_timeout)
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=self.timeout,
+            check_same_thread=False,
+            factory=PooledConnection if tracer is None else TracedConnection
+        )
+        if tracer is not None:
+            tracer.install(conn)
+        # Only while the file is still empty: it must precede journal_mode,
+        # and on an existing file it waits for the write lock. Older files
+        # are converted by EventDatabase.compact()
+        if conn.execute("PRAGMA page_count").fetchone()[0] == 0:
+            conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        for pragma in self.PRAGMAS:
+            conn.execute(pragma)
+        return conn
+    
+    def _reclaim(self):
+        """Return connections still checked out by finished threads"""
+        for thread in [t for t in self._checked_out if not t.is_alive()]:
+            conn = self._checked_out.pop(thread)
+            self._depth.pop(thread, None)
+            if conn.in_transaction:
+                conn.rollback()
+            self._idle.append(conn)
+    
+    def acquire(self):
+        """Return the calling thread's connection, checking one out if needed"""
+        thread = threading.current_thread()
+        conn = self._checked_out.get(thread)
+        if (conn is not None and conn.tracer is not self.tracer
+                and not self._depth.get(thread) and not conn.in_transaction):
+            # Tracing was switched: reopen rather than alter this connection.
+            # The old one closes once callers still holding it let go.
+            with self._lock:
+                self._checked_out.pop(thread, None)
+            conn.pool = None
+            conn = None
+        if conn is not None:
+            return conn
+        
+        with self._lock:
+            self._reclaim()
+            conn = self._idle.pop() if self._idle else None
+        if conn is not None and conn.tracer is not self.tracer:
+            conn.close_for_real()
+            conn = None
+        if conn is None:
+            conn = self.connect()
+            conn.pool = self
+        with self._lock:
+            self._checked_out[thread] = conn
+        return conn
+    
+    def release(self, conn):
+        """Put the calling thread's connection back on the idle stack, unless
+        it is still inside a connection() block"""
+        thread = threading.current_thread()
+        with self._lock:
+            if self._checked_out.get(thread) is not conn or self._depth.get(thread):
+                return
+            del self._checked_out[thread]
+            if conn.in_transaction:
+                conn.rollback()
+            self._idle.append(conn)
+    
+    @contextmanager
+    def connection(self, immediate=False):
+        """Lend the thread's connection; the outermost block commits or rolls back.
+
+        With immediate=True the outermost block starts with BEGIN IMMEDIATE so
+        the write lock is taken up front instead of on the first write.
+        """
+        thread = threading.current_thread()
+        # Checked out beforehand via get_connection(): the caller returns it
+        held = thread in self._checked_out
+        conn = self.acquire()
+        depth = self._depth.get(thread, 0)
+        self._depth[thread] = depth + 1
+        try:
+            if depth == 0 and immediate and not conn.in_transaction:
+                conn.execute("BEGIN IMMEDIATE")
+            yield conn
+            if depth == 0 and conn.in_transaction:
+                conn.commit()
+        except BaseException:
+            if depth == 0 and conn.in_transaction:
+                conn.rollback()
+            raise
+        finally:
+            self._depth[thread] = depth
+            if depth == 0 and not held:
+                self.release(conn)
+    
+    def close_all(self):
+        """Close every pooled connection (e.g. before deleting the file)"""
+        with self._lock:
+            for conn in self._idle + list(self._checked_out.values()):
+                conn.pool = None
+                conn.close_for_real()
+            self._idle.clear()
+            self._checked_out.clear()
+            self._depth.clear()
+
+
+class WriteQueue:
+    """Single writer thread that applies queued writes with group commit.
+
+    Callers submit a function taking a connection and get a Future back. The
+    writer drains up to max_batch operations, runs each under its own
+    savepoint inside one BEGIN IMMEDIATE transaction, commits once, and only
+    then resolves the futures. One commit and one write-lock acquisition
+    cover the whole group, and stations never contend for the lock.
+    
+    Groups form from writes that queue up while the previous commit runs.
+    max_delay adds a linger for stragglers; it only pays off when commits are
+    expensive (synchronous=FULL), since scanning stations block on their
+    future and cannot submit more while the writer waits.
+    """
+    
+    def __init__(self, pool, max_batch=64, max_delay=0.0):
+        self.pool = pool
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="sqlite-writer", daemon=True)
+        self._thread.start()
+    
+    def submit(self, operation, *args):
+        """Queue operation(*args, conn=...) and return a Future for its result"""
+        future = Future()
+        self._queue.put((future, operation, args))
+        return future
+    
+    def _next_batch(self):
+        item = self._queue.get()
+        if item is None:
+            return None
+        batch = [item]
+        deadline = time.monotonic() + self.max_delay
+        while len(batch) < self.max_batch:
+            # Take whatever queued up during the last commit, then linger
+            # briefly for stragglers before committing the group
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining > 0:
+                    item = self._queue.get(timeout=remaining)
+                else:
+                    item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                # Finish this group, then stop
+                self._queue.put(None)
+                break
+            batch.append(item)
+        return batch
+    
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            
+            outcomes = []
+            try:
+                with self.pool.connection(immediate=True) as conn:
+                    for future, operation, args in batch:
+                        if not future.set_running_or_notify_cancel():
+                            continue
+                        conn.execute("SAVEPOINT queued_write")
+                        try:
+                            outcomes.append((future, True, operation(*args, conn=conn)))
+                            conn.execute("RELEASE queued_write")
+                        except Exception as e:
+                            conn.execute("ROLLBACK TO queued_write")
+                            conn.execute("RELEASE queued_write")
+                            outcomes.append((future, False, e))
+            except Exception as e:
+                # The group commit itself failed (or BEGIN IMMEDIATE timed
+                # out before any operation ran): nothing in it was stored
+                for future, _, _ in batch:
+                    if future.done():
+                        continue
+                    if future.running() or future.set_running_or_notify_cancel():
+                        future.set_exception(e)
+                continue
+            
+            for future, ok, value in outcomes:
+                if ok:
+                    future.set_result(value)
+                else:
+                    future.set_exception(value)
+    
+    def close(self):
+        """Stop the writer after the queued operations are applied"""
+        self._queue.put(None)
+        self._thread.join()
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+_write_queues = {}
+_ticket_filters = {}
+_attendee_caches = {}
+# Whether search uses the FTS5 index, settled once per path: the index is
+# never dropped, and an SQLite without FTS5 cannot gain it mid-process
+_search_indexes = {}
+
+# Damaged scans shorter than this are never matched partially
+MIN_PARTIAL_TICKET_LENGTH = 4
+
+# The code part of a ticket id (after "RWT-"). Queries must repeat this exact
+# expression, compared COLLATE NOCASE, for SQLite to use
+# idx_registrations_ticket_code_nocase.
+TICKET_CODE_SQL = "substr(ticket_id, instr(ticket_id, '-') + 1)"
+
+ATTENDEE_COLUMNS = "id, ticket_id, first_name, last_name, status, checkin_time, event_id"
+ATTENDEE_FIELDS = ('ticket_id', 'first_name', 'last_name', 'status', 'checkin_time', 'event_id')
+
+# Per-event, per-day counters kept current by triggers, so dashboard stats
+# never scan registrations. Rows are keyed by event_id and
+# date(registration_time) ('' when unset).
+STATS_SCHEMA = (
+    '''
+    CREATE TABLE IF NOT EXISTS registration_stats (
+        event_id INTEGER NOT NULL DEFAULT 0,
+        reg_date TEXT NOT NULL,
+        total INTEGER NOT NULL DEFAULT 0,
+        checked_in INTEGER NOT NULL DEFAULT 0,
+        worship_team INTEGER NOT NULL DEFAULT 0,
+        volunteers INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (event_id, reg_date)
+    ) WITHOUT ROWID
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS trg_registration_stats_insert
+    AFTER INSERT ON registrations
+    BEGIN
+        INSERT INTO registration_stats (event_id, reg_date, total, checked_in, worship_team, volunteers)
+        VALUES (NEW.event_id, COALESCE(date(NEW.registration_time), ''), 1,
+                NEW.status IS 'checked_in', NEW.worship_team IS 1, NEW.volunteer IS 1)
+        ON CONFLICT(event_id, reg_date) DO UPDATE SET
+            total = total + 1,
+            checked_in = checked_in + excluded.checked_in,
+            worship_team = worship_team + excluded.worship_team,
+            volunteers = volunteers + excluded.volunteers;
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS trg_registration_stats_delete
+    AFTER DELETE ON registrations
+    BEGIN
+        UPDATE registration_stats SET
+            total = total - 1,
+            checked_in = checked_in - (OLD.status IS 'checked_in'),
+            worship_team = worship_team - (OLD.worship_team IS 1),
+            volunteers = volunteers - (OLD.volunteer IS 1)
+        WHERE event_id = OLD.event_id AND reg_date = COALESCE(date(OLD.registration_time), '');
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS trg_registration_stats_update
+    AFTER UPDATE OF event_id, registration_time, status, worship_team, volunteer ON registrations
+    BEGIN
+        UPDATE registration_stats SET
+            total = total - 1,
+            checked_in = checked_in - (OLD.status IS 'checked_in'),
+            worship_team = worship_team - (OLD.worship_team IS 1),
+            volunteers = volunteers - (OLD.volunteer IS 1)
+        WHERE event_id = OLD.event_id AND reg_date = COALESCE(date(OLD.registration_time), '');
+        INSERT INTO registration_stats (event_id, reg_date, total, checked_in, worship_team, volunteers)
+        VALUES (NEW.event_id, COALESCE(date(NEW.registration_time), ''), 1,
+                NEW.status IS 'checked_in', NEW.worship_team IS 1, NEW.volunteer IS 1)
+        ON CONFLICT(event_id, reg_date) DO UPDATE SET
+            total = total + 1,
+            checked_in = checked_in + excluded.checked_in,
+            worship_team = worship_team + excluded.worship_team,
+            volunteers = volunteers + excluded.volunteers;
+    END
+    ''',
+)
+
+REBUILD_STATS_SQL = '''
+INSERT INTO registration_stats (event_id, reg_date, total, checked_in, worship_team, volunteers)
+SELECT event_id, COALESCE(date(registration_time), ''), COUNT(*),
+       SUM(status IS 'checked_in'), SUM(worship_team IS 1), SUM(volunteer IS 1)
+FROM registrations
+GROUP BY 1, 2
+'''
+
+# Minute and hour buckets of registrations and check-ins per event, kept
+# current by triggers.
+ROLLUP_BUCKETS = "(SELECT 'minute' AS size, '%Y-%m-%d %H:%M' AS fmt UNION ALL SELECT 'hour', '%Y-%m-%d %H:00')"
+
+
+def _rollup_change(row, sign):
+    """Trigger statements adding (sign 1) or removing (sign -1) one row's counts"""
+    return f'''
+        INSERT INTO checkin_rollup (event_id, bucket_size, bucket, registrations, checkins)
+        SELECT {row}.event_id, g.size, strftime(g.fmt, {row}.registration_time), {sign}, 0
+        FROM {ROLLUP_BUCKETS} g
+        WHERE strftime(g.fmt, {row}.registration_time) IS NOT NULL
+        ON CONFLICT(event_id, bucket_size, bucket) DO UPDATE SET
+            registrations = registrations + excluded.registrations;
+        INSERT INTO checkin_rollup (event_id, bucket_size, bucket, registrations, checkins)
+        SELECT {row}.event_id, g.size, strftime(g.fmt, {row}.checkin_time), 0, {sign}
+        FROM {ROLLUP_BUCKETS} g
+        WHERE {row}.status IS 'checked_in' AND strftime(g.fmt, {row}.checkin_time) IS NOT NULL
+        ON CONFLICT(event_id, bucket_size, bucket) DO UPDATE SET
+            checkins = checkins + excluded.checkins;'''
+
+
+ROLLUP_SCHEMA = (
+    '''
+    CREATE TABLE IF NOT EXISTS checkin_rollup (
+        event_id INTEGER NOT NULL DEFAULT 0,
+        bucket_size TEXT NOT NULL,
+        bucket TEXT NOT NULL,
+        registrations INTEGER NOT NULL DEFAULT 0,
+        checkins INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (event_id, bucket_size, bucket)
+    ) WITHOUT ROWID
+    ''',
+    f'''
+    CREATE TRIGGER IF NOT EXISTS trg_checkin_rollup_insert
+    AFTER INSERT ON registrations
+    BEGIN{_rollup_change("NEW", 1)}
+    END
+    ''',
+    f'''
+    CREATE TRIGGER IF NOT EXISTS trg_checkin_rollup_delete
+    AFTER DELETE ON registrations
+    BEGIN{_rollup_change("OLD", -1)}
+    END
+    ''',
+    f'''
+    CREATE TRIGGER IF NOT EXISTS trg_checkin_rollup_update
+    AFTER UPDATE OF event_id, registration_time, checkin_time, status ON registrations
+    BEGIN{_rollup_change("OLD", -1)}{_rollup_change("NEW", 1)}
+    END
+    ''',
+)
+
+REBUILD_ROLLUP_SQL = f'''
+INSERT INTO checkin_rollup (event_id, bucket_size, bucket, registrations, checkins)
+SELECT e.event_id, g.size, strftime(g.fmt, e.t) AS bucket, SUM(e.reg), SUM(e.chk)
+FROM (
+    SELECT event_id, registration_time AS t, 1 AS reg, 0 AS chk FROM registrations
+    UNION ALL
+    SELECT event_id, checkin_time, 0, 1 FROM registrations WHERE status = 'checked_in'
+) e, {ROLLUP_BUCKETS} g
+WHERE strftime(g.fmt, e.t) IS NOT NULL
+GROUP BY e.event_id, g.size, bucket
+'''
+
+# External-content FTS5 index over the searchable registration columns.
+# prefix='2 3' keeps short prefix queries (greeter typing "jo") index-only.
+SEARCH_SCHEMA = (
+    '''
+    CREATE VIRTUAL TABLE IF NOT EXISTS registrations_fts USING fts5(
+        first_name, last_name, email, ticket_id,
+        content='registrations', content_rowid='id', prefix='2 3'
+    )
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS trg_registrations_fts_insert
+    AFTER INSERT ON registrations
+    BEGIN
+        INSERT INTO registrations_fts (rowid, first_name, last_name, email, ticket_id)
+        VALUES (NEW.id, NEW.first_name, NEW.last_name, NEW.email, NEW.ticket_id);
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS trg_registrations_fts_delete
+    AFTER DELETE ON registrations
+    BEGIN
+        INSERT INTO registrations_fts (registrations_fts, rowid, first_name, last_name, email, ticket_id)
+        VALUES ('delete', OLD.id, OLD.first_name, OLD.last_name, OLD.email, OLD.ticket_id);
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS trg_registrations_fts_update
+    AFTER UPDATE OF first_name, last_name, email, ticket_id ON registrations
+    BEGIN
+        INSERT INTO registrations_fts (registrations_fts, rowid, first_name, last_name, email, ticket_id)
+        VALUES ('delete', OLD.id, OLD.first_name, OLD.last_name, OLD.email, OLD.ticket_id);
+        INSERT INTO registrations_fts (rowid, first_name, last_name, email, ticket_id)
+        VALUES (NEW.id, NEW.first_name, NEW.last_name, NEW.email, NEW.ticket_id);
+    END
+    ''',
+)
+
+REBUILD_SEARCH_SQL = "INSERT INTO registrations_fts (registrations_fts) VALUES ('rebuild')"
+
+SEARCH_COLUMNS = '''r.ticket_id, r.first_name, r.last_name, r.email,
+       REPLACE(COALESCE(r.phone, ''), ',', '') as phone, r.status,
+       datetime(r.registration_time) as reg_time'''
+
+# Row-level change log feeding differential backups. Only ids are logged;
+# a differential backup reads the current row for every changed id.
+CHANGE_LOG_SCHEMA = (
+    '''
+    CREATE TABLE IF NOT EXISTS registration_changes (
+        change_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        registration_id INTEGER NOT NULL,
+        ticket_id TEXT,
+        operation TEXT NOT NULL,
+        changed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS backup_log (
+        backup_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        kind TEXT NOT NULL,
+        path TEXT,
+        since_change_id INTEGER,
+        change_id INTEGER NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS trg_registration_changes_insert
+    AFTER INSERT ON registrations
+    BEGIN
+        INSERT INTO registration_changes (registration_id, ticket_id, operation)
+        VALUES (NEW.id, NEW.ticket_id, 'insert');
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS trg_registration_changes_update
+    AFTER UPDATE ON registrations
+    BEGIN
+        INSERT INTO registration_changes (registration_id, ticket_id, operation)
+        VALUES (NEW.id, NEW.ticket_id, 'update');
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS trg_registration_changes_delete
+    AFTER DELETE ON registrations
+    BEGIN
+        INSERT INTO registration_changes (registration_id, ticket_id, operation)
+        VALUES (OLD.id, OLD.ticket_id, 'delete');
+    END
+    ''',
+)
+
+CHANGE_LOG_TRIGGERS = ('trg_registration_changes_insert', 'trg_registration_changes_update',
+                       'trg_registration_changes_delete')
+
+# Highest change id ever issued; survives pruning of the change log
+LAST_CHANGE_ID_SQL = "SELECT COALESCE((SELECT seq FROM sqlite_sequence WHERE name = 'registration_changes'), 0)"
+
+DIFF_BACKUP_FORMAT = "registration-diff"
+
+# Backup artifact: gzip-compressed tar holding MANIFEST_NAME first, then the
+# database snapshot and a CSV export of registrations
+BACKUP_ARTIFACT_FORMAT = "registration-backup"
+MANIFEST_NAME = "manifest.json"
+SNAPSHOT_NAME = "event_registration.db"
+EXPORT_NAME = "registrations.csv"
+
+# One row per archived event; its registrations live in archive_path
+ARCHIVE_SCHEMA = (
+    '''
+    CREATE TABLE IF NOT EXISTS event_archives (
+        event_id INTEGER PRIMARY KEY,
+        event_name TEXT,
+        event_date DATE,
+        archive_path TEXT NOT NULL,
+        registrations INTEGER NOT NULL DEFAULT 0,
+        checked_in INTEGER NOT NULL DEFAULT 0,
+        worship_team INTEGER NOT NULL DEFAULT 0,
+        volunteers INTEGER NOT NULL DEFAULT 0,
+        archived_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    ''',
+)
+
+IMPORT_COLUMNS = [
+    'ticket_id', 'first_name', 'last_name', 'email', 'phone', 'status',
+    'registration_time', 'checkin_time', 'worship_team', 'volunteer',
+    'source_system', 'scanned_data', 'emergency_contact', 'medical_notes',
+    'event_id'
+]
+
+# Upsert keeps the row id, so update triggers fire instead of a delete + insert
+IMPORT_REGISTRATION_SQL = f'''
+INSERT INTO registrations ({", ".join(IMPORT_COLUMNS)})
+VALUES (?, ?, ?, ?, ?, ?, COALESCE(?, CURRENT_TIMESTAMP), ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT(ticket_id) DO UPDATE SET
+{", ".join(f"{c} = excluded.{c}" for c in IMPORT_COLUMNS[1:])}
+'''
+
+INSERT_REGISTRATION_SQL = '''
+INSERT INTO registrations 
+(ticket_id, first_name, last_name, email, phone, 
+ emergency_contact, medical_notes, worship_team, volunteer, scanned_data, event_id)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+
+def normalize_ticket_payload(payload):
+    """Reduce a scanned payload (URL or raw text) to a candidate ticket id"""
+    if not payload:
+        return None
+    
+    payload = str(payload).strip()
+    
+    # Check-in QR codes carry the id as ?ticket=...
+    if "ticket=" in payload:
+        from urllib.parse import urlparse, parse_qs
+        query = urlparse(payload).query or payload.split("?", 1)[-1]
+        payload = parse_qs(query).get('ticket', [payload])[0].strip()
+    
+    # Case is kept: the exact lookup compares it, the fallbacks ignore it
+    return payload or None
+
+
+def _change_log_covers(conn, since_change_id, last_change_id):
+    """Whether registration_changes still holds every change after
+    since_change_id: not pruned past it, and ids did not go backwards"""
+    if last_change_id == since_change_id:
+        return True
+    oldest = conn.execute("SELECT MIN(change_id) FROM registration_changes").fetchone()[0]
+    return not (last_change_id < since_change_id or oldest is None or oldest > since_change_id + 1)
+
+
+def _changed_tickets(conn, since_change_id):
+    """Tickets written after since_change_id, from the change log.
+
+    Returns (last change id, {ticket_id: latest change id}). The dict is
+    None when the log no longer covers the range (pruned, or the database
+    was replaced), in which case the caller has to start over.
+    """
+    last_change_id = conn.execute(LAST_CHANGE_ID_SQL).fetchone()[0]
+    if last_change_id == since_change_id:
+        return last_change_id, {}
+    if not _change_log_covers(conn, since_change_id, last_change_id):
+        return last_change_id, None
+    
+    changes = dict(conn.execute('''
+    SELECT ticket_id, MAX(change_id) FROM registration_changes
+    WHERE change_id > ? AND change_id <= ?
+    GROUP BY ticket_id
+    ''', (since_change_id, last_change_id)).fetchall())
+    return last_change_id, changes
+
+
+def _csv_export_cursor(conn, where="1", params=()):
+    """Column names and a cursor over registrations in CSV export form"""
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(registrations)")]
+    # Phone cleanup happens in SQL instead of a per-element apply
+    select_list = ", ".join(
+        "REPLACE(COALESCE(phone, ''), ',', '') AS phone" if c == 'phone' else c
+        for c in columns
+    )
+    cursor = conn.execute(
+        f"SELECT {select_list} FROM registrations WHERE {where} ORDER BY id", params
+    )
+    return columns, cursor
+
+
+def _sha256_file(path, chunk_size=1 << 20):
+    import hashlib
+    
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _ticket_code(ticket_id):
+    """Python twin of TICKET_CODE_SQL"""
+    return ticket_id.split('-', 1)[1] if '-' in ticket_id else ticket_id
+
+
+def _fold_ticket(ticket_id):
+    """Case-folded ticket id for the TicketFilter. upper() equates at least
+    what SQLite's NOCASE does, so folded lookups never miss a match."""
+    return ticket_id.upper()
+
+
+class TicketFilter:
+    """In-memory index of ticket ids that rejects scans no ticket can match.
+
+    Keeps every ticket id and ticket code in sorted lists, so the exact,
+    truncated and code-only lookups of resolve_ticket can each be answered
+    with one bisect. A False from might_match() is definite; True only means
+    the database has to be asked. Ids are added as registrations are written
+    in this process; writes from elsewhere are picked up from the change log
+    every refresh_interval seconds. Before rejecting, a check reads the last
+    change id (one sqlite_sequence row) and refreshes first if the log moved,
+    so tickets just written elsewhere are never rejected; accepted scans do
+    not touch SQLite. Deleted tickets stay in the index (harmless: they are
+    just not rejected early).
+    """
+    
+    def __init__(self, pool, refresh_interval=1.0):
+        self.pool = pool
+        self.refresh_interval = refresh_interval
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._ids = []
+        self._codes = []
+        self._change_id = None
+        self._synced_at = 0.0
+        self.stats = {'passed': 0, 'rejected': 0, 'false_positives': 0, 'reloads': 0}
+        self.reload()
+    
+    def reload(self):
+        """Rebuild the index from the registrations table"""
+        with self.pool.connection() as conn:
+            # One read snapshot: the ids and the change id agree
+            own_snapshot = not conn.in_transaction
+            if own_snapshot:
+                conn.execute("BEGIN")
+            change_id = conn.execute(LAST_CHANGE_ID_SQL).fetchone()[0]
+            ids = sorted(_fold_ticket(row[0]) for row in conn.execute(
+                "SELECT ticket_id FROM registrations WHERE ticket_id IS NOT NULL"
+            ))
+            if own_snapshot:
+                conn.rollback()
+        
+        codes = sorted(_ticket_code(ticket_id) for ticket_id in ids)
+        with self._lock:
+            self._ids, self._codes = ids, codes
+            self._change_id = change_id
+            self._synced_at = time.monotonic()
+            self.stats['reloads'] += 1
+    
+    def add(self, ticket_ids):
+        """Record newly written ticket ids"""
+        ticket_ids = {_fold_ticket(str(ticket_id)) for ticket_id in ticket_ids if ticket_id}
+        with self._lock:
+            new_ids = [ticket_id for ticket_id in ticket_ids
+                       if not self._contains(self._ids, ticket_id, exact=True)]
+            if len(new_ids) > 64:
+                # Bulk: append and re-sort instead of shifting the lists per id
+                self._ids.extend(new_ids)
+                self._ids.sort()
+                self._codes.extend(_ticket_code(ticket_id) for ticket_id in new_ids)
+                self._codes.sort()
+                return
+            for ticket_id in new_ids:
+                bisect.insort(self._ids, ticket_id)
+                bisect.insort(self._codes, _ticket_code(ticket_id))
+    
+    def refresh(self):
+        """Pull ticket ids written by other processes from the change log"""
+        with self.pool.connection() as conn:
+            last_change_id, changes = _changed_tickets(conn, self._change_id)
+        
+        if changes is None:
+            self.reload()
+            return
+        self.add(changes)
+        self._change_id = last_change_id
+        self._synced_at = time.monotonic()
+    
+    @staticmethod
+    def _contains(values, prefix, exact=False):
+        """Whether the sorted list has an entry equal to / starting with prefix"""
+        i = bisect.bisect_left(values, prefix)
+        if i == len(values):
+            return False
+        return values[i] == prefix if exact else values[i].startswith(prefix)
+    
+    def might_match(self, payload):
+        """False when resolve_ticket() cannot possibly find a ticket for payload"""
+        stale = time.monotonic() - self._synced_at >= self.refresh_interval
+        # One thread refreshes; the others keep answering from the current index
+        if stale and self._refresh_lock.acquire(blocking=False):
+            try:
+                self.refresh()
+            finally:
+                self._refresh_lock.release()
+        
+        ticket_id = normalize_ticket_payload(payload)
+        if not ticket_id:
+            found = False
+        else:
+            ticket_id = _fold_ticket(ticket_id)
+            found = self._matches(ticket_id)
+            if not found and self._behind():
+                # Possibly written by another process since the last refresh
+                with self._refresh_lock:
+                    self.refresh()
+                found = self._matches(ticket_id)
+        with self._lock:
+            self.stats['passed' if found else 'rejected'] += 1
+        return found
+    
+    def _matches(self, ticket_id):
+        with self._lock:
+            if len(ticket_id) < MIN_PARTIAL_TICKET_LENGTH:
+                return self._contains(self._ids, ticket_id, exact=True)
+            code = ticket_id.rsplit('-', 1)[-1]
+            return (self._contains(self._ids, ticket_id) or
+                    self._contains(self._codes, code,
+                                   exact=len(code) < MIN_PARTIAL_TICKET_LENGTH))
+    
+    def _behind(self):
+        """Whether the change log moved past the last refresh"""
+        with self.pool.connection() as conn:
+            return conn.execute(LAST_CHANGE_ID_SQL).fetchone()[0] != self._change_id
+    
+    def record_false_positive(self):
+        """Count a scan that passed the filter but matched no ticket"""
+        with self._lock:
+            self.stats['false_positives'] += 1
+    
+    def get_stats(self):
+        with self._lock:
+            stats = dict(self.stats, size=len(self._ids))
+        checks = stats['passed'] + stats['rejected']
+        stats['rejection_rate'] = stats['rejected'] / checks if checks else 0.0
+        return stats
+
+
+class AttendeeCache:
+    """Bounded LRU of attendee rows keyed by exact ticket id.
+
+    Serves repeat scans (name and status) from memory. Each entry remembers
+    the change id it is current as of. Writes made through EventDatabase
+    replace or evict their tickets directly; any later write, from this
+    process or another, is found in the change log at most every
+    refresh_interval seconds and evicts the entry.
+    """
+    
+    def __init__(self, pool, max_size=4096, refresh_interval=1.0):
+        self.pool = pool
+        self.max_size = max_size
+        self.refresh_interval = refresh_interval
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._change_id = None
+        self._synced_at = 0.0
+        self.stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'invalidations': 0}
+    
+    def get(self, ticket_id):
+        """Cached attendee dict for ticket_id, or None"""
+        stale = time.monotonic() - self._synced_at >= self.refresh_interval
+        if stale and self._refresh_lock.acquire(blocking=False):
+            try:
+                self.refresh()
+            finally:
+                self._refresh_lock.release()
+        
+        with self._lock:
+            entry = self._entries.get(ticket_id)
+            if entry is None:
+                self.stats['misses'] += 1
+                return None
+            self._entries.move_to_end(ticket_id)
+            self.stats['hits'] += 1
+            return dict(entry[0])
+    
+    def put(self, attendee, change_id):
+        """Store an attendee dict (needs a 'ticket_id' key) as read or
+        written at change_id"""
+        with self._lock:
+            self._entries[attendee['ticket_id']] = (dict(attendee), change_id)
+            self._entries.move_to_end(attendee['ticket_id'])
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.stats['evictions'] += 1
+    
+    def invalidate(self, ticket_ids):
+        """Drop entries for tickets that were written"""
+        with self._lock:
+            for ticket_id in ticket_ids:
+                if self._entries.pop(ticket_id, None) is not None:
+                    self.stats['invalidations'] += 1
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+    
+    def refresh(self):
+        """Evict tickets changed after their entry was stored"""
+        with self.pool.connection() as conn:
+            if self._change_id is None:
+                last_change_id, changes = conn.execute(LAST_CHANGE_ID_SQL).fetchone()[0], {}
+            else:
+                last_change_id, changes = _changed_tickets(conn, self._change_id)
+        
+        if changes is None:
+            self.clear()
+        else:
+            with self._lock:
+                for ticket_id, change_id in changes.items():
+                    entry = self._entries.get(ticket_id)
+                    if entry is not None and entry[1] < change_id:
+                        del self._entries[ticket_id]
+                        self.stats['invalidations'] += 1
+        self._change_id = last_change_id
+        self._synced_at = time.monotonic()
+    
+    def get_stats(self):
+        with self._lock:
+            stats = dict(self.stats, size=len(self._entries), max_size=self.max_size)
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = stats['hits'] / lookups if lookups else 0.0
+        return stats
+
+
+def get_pool(db_path):
+    """Shared pool per database file, so every EventDatabase reuses connections"""
+    with _pools_lock:
+        return get_pool_locked(db_path)
+
+
+def get_pool_locked(db_path):
+    key = os.path.abspath(db_path)
+    pool = _pools.get(key)
+    if pool is None:
+        pool = _pools[key] = ConnectionPool(db_path)
+    return pool
+
+
+def get_ticket_filter(db_path):
+    """Shared ticket prefilter per database file, built on first use"""
+    key = os.path.abspath(db_path)
+    with _pools_lock:
+        ticket_filter = _ticket_filters.get(key)
+        if ticket_filter is None:
+            ticket_filter = _ticket_filters[key] = TicketFilter(get_pool_locked(db_path))
+        return ticket_filter
+
+
+def get_attendee_cache(db_path, max_size=4096):
+    """Shared attendee cache per database file; max_size applies on creation"""
+    key = os.path.abspath(db_path)
+    with _pools_lock:
+        cache = _attendee_caches.get(key)
+        if cache is None:
+            cache = _attendee_caches[key] = AttendeeCache(get_pool_locked(db_path), max_size)
+        return cache
+
+
+def get_write_queue(db_path):
+    """Shared single-writer queue per database file"""
+    key = os.path.abspath(db_path)
+    with _pools_lock:
+        write_queue = _write_queues.get(key)
+        if write_queue is None:
+            write_queue = _write_queues[key] = WriteQueue(get_pool_locked(db_path))
+        return write_queue
+
+
 class EventDatabase:
-    def __init__(self, db_path="event_registration.db"):
+    def __init__(self, db_path="event_registration.db", write_behind=False,
+                 attendee_cache_size=4096, trace_sql=False):
         self.db_path = db_path
+        self.pool = get_pool(db_path)
+        if trace_sql:
+            self.enable_sql_tracing()
         from barcode_generator import BarcodeGenerator
         self.barcode_gen = BarcodeGenerator()
-        self.init_db()
-        self.update_database_schema()
+        self._fts_available = None
+        # Event that queries, check-ins and new registrations are scoped to
+        # (None: all events)
+        self.active_event_id = None
+        self.migrate()
+        # Known ticket ids, so bad scans are rejected without a query
+        self.ticket_filter = get_ticket_filter(db_path)
+        # Names and statuses of recently scanned tickets
+        self.attendee_cache = get_attendee_cache(db_path, attendee_cache_size)
+        # Optional: route check-ins and registrations through one writer thread
+        self.write_queue = get_write_queue(db_path) if write_behind else None
     
     def get_connection(self):
-        return sqlite3.connect(self.db_path, check_same_thread=False)
+        """Pooled connection for ad-hoc queries; close() returns it to the pool"""
+        return self.pool.acquire()
+    
+    def connection(self):
+        """Context manager lending a pooled connection, committing on success"""
+        return self.pool.connection()
+    
+    def transaction(self):
+        """Context manager for writes: BEGIN IMMEDIATE, commit or roll back"""
+        return self.pool.connection(immediate=True)
+    
+    def close(self):
+        """Close all pooled connections to this database file"""
+        key = os.path.abspath(self.db_path)
+        with _pools_lock:
+            write_queue = _write_queues.pop(key, None)
+            _ticket_filters.pop(key, None)
+            _attendee_caches.pop(key, None)
+            _search_indexes.pop(key, None)
+        if write_queue is not None:
+            write_queue.close()
+        self.write_queue = None
+        self.pool.set_tracer(None)
+        self.pool.close_all()
+    
+    def enable_sql_tracing(self, capacity=1000, log_path=None, progress_steps=1000):
+        """Time every statement on this database file's pooled connections.
+
+        Keeps the last `capacity` statements in memory and, with log_path,
+        appends each one to that file as a JSON line. Returns the SQLTracer.
+        """
+        tracer = SQLTracer(capacity, log_path, progress_steps)
+        self.pool.set_tracer(tracer)
+        return tracer
+    
+    def disable_sql_tracing(self):
+        self.pool.set_tracer(None)
+    
+    def get_slow_statements(self, n=10, order_by='max_ms'):
+        """Slowest traced statement shapes: sql, count, total_ms, mean_ms,
+        max_ms, rows, vm_steps, errors, callers and the slowest expanded text"""
+        if self.pool.tracer is None:
+            return []
+        return self.pool.tracer.summary(n, order_by)
+    
+    def _write(self, operation, *args):
+        """Run operation(*args, conn=...) in a transaction or via the write queue"""
+        if self.write_queue is not None:
+            return self.write_queue.submit(operation, *args).result()
+        with self.transaction() as conn:
+            return operation(*args, conn=conn)
+    
+    def migrate(self):
+        """Apply pending schema migrations.
+
+        PRAGMA user_version records the last migration applied, so on an
+        up-to-date database this is a single PRAGMA read. The optional FTS5
+        search index is tracked apart from it (see _ensure_search_index),
+        and checked once per path per process.
+        """
+        migrations = self._migrations()
+        latest = migrations[-1][0]
+        
+        with self.connection() as conn:
+            current = conn.execute("PRAGMA user_version").fetchone()[0]
+        
+        if current < latest:
+            for version, description, migration in migrations:
+                with self.transaction() as conn:
+                    # Re-check under the write lock: another station may have migrated
+                    if conn.execute("PRAGMA user_version").fetchone()[0] >= version:
+                        continue
+                    migration(conn)
+                    conn.execute(f"PRAGMA user_version = {version}")
+                logger.info("Applied database migration %s: %s", version, description)
+        
+        self._ensure_search_index()
+    
+    def _ensure_search_index(self):
+        """Create the FTS5 index if migration 7 ran on an SQLite without FTS5
+        and this one has it, so search picks it up after an upgrade"""
+        key = os.path.abspath(self.db_path)
+        available = _search_indexes.get(key)
+        if available is None:
+            if not self.fts_available:
+                with self.connection() as conn:
+                    options = {row[0] for row in conn.execute("PRAGMA compile_options")}
+                if 'ENABLE_FTS5' in options:
+                    with self.transaction() as conn:
+                        self._create_search_index(conn)
+                    self._fts_available = None
+            available = _search_indexes[key] = self.fts_available
+        self._fts_available = available
+    
+    def _migrations(self):
+        """Numbered schema migrations, oldest first. Never renumber; append."""
+        return [
+            (1, "core tables", self._create_tables),
+            (2, "registration columns", self._add_missing_columns),
+            (3, "ticket code index", self._create_ticket_code_index),
+            (4, "dashboard counters", self._create_stats_table),
+            (5, "check-in rollups", self._create_rollup_table),
+            (6, "change log", self._create_change_log),
+            (7, "full-text search", self._create_search_index),
+            (8, "hot path indexes", self._create_hot_path_indexes),
+            (9, "pagination index", self._create_pagination_index),
+            (10, "event partitioning", self._partition_by_event),
+            (11, "event archives", self._create_archive_table),
+            (12, "case-insensitive ticket lookups", self._create_nocase_ticket_indexes),
+        ]
+    
+    def _create_derived_table(self, conn, table, schema, rebuild_sql):
+        """Create a trigger-maintained table, seeding it from existing rows"""
+        exists = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)
+        ).fetchone()
+        for statement in schema:
+            conn.execute(statement)
+        if not exists:
+            # First run on an existing database: seed from current rows
+            conn.execute(rebuild_sql)
+    
+    def rebuild_stats(self):
+        """Recompute the registration_stats counters from registrations"""
+        with self.transaction() as conn:
+            conn.execute("DELETE FROM registration_stats")
+            conn.execute(REBUILD_STATS_SQL)
+    
+    def rebuild_rollups(self):
+        """Recompute the checkin_rollup time buckets from registrations"""
+        with self.transaction() as conn:
+            conn.execute("DELETE FROM checkin_rollup")
+            conn.execute(REBUILD_ROLLUP_SQL)
+    
+    def get_activity_timeline(self, start=None, end=None, bucket_size='hour', event_id=None):
+        """Registrations and check-ins per time bucket from the rollup table.
+
+        start/end are datetimes or 'YYYY-MM-DD[ HH:MM]' strings (end exclusive),
+        bucket_size is 'minute' or 'hour'. event_id defaults to the active
+        event. Returns a DataFrame with bucket, registrations and checkins
+        columns in time order.
+        """
+        if event_id is None:
+            event_id = self.active_event_id
+        
+        query = '''
+        SELECT bucket, SUM(registrations) as registrations, SUM(checkins) as checkins
+        FROM checkin_rollup
+        WHERE bucket_size = ?
+        '''
+        params = [bucket_size]
+        
+        if event_id is not None:
+            query += " AND event_id = ?"
+            params.append(event_id)
+        if start is not None:
+            query += " AND bucket >= ?"
+            params.append(start.strftime('%Y-%m-%d %H:%M') if hasattr(start, 'strftime') else str(start))
+        if end is not None:
+            query += " AND bucket < ?"
+            params.append(end.strftime('%Y-%m-%d %H:%M') if hasattr(end, 'strftime') else str(end))
+        
+        query += " GROUP BY bucket HAVING SUM(registrations) > 0 OR SUM(checkins) > 0 ORDER BY bucket"
+        
+        with self.connection() as conn:
+            return pd.read_sql_query(query, conn, params=params)
     
-    def init_db(self):
-        conn = self.get_connection()
+    def _create_tables(self, conn):
+        """Migration 1: core tables"""
         cursor = conn.cursor()
         
         # Enhanced registrations table
@@ -67,183 +1385,545 @@ class EventDatabase:
             last_active TIMESTAMP
         )
         ''')
-        
-        conn.commit()
-        conn.close()
     
-    def update_database_schema(self):
-        """Update database schema to add missing columns"""
-        conn = self.get_connection()
+    def _add_missing_columns(self, conn):
+        """Migration 2: columns added after the first releases"""
         cursor = conn.cursor()
         
+        # Check if scanned_data column exists
+        cursor.execute("PRAGMA table_info(registrations)")
+        columns = [column[1] for column in cursor.fetchall()]
+        
+        # Add missing columns if they don't exist
+        columns_to_add = [
+            ('scanned_data', 'TEXT DEFAULT ""'),
+            ('emergency_contact', 'TEXT DEFAULT ""'),
+            ('medical_notes', 'TEXT DEFAULT ""'),
+            ('worship_team', 'INTEGER DEFAULT 0'),
+            ('volunteer', 'INTEGER DEFAULT 0'),
+            ('synced_to_cloud', 'INTEGER DEFAULT 0')
+        ]
+        
+        for column_name, column_type in columns_to_add:
+            if column_name not in columns:
+                cursor.execute(f"ALTER TABLE registrations ADD COLUMN {column_name} {column_type}")
+                logger.info("Added %s column", column_name)
+    
+    def _create_ticket_code_index(self, conn):
+        """Migration 3: lookup index on the ticket code so damaged scans
+        (prefix missing or mistyped) resolve without scanning the table"""
+        conn.execute(f'''
+        CREATE INDEX IF NOT EXISTS idx_registrations_ticket_code
+        ON registrations({TICKET_CODE_SQL})
+        ''')
+    
+    @staticmethod
+    def _has_event_column(conn):
+        return 'event_id' in [row[1] for row in conn.execute("PRAGMA table_info(registrations)")]
+    
+    def _create_stats_table(self, conn):
+        """Migration 4: trigger-maintained dashboard counters"""
+        if not self._has_event_column(conn):
+            return  # Keyed per event now; migration 10 creates them
+        self._create_derived_table(conn, 'registration_stats', STATS_SCHEMA, REBUILD_STATS_SQL)
+    
+    def _create_rollup_table(self, conn):
+        """Migration 5: trigger-maintained check-in time buckets"""
+        if not self._has_event_column(conn):
+            return  # Keyed per event now; migration 10 creates them
+        self._create_derived_table(conn, 'checkin_rollup', ROLLUP_SCHEMA, REBUILD_ROLLUP_SQL)
+    
+    def _create_change_log(self, conn):
+        """Migration 6: change log and backup log for differential backups"""
+        for statement in CHANGE_LOG_SCHEMA:
+            conn.execute(statement)
+    
+    def _create_search_index(self, conn):
+        """Migration 7: FTS5 index for search_registrations"""
         try:
-            # Check if scanned_data column exists
-            cursor.execute("PRAGMA table_info(registrations)")
-            columns = [column[1] for column in cursor.fetchall()]
-            
-            # Add missing columns if they don't exist
-            columns_to_add = [
-                ('scanned_data', 'TEXT DEFAULT ""'),
-                ('emergency_contact', 'TEXT DEFAULT ""'),
-                ('medical_notes', 'TEXT DEFAULT ""'),
-                ('worship_team', 'INTEGER DEFAULT 0'),
-                ('volunteer', 'INTEGER DEFAULT 0'),
-                ('synced_to_cloud', 'INTEGER DEFAULT 0')
-            ]
-            
-            for column_name, column_type in columns_to_add:
-                if column_name not in columns:
-                    cursor.execute(f"ALTER TABLE registrations ADD COLUMN {column_name} {column_type}")
-                    print(f"Added {column_name} column")
-            
-            conn.commit()
-            print("Database schema updated successfully")
-            
-        except Exception as e:
-            print(f"Error updating schema: {str(e)}")
-        finally:
-            conn.close()
+            conn.execute("SAVEPOINT fts")
+            self._create_derived_table(conn, 'registrations_fts', SEARCH_SCHEMA, REBUILD_SEARCH_SQL)
+            conn.execute("RELEASE fts")
+        except sqlite3.OperationalError as e:
+            # SQLite built without FTS5: search falls back to LIKE
+            conn.execute("ROLLBACK TO fts")
+            conn.execute("RELEASE fts")
+            logger.warning("Full-text search not available: %s", e)
+    
+    def _create_hot_path_indexes(self, conn):
+        """Migration 8: indexes for recent-registration listings and status filters"""
+        conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_registrations_registration_time
+        ON registrations(registration_time)
+        ''')
+        conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_registrations_status
+        ON registrations(status)
+        ''')
+    
+    def _create_pagination_index(self, conn):
+        """Migration 9: (status, registration_time) index for filtered keyset
+        pages; it also covers plain status filters"""
+        conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_registrations_status_time
+        ON registrations(status, registration_time)
+        ''')
+        conn.execute("DROP INDEX IF EXISTS idx_registrations_status")
+    
+    def _partition_by_event(self, conn):
+        """Migration 10: registrations belong to an event (0 = unassigned).
+
+        Adds the column, (re)builds the counters and rollups keyed per
+        event, and adds event-leading indexes so per-night queries only
+        touch that night's rows.
+        """
+        if not self._has_event_column(conn):
+            conn.execute("ALTER TABLE registrations ADD COLUMN event_id INTEGER NOT NULL DEFAULT 0")
+        
+        stats_columns = [row[1] for row in conn.execute("PRAGMA table_info(registration_stats)")]
+        if 'event_id' not in stats_columns:
+            for trigger in ('trg_registration_stats_insert', 'trg_registration_stats_delete',
+                            'trg_registration_stats_update', 'trg_checkin_rollup_insert',
+                            'trg_checkin_rollup_delete', 'trg_checkin_rollup_update'):
+                conn.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+            conn.execute("DROP TABLE IF EXISTS registration_stats")
+            conn.execute("DROP TABLE IF EXISTS checkin_rollup")
+            self._create_stats_table(conn)
+            self._create_rollup_table(conn)
+        
+        conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_registrations_event_time
+        ON registrations(event_id, registration_time)
+        ''')
+        conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_registrations_event_status_time
+        ON registrations(event_id, status, registration_time)
+        ''')
+    
+    def _create_archive_table(self, conn):
+        """Migration 11: summary rows of events moved to archive files"""
+        for statement in ARCHIVE_SCHEMA:
+            conn.execute(statement)
+    
+    def _create_nocase_ticket_indexes(self, conn):
+        """Migration 12: scans match ticket ids regardless of case, so the
+        partial lookups move to NOCASE indexes"""
+        conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_registrations_ticket_nocase
+        ON registrations(ticket_id COLLATE NOCASE)
+        ''')
+        conn.execute(f'''
+        CREATE INDEX IF NOT EXISTS idx_registrations_ticket_code_nocase
+        ON registrations({TICKET_CODE_SQL} COLLATE NOCASE)
+        ''')
+        conn.execute("DROP INDEX IF EXISTS idx_registrations_ticket_code")
     
     def create_event(self, event_name, event_date, location, capacity=1000):
         """Create a new event"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
         # Generate registration URL with unique ID
         import uuid
         event_code = str(uuid.uuid4())[:8]
         registration_url = f"https://rooted-world-tour.streamlit.app/?event={event_code}"
         
-        cursor.execute('''
-        INSERT INTO events (event_name, event_date, location, capacity, registration_url)
-        VALUES (?, ?, ?, ?, ?)
-        ''', (event_name, event_date, location, capacity, registration_url))
-        
-        event_id = cursor.lastrowid
-        conn.commit()
-        conn.close()
+        with self.transaction() as conn:
+            cursor = conn.execute('''
+            INSERT INTO events (event_name, event_date, location, capacity, registration_url)
+            VALUES (?, ?, ?, ?, ?)
+            ''', (event_name, event_date, location, capacity, registration_url))
+            event_id = cursor.lastrowid
         
         return event_id, registration_url
     
-    def add_registration(self, data):
-        """Add a new registration with all required fields"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
+    def list_events(self):
+        """All events, newest first; archived_at is set for archived events"""
+        with self.connection() as conn:
+            return pd.read_sql_query('''
+            SELECT e.id, e.event_name, e.event_date, e.location, e.capacity,
+                   e.registration_url, a.archived_at
+            FROM events e
+            LEFT JOIN event_archives a ON a.event_id = e.id
+            ORDER BY e.event_date DESC, e.id DESC
+            ''', conn)
+    
+    def set_active_event(self, event_id):
+        """Scope stats, search, exports, check-in and new registrations to
+        one event; None goes back to all events"""
+        self.active_event_id = None if event_id is None else int(event_id)
+    
+    def _event_filter(self, column="event_id"):
+        """SQL condition and params restricting a query to the active event"""
+        if self.active_event_id is None:
+            return "1", ()
+        return f"{column} = ?", (self.active_event_id,)
+    
+    def _ticket_event_filter(self):
+        """Like _event_filter() for ticket lookups and check-ins, which also
+        accept unassigned (event 0) tickets from before events existed"""
+        if self.active_event_id is None:
+            return "1", ()
+        return "event_id IN (?, 0)", (self.active_event_id,)
+    
+    def _registration_row(self, data, ticket_prefix="RWT"):
+        """Build the INSERT parameters for one registration, applying defaults"""
+        def value(key, default):
+            item = data.get(key, default)
+            # Missing DataFrame cells arrive as NaN
+            if item is None or (isinstance(item, float) and pd.isna(item)):
+                return default
+            return item
         
         # Generate ticket ID if not provided
-        if 'ticket_id' not in data or not data['ticket_id']:
-            data['ticket_id'] = self.barcode_gen.generate_ticket_id()
+        ticket_id = value('ticket_id', '')
+        if not ticket_id:
+            ticket_id = self.barcode_gen.generate_ticket_id(ticket_prefix)
         
-        # Generate CHECK-IN QR code
-        qr_img = self.barcode_gen.create_checkin_qr(data['ticket_id'])
+        phone = value('phone', '')
+        if isinstance(phone, float) and phone.is_integer():
+            phone = int(phone)
         
-        # Ensure all required fields have defaults
-        registration_data = {
-            'ticket_id': data['ticket_id'],
-            'first_name': data.get('first_name', ''),
-            'last_name': data.get('last_name', ''),
-            'email': data.get('email', ''),
-            'phone': data.get('phone', ''),
-            'emergency_contact': data.get('emergency_contact', ''),
-            'medical_notes': data.get('medical_notes', ''),
-            'worship_team': data.get('worship_team', 0),
-            'volunteer': data.get('volunteer', 0),
-            'scanned_data': data.get('scanned_data', 'manual_registration')
-        }
+        return (
+            str(ticket_id),
+            value('first_name', ''),
+            value('last_name', ''),
+            value('email', ''),
+            str(phone),
+            value('emergency_contact', ''),
+            value('medical_notes', ''),
+            int(value('worship_team', 0)),
+            int(value('volunteer', 0)),
+            value('scanned_data', 'manual_registration'),
+            int(value('event_id', self.active_event_id or 0))
+        )
+    
+    def add_registration(self, data):
+        """Add a new registration with all required fields"""
+        row = self._registration_row(data)
+        data['ticket_id'] = row[0]
         
         try:
-            cursor.execute('''
-            INSERT INTO registrations 
-            (ticket_id, first_name, last_name, email, phone, 
-             emergency_contact, medical_notes, worship_team, volunteer, scanned_data)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                registration_data['ticket_id'],
-                registration_data['first_name'],
-                registration_data['last_name'],
-                registration_data['email'],
-                registration_data['phone'],
-                registration_data['emergency_contact'],
-                registration_data['medical_notes'],
-                registration_data['worship_team'],
-                registration_data['volunteer'],
-                registration_data['scanned_data']
-            ))
-            
-            conn.commit()
-            conn.close()
-            
-            return True, "Registration successful!", data['ticket_id'], qr_img
+            self._write(self._insert_registration, row)
             
         except sqlite3.IntegrityError:
-            conn.close()
             return False, "Ticket ID already exists!", None, None
         except Exception as e:
-            conn.close()
             return False, f"Error: {str(e)}", None, None
+        
+        self.ticket_filter.add([data['ticket_id']])
+        
+        # Generate CHECK-IN QR code once the row is stored
+        qr_img = self.barcode_gen.create_checkin_qr(data['ticket_id'])
+        return True, "Registration successful!", data['ticket_id'], qr_img
     
-    def quick_checkin(self, ticket_id):
-        """Quick check-in using ticket ID or barcode scan"""
-        conn = self.get_connection()
+    def _insert_registration(self, row, conn):
+        conn.execute(INSERT_REGISTRATION_SQL, row)
+    
+    def add_registrations_bulk(self, records, chunk_size=500, ticket_prefix="RWT"):
+        """Insert many registrations with executemany, one transaction per chunk.
+
+        records may be an iterable of dicts or a DataFrame. No QR images are
+        rendered; use get_ticket_image() when one is needed. Returns a dict
+        with 'inserted', 'ticket_ids' and 'failed' (row index, ticket id,
+        message) entries.
+        """
+        if isinstance(records, pd.DataFrame):
+            records = records.to_dict('records')
+        
+        summary = {'inserted': 0, 'ticket_ids': [], 'failed': []}
+        chunk = []
+        
+        for index, data in enumerate(records):
+            try:
+                chunk.append((index, self._registration_row(data, ticket_prefix)))
+            except Exception as e:
+                ticket_id = data.get('ticket_id') if isinstance(data, dict) else None
+                summary['failed'].append((index, ticket_id, f"Error: {str(e)}"))
+            
+            if len(chunk) >= chunk_size:
+                self._insert_registration_chunk(chunk, summary)
+                chunk = []
+        
+        if chunk:
+            self._insert_registration_chunk(chunk, summary)
+        
+        self.ticket_filter.add(summary['ticket_ids'])
+        return summary
+    
+    def _insert_registration_chunk(self, chunk, summary):
+        """Write one chunk; on a constraint error retry row by row to isolate failures"""
+        try:
+            with self.transaction() as conn:
+                conn.executemany(INSERT_REGISTRATION_SQL, [row for _, row in chunk])
+            summary['inserted'] += len(chunk)
+            summary['ticket_ids'].extend(row[0] for _, row in chunk)
+            return
+        except sqlite3.IntegrityError:
+            pass
+        
+        with self.transaction() as conn:
+            for index, row in chunk:
+                try:
+                    conn.execute("SAVEPOINT bulk_row")
+                    conn.execute(INSERT_REGISTRATION_SQL, row)
+                    conn.execute("RELEASE bulk_row")
+                    summary['inserted'] += 1
+                    summary['ticket_ids'].append(row[0])
+                except sqlite3.Error as e:
+                    conn.execute("ROLLBACK TO bulk_row")
+                    conn.execute("RELEASE bulk_row")
+                    message = ("Ticket ID already exists!" if isinstance(e, sqlite3.IntegrityError)
+                               else f"Error: {str(e)}")
+                    summary['failed'].append((index, row[0], message))
+    
+    def get_ticket_image(self, ticket_id):
+        """Render the check-in ticket image for a stored ticket id"""
+        return self.barcode_gen.create_checkin_qr(ticket_id)
+    
+    def resolve_ticket(self, payload, conn=None):
+        """Resolve a scanned payload to its registration row.
+
+        Tries the exact ticket id first (one indexed lookup), then a bounded
+        prefix match for truncated scans, then the ticket code without its
+        prefix. Partial matches must be unique. Only tickets of the active
+        event (and unassigned ones) are considered. Returns a tuple of (id,
+        ticket_id, first_name, last_name, status, checkin_time, event_id) or
+        None.
+        """
+        ticket_id = normalize_ticket_payload(payload)
+        if not ticket_id:
+            return None
+        
+        if conn is None:
+            with self.connection() as conn:
+                return self.resolve_ticket(ticket_id, conn)
+        
         cursor = conn.cursor()
+        event_where, event_params = self._ticket_event_filter()
         
-        # First try exact ticket ID match
-        cursor.execute('''
-        UPDATE registrations 
+        # Happy path: exact match on the UNIQUE ticket_id index
+        cursor.execute(
+            f"SELECT {ATTENDEE_COLUMNS} FROM registrations WHERE ticket_id = ? AND {event_where}",
+            (ticket_id,) + event_params
+        )
+        row = cursor.fetchone()
+        if row:
+            return row
+        
+        # The fallbacks ignore case (imported, hand-typed and legacy ids)
+        # and use the NOCASE indexes
+        lookups = [("ticket_id = ? COLLATE NOCASE", (ticket_id,))]
+        if len(ticket_id) >= MIN_PARTIAL_TICKET_LENGTH:
+            code = ticket_id.rsplit('-', 1)[-1]
+            # Truncated scan: payload is the start of a ticket id
+            lookups.append(("ticket_id COLLATE NOCASE >= ? AND ticket_id COLLATE NOCASE < ?",
+                            (ticket_id, ticket_id + '\uffff')))
+            # Prefix missing or wrong: match the code part
+            lookups.append((f"{TICKET_CODE_SQL} COLLATE NOCASE = ?", (code,)))
+            if len(code) >= MIN_PARTIAL_TICKET_LENGTH:
+                # Truncated code without its prefix
+                lookups.append((f"{TICKET_CODE_SQL} COLLATE NOCASE >= ? AND "
+                                f"{TICKET_CODE_SQL} COLLATE NOCASE < ?",
+                                (code, code + '\uffff')))
+        
+        for where, params in lookups:
+            cursor.execute(
+                f"SELECT {ATTENDEE_COLUMNS} FROM registrations "
+                f"WHERE {where} AND {event_where} LIMIT 2",
+                params + event_params
+            )
+            rows = cursor.fetchall()
+            if len(rows) == 1:
+                return rows[0]
+            if rows:
+                # Ambiguous partial scan, never guess between attendees
+                return None
+        
+        return None
+    
+    def checkin_ticket(self, ticket_id, conn=None):
+        """Atomically check in an exact ticket id with a conditional UPDATE.
+
+        The UPDATE only matches 'registered' rows, so two stations scanning
+        the same ticket get exactly one first check-in between them, and a
+        rescan rewrites nothing (no row change, no triggers fired). The row
+        is read back in the same transaction (no UPDATE ... RETURNING, which
+        needs SQLite 3.35).
+        Unassigned (event 0) tickets from before events existed are still
+        accepted under the active event, with a logged warning.
+        Returns None for unknown tickets and tickets of another event than
+        the active one, otherwise a dict with the attendee name, status,
+        previous_status, previous_checkin_time, checkin_time and event_id.
+        """
+        if conn is None:
+            with self.transaction() as conn:
+                return self.checkin_ticket(ticket_id, conn)
+        
+        now = datetime.now().isoformat(sep=' ')
+        event_where, event_params = self._ticket_event_filter()
+        transitioned = conn.execute(f'''
+        UPDATE registrations
         SET checkin_time = ?, status = 'checked_in'
-        WHERE ticket_id = ? AND status = 'registered'
-        ''', (datetime.now(), ticket_id))
-        
-        if cursor.rowcount == 0:
-            # Try partial match
-            cursor.execute('''
-            UPDATE registrations 
-            SET checkin_time = ?, status = 'checked_in'
-            WHERE ticket_id LIKE ? AND status = 'registered'
-            ''', (datetime.now(), f"%{ticket_id}%"))
-        
-        conn.commit()
-        updated = cursor.rowcount > 0
-        
-        if updated:
-            cursor.execute('SELECT first_name, last_name FROM registrations WHERE ticket_id LIKE ?', (f"%{ticket_id}%",))
-            attendee = cursor.fetchone()
-            conn.close()
-            return True, attendee
-        else:
-            # Check if already checked in
-            cursor.execute('SELECT first_name, last_name, status FROM registrations WHERE ticket_id LIKE ?', (f"%{ticket_id}%",))
-            result = cursor.fetchone()
-            conn.close()
-            
-            if result and result[2] == 'checked_in':
-                return False, (result[0], result[1])  # Return attendee info
+        WHERE ticket_id = ? AND status = 'registered' AND {event_where}
+        ''', (now, ticket_id) + event_params).rowcount == 1
+        
+        # Not transitioned: already checked in (or cancelled), or no ticket
+        row = conn.execute(
+            f"SELECT ticket_id, first_name, last_name, status, checkin_time, event_id "
+            f"FROM registrations WHERE ticket_id = ? AND {event_where}",
+            (ticket_id,) + event_params
+        ).fetchone()
+        if row is None:
+            return None
+        
+        ticket_id, first_name, last_name, status, checkin_time, event_id = row
+        if transitioned and event_id != self.active_event_id and self.active_event_id is not None:
+            logger.warning("Checked in unassigned ticket %s under event %s",
+                           ticket_id, self.active_event_id)
+        return {
+            'ticket_id': ticket_id,
+            'first_name': first_name,
+            'last_name': last_name,
+            'status': status,
+            'previous_status': 'registered' if transitioned else status,
+            'previous_checkin_time': None if transitioned else checkin_time,
+            'checkin_time': checkin_time,
+            'event_id': event_id
+        }
+    
+    def checkin_all_registered(self):
+        """Check in every registered attendee of the active event (of all
+        events when none is active). Returns the number checked in."""
+        ticket_ids = self._write(self._checkin_all_registered)
+        self.attendee_cache.invalidate(ticket_ids)
+        return len(ticket_ids)
+    
+    def _checkin_all_registered(self, conn):
+        now = datetime.now().isoformat(sep=' ')
+        event_where, event_params = self._event_filter()
+        ticket_ids = [row[0] for row in conn.execute(
+            f"SELECT ticket_id FROM registrations WHERE status = 'registered' AND {event_where}",
+            event_params
+        )]
+        conn.execute(f'''
+        UPDATE registrations
+        SET checkin_time = ?, status = 'checked_in'
+        WHERE status = 'registered' AND {event_where}
+        ''', (now,) + event_params)
+        return ticket_ids
+    
+    def quick_checkin(self, ticket_id):
+        """Quick check-in using ticket ID or barcode scan"""
+        # Garbage decodes and foreign tickets never reach SQLite
+        if not self.ticket_filter.might_match(ticket_id):
+            return False, None
+        
+        # Repeat scans of a checked-in ticket are answered from memory
+        cached = self._cached_attendee(normalize_ticket_payload(ticket_id))
+        if cached is not None and cached['status'] == 'checked_in':
+            return False, (cached['first_name'], cached['last_name'])
+        
+        result = self._write(self._quick_checkin, ticket_id)
+        if result is None:
+            self.ticket_filter.record_false_positive()
             return False, None
+        
+        self.attendee_cache.put({key: result[key] for key in ATTENDEE_FIELDS}, result['change_id'])
+        attendee = (result['first_name'], result['last_name'])
+        if result['previous_status'] != 'registered':
+            return False, attendee  # Already checked in
+        return True, attendee
     
-    def get_dashboard_stats(self, event_date=None):
-        """Get comprehensive dashboard statistics"""
-        conn = self.get_connection()
+    def _quick_checkin(self, ticket_id, conn):
+        """Check in a scanned payload; returns checkin_ticket()'s dict or None"""
+        # Happy path: exact id, one statement
+        result = self.checkin_ticket(normalize_ticket_payload(ticket_id), conn)
+        
+        if result is None:
+            # Damaged scan: resolve through the partial indexes first
+            row = self.resolve_ticket(ticket_id, conn)
+            if row is not None:
+                result = self.checkin_ticket(row[1], conn)
         
+        if result is not None:
+            # Our own change, so the attendee cache keeps this entry
+            result['change_id'] = conn.execute(LAST_CHANGE_ID_SQL).fetchone()[0]
+        return result
+    
+    def get_attendee(self, ticket_id):
+        """Name and status for a scanned ticket, served from the attendee
+        cache when possible. Returns a dict with ticket_id, first_name,
+        last_name, status, checkin_time and event_id, or None."""
+        if not self.ticket_filter.might_match(ticket_id):
+            return None
+        
+        attendee = self._cached_attendee(normalize_ticket_payload(ticket_id))
+        if attendee is None:
+            with self.connection() as conn:
+                # Taken before the read: a concurrent write can only evict
+                change_id = conn.execute(LAST_CHANGE_ID_SQL).fetchone()[0]
+                row = self.resolve_ticket(ticket_id, conn)
+            if row is None:
+                return None
+            attendee = dict(zip(ATTENDEE_FIELDS, row[1:]))
+            self.attendee_cache.put(attendee, change_id)
+        return attendee
+    
+    def _cached_attendee(self, ticket_id):
+        """Cache entry for an exact ticket id within the active event (or unassigned)"""
+        attendee = self.attendee_cache.get(ticket_id) if ticket_id else None
+        if attendee is None:
+            return None
+        if self.active_event_id is not None and attendee['event_id'] not in (self.active_event_id, 0):
+            return None
+        return attendee
+    
+    def get_attendee_cache_stats(self):
+        """Attendee cache counters: hits, misses, hit_rate, evictions,
+        invalidations, size and max_size"""
+        return self.attendee_cache.get_stats()
+    
+    def get_ticket_filter_stats(self):
+        """Prefilter counters: passed, rejected, false_positives, reloads,
+        size and rejection_rate"""
+        return self.ticket_filter.get_stats()
+    
+    def get_dashboard_stats(self, event_date=None):
+        """Get comprehensive dashboard statistics for the active event"""
         stats = {}
+        event_where, event_params = self._event_filter()
         
-        # Base query with COALESCE to handle NULL values
+        # Read the trigger-maintained per-day counters (one row per day)
         query = "SELECT "
-        query += "COUNT(*) as total, "
-        query += "COALESCE(SUM(CASE WHEN status = 'checked_in' THEN 1 ELSE 0 END), 0) as checked_in, "
-        query += "COALESCE(SUM(CASE WHEN worship_team = 1 THEN 1 ELSE 0 END), 0) as worship_team, "
-        query += "COALESCE(SUM(CASE WHEN volunteer = 1 THEN 1 ELSE 0 END), 0) as volunteers, "
-        query += "COUNT(DISTINCT date(registration_time)) as active_days "
-        query += "FROM registrations"
+        query += "COALESCE(SUM(total), 0) as total, "
+        query += "COALESCE(SUM(checked_in), 0) as checked_in, "
+        query += "COALESCE(SUM(worship_team), 0) as worship_team, "
+        query += "COALESCE(SUM(volunteers), 0) as volunteers, "
+        # Per-event rows: two events on one day are still one active day
+        query += "COUNT(DISTINCT CASE WHEN total > 0 AND reg_date != '' THEN reg_date END) as active_days "
+        query += f"FROM registration_stats WHERE {event_where}"
         
-        params = ()
+        params = event_params
         
         if event_date:
-            query += " WHERE date(registration_time) = ?"
-            params = (event_date,)
+            query += " AND reg_date = ?"
+            params += (str(event_date),)
         
-        cursor = conn.cursor()
-        cursor.execute(query, params)
-        result = cursor.fetchone()
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(query, params)
+            result = cursor.fetchone()
+            
+            # Hourly check-ins for today from the hour buckets
+            cursor.execute(f'''
+            SELECT substr(bucket, 12, 2) as hour, SUM(checkins) as count
+            FROM checkin_rollup 
+            WHERE bucket_size = 'hour' AND {event_where}
+            AND bucket >= ? AND bucket < ?
+            GROUP BY hour
+            HAVING SUM(checkins) > 0
+            ORDER BY hour
+            ''', event_params + (datetime.now().date().isoformat(),
+                  (datetime.now().date() + timedelta(days=1)).isoformat()))
+            hourly_data = cursor.fetchall()
         
         # Initialize all stats with 0 to avoid None values
         stats['total'] = result[0] or 0 if result else 0
@@ -260,142 +1940,996 @@ class EventDatabase:
         else:
             stats['checkin_rate'] = "0%"
         
-        # Hourly check-ins for today
-        cursor.execute('''
-        SELECT strftime('%H', checkin_time) as hour, COUNT(*) as count
-        FROM registrations 
-        WHERE date(checkin_time) = date('now') 
-        AND status = 'checked_in'
-        AND checkin_time IS NOT NULL
-        GROUP BY hour
-        ORDER BY hour
-        ''')
-        
-        hourly_data = cursor.fetchall()
         stats['hourly_checkins'] = {str(hour): count for hour, count in hourly_data}
         
-        conn.close()
         return stats
     
-    def search_registrations(self, search_term):
-        """Search registrations by name, email, or ticket ID"""
-        conn = self.get_connection()
+    @property
+    def fts_available(self):
+        """Whether the FTS5 search index exists (SQLite may lack FTS5)"""
+        if self._fts_available is None:
+            with self.connection() as conn:
+                self._fts_available = conn.execute(
+                    "SELECT 1 FROM sqlite_master WHERE name = 'registrations_fts'"
+                ).fetchone() is not None
+        return self._fts_available
+    
+    def search_registrations(self, search_term, limit=50):
+        """Search registrations by name, email, or ticket ID
+
+        Each word of search_term is matched as a prefix against the FTS5 index
+        and results are ranked with bm25, names and ticket ids weighted above
+        email. Empty terms return the latest registrations. Results are limited
+        to the active event.
+        """
+        tokens = re.findall(r'\w+', search_term or '')
+        event_where, event_params = self._event_filter("r.event_id")
         
+        if not tokens:
+            query = f'''
+            SELECT {SEARCH_COLUMNS}
+            FROM registrations r
+            WHERE {event_where}
+            ORDER BY r.registration_time DESC
+            LIMIT ?
+            '''
+            params = event_params + (limit,)
+        elif self.fts_available:
+            query = f'''
+            SELECT {SEARCH_COLUMNS}
+            FROM registrations_fts f
+            JOIN registrations r ON r.id = f.rowid
+            WHERE registrations_fts MATCH ? AND {event_where}
+            ORDER BY bm25(registrations_fts, 3.0, 3.0, 1.0, 2.0), r.registration_time DESC
+            LIMIT ?
+            '''
+            match = " ".join(f'"{token}"*' for token in tokens)
+            params = (match,) + event_params + (limit,)
+        else:
+            query = f'''
+            SELECT {SEARCH_COLUMNS}
+            FROM registrations r
+            WHERE (r.first_name LIKE ? OR r.last_name LIKE ? OR r.email LIKE ? OR r.ticket_id LIKE ?)
+            AND {event_where}
+            ORDER BY r.registration_time DESC
+            LIMIT ?
+            '''
+            search_pattern = f"%{search_term}%"
+            params = (search_pattern,) * 4 + event_params + (limit,)
+        
+        with self.connection() as conn:
+            return pd.read_sql_query(query, conn, params=params)
+    
+    def get_recent_registrations(self, limit=20):
+        """Get recent registrations"""
+        df, _ = self.get_registrations_page(page_size=limit)
+        return df[['ticket_id', 'first_name', 'last_name', 'email', 'status', 'reg_time']]
+    
+    def get_registrations_page(self, after=None, page_size=50, status=None,
+                               worship_team=None, volunteer=None):
+        """Keyset-paginated registrations, newest first.
+
+        after is the cursor returned with the previous page (None for the
+        first page). status may be one value or a list; worship_team and
+        volunteer filter on the flags when not None. Rows are limited to the
+        active event. Each page is an index range scan on registration_time
+        (or status + registration_time, event-leading when an event is
+        active), so cost does not grow with the table. Returns
+        (DataFrame, next_cursor), next_cursor being None on the last page.
+        """
         query = '''
-        SELECT ticket_id, first_name, last_name, email, phone, status, 
-               datetime(registration_time) as reg_time
+        SELECT id, ticket_id, first_name, last_name, email,
+               REPLACE(COALESCE(phone, ''), ',', '') as phone, status,
+               worship_team, volunteer,
+               datetime(registration_time) as reg_time,
+               registration_time
         FROM registrations
-        WHERE first_name LIKE ? OR last_name LIKE ? OR email LIKE ? OR ticket_id LIKE ?
-        ORDER BY registration_time DESC
-        LIMIT 50
+        WHERE registration_time IS NOT NULL
         '''
+        params = []
+        
+        if self.active_event_id is not None:
+            query += " AND event_id = ?"
+            params.append(self.active_event_id)
+        if isinstance(status, (list, tuple, set)):
+            statuses = list(status)
+            if statuses:
+                query += f" AND status IN ({', '.join('?' * len(statuses))})"
+                params.extend(statuses)
+        elif status is not None:
+            query += " AND status = ?"
+            params.append(status)
+        if worship_team is not None:
+            query += " AND worship_team = ?"
+            params.append(int(worship_team))
+        if volunteer is not None:
+            query += " AND volunteer = ?"
+            params.append(int(volunteer))
+        if after is not None:
+            query += " AND (registration_time, id) < (?, ?)"
+            params.extend(after)
+        
+        # Fetch one extra row to know whether another page exists
+        query += " ORDER BY registration_time DESC, id DESC LIMIT ?"
+        params.append(page_size + 1)
+        
+        with self.connection() as conn:
+            df = pd.read_sql_query(query, conn, params=params)
+        
+        next_cursor = None
+        if len(df) > page_size:
+            df = df.iloc[:page_size]
+            last = df.iloc[-1]
+            next_cursor = (last['registration_time'], int(last['id']))
+        
+        return df.drop(columns=['registration_time']), next_cursor
+    
+    def online_backup(self, dest_path, pages=256, sleep=0.005):
+        """Copy the live database to dest_path with the SQLite backup API.
+
+        Pages are copied pages at a time with a short sleep between steps, so
+        check-in writers are only blocked for one step. The source holds a
+        read snapshot for the whole copy, which keeps concurrent writes from
+        restarting the backup. The copy is verified with PRAGMA integrity_check.
+        Returns a report dict with path, pages, duration, pages_per_second and
+        integrity.
+        """
+        progress = {'pages': 0}
+        
+        def on_progress(status, remaining, total):
+            progress['pages'] = total
+        
+        started = time.perf_counter()
+        source = sqlite3.connect(self.db_path, timeout=self.pool.timeout)
+        target = sqlite3.connect(dest_path)
+        try:
+            # Pin a WAL read snapshot for the duration of the copy
+            source.execute("BEGIN")
+            source.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()
+            source.backup(target, pages=pages, progress=on_progress, sleep=sleep)
+            source.rollback()
+            
+            # Make the copy a single self-contained file
+            target.execute("PRAGMA journal_mode=DELETE")
+            integrity = target.execute("PRAGMA integrity_check").fetchone()[0]
+        finally:
+            target.close()
+            source.close()
+        
+        duration = time.perf_counter() - started
+        return {
+            'path': dest_path,
+            'pages': progress['pages'],
+            'duration': duration,
+            'pages_per_second': progress['pages'] / duration if duration > 0 else 0.0,
+            'integrity': integrity
+        }
+    
+    def backup_database(self, backup_dir="backups"):
+        """Create a backup of the database; returns the backup artifact path"""
+        try:
+            return self.create_backup_artifact(backup_dir)['path']
+        except Exception as e:
+            raise Exception(f"Backup failed: {str(e)}")
+
+    def _record_backup(self, conn, kind, path, since_change_id, change_id):
+        conn.execute('''
+        INSERT INTO backup_log (kind, path, since_change_id, change_id)
+        VALUES (?, ?, ?, ?)
+        ''', (kind, path, since_change_id, change_id))
+    
+    def last_backup_change_id(self):
+        """Change id covered by the most recent full or differential backup.
+
+        Backup artifacts are logged too but are not part of the chain.
+        """
+        with self.connection() as conn:
+            row = conn.execute(
+                "SELECT change_id FROM backup_log WHERE kind IN ('full', 'diff') "
+                "ORDER BY backup_id DESC LIMIT 1"
+            ).fetchone()
+        return row[0] if row else None
+    
+    def change_log_covers(self, since_change_id):
+        """Whether a differential backup since since_change_id would be
+        complete. False once the log was pruned past it or change ids were
+        reset, e.g. by deleting the sqlite_sequence row."""
+        with self.connection() as conn:
+            last_change_id = conn.execute(LAST_CHANGE_ID_SQL).fetchone()[0]
+            return _change_log_covers(conn, since_change_id, last_change_id)
+    
+    def record_backup(self, report):
+        """Add a snapshot or differential backup report to the chain.
+
+        Call it once the backup is safely stored (e.g. uploaded); until
+        then the next differential still starts from the previous backup.
+        A full snapshot starts a new chain, so the change log it covers is
+        pruned.
+        """
+        with self.transaction() as conn:
+            self._record_backup(conn, report['kind'], report['path'],
+                                report['since_change_id'], report['change_id'])
+            if report['kind'] == 'full':
+                conn.execute("DELETE FROM registration_changes WHERE change_id <= ?",
+                             (report['change_id'],))
+    
+    def create_snapshot_backup(self, backup_dir="backups", record=True):
+        """Full base snapshot that later differential backups build on.
+
+        Returns the online_backup report plus kind, since_change_id and the
+        change_id it covers. With record=False the caller passes the report
+        to record_backup() once the snapshot is stored.
+        """
+        os.makedirs(backup_dir, exist_ok=True)
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+        path = os.path.join(backup_dir, f"event_registration_base_{timestamp}.db")
+        
+        report = self.online_backup(path)
+        if report['integrity'] != 'ok':
+            raise Exception(f"Backup failed: integrity check returned {report['integrity']}")
+        
+        # Read the covered change id from the copy itself so it matches the snapshot
+        snapshot = sqlite3.connect(path)
+        try:
+            change_id = snapshot.execute(LAST_CHANGE_ID_SQL).fetchone()[0]
+        finally:
+            snapshot.close()
+        
+        report.update(kind='full', since_change_id=None, change_id=change_id)
+        if record:
+            self.record_backup(report)
+        return report
+    
+    def create_differential_backup(self, backup_dir="backups", since_change_id=None, filepath=None,
+                                   record=True):
+        """Write only the registrations changed since the last backup.
+
+        The file is JSON lines: a header with since/until change ids, then one
+        {"op": "upsert", "row": {...}} or {"op": "delete", ...} entry per
+        changed registration. Returns a report with kind, path,
+        since_change_id, change_id, upserts and deletes. With record=False
+        the caller passes the report to record_backup() once the file is
+        stored. Raises when the change log no longer reaches back to
+        since_change_id (see change_log_covers()); a new snapshot is needed.
+        """
+        import json
+        
+        if since_change_id is None:
+            since_change_id = self.last_backup_change_id()
+        if since_change_id is None:
+            raise Exception("No base backup yet; create a snapshot backup first")
+        
+        if filepath is None:
+            os.makedirs(backup_dir, exist_ok=True)
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+            filepath = os.path.join(backup_dir, f"registrations_diff_{timestamp}.jsonl")
         
-        search_pattern = f"%{search_term}%"
-        df = pd.read_sql_query(query, conn, params=(search_pattern, search_pattern, 
-                                                   search_pattern, search_pattern))
-        conn.close()
+        report = {'kind': 'diff', 'path': filepath, 'since_change_id': since_change_id,
+                  'change_id': since_change_id, 'upserts': 0, 'deletes': 0}
         
-        if 'phone' in df.columns:
-            df['phone'] = df['phone'].astype(str)
-            df['phone'] = df['phone'].apply(lambda x: str(x).replace(',', '') if pd.notna(x) else '')
+        with self.connection() as conn:
+            # One read transaction: the change window and row values agree
+            own_snapshot = not conn.in_transaction
+            if own_snapshot:
+                conn.execute("BEGIN")
+            change_id = conn.execute(LAST_CHANGE_ID_SQL).fetchone()[0]
+            if not _change_log_covers(conn, since_change_id, change_id):
+                if own_snapshot:
+                    conn.rollback()
+                raise Exception(
+                    f"The change log no longer covers changes since {since_change_id}; "
+                    "create a snapshot backup first"
+                )
+            report['change_id'] = change_id
+            
+            columns = [row[1] for row in conn.execute("PRAGMA table_info(registrations)")]
+            cursor = conn.execute(f'''
+            SELECT c.registration_id, c.ticket_id, {", ".join("r." + col for col in columns)}
+            FROM (
+                SELECT registration_id, ticket_id, MAX(change_id) AS last_change
+                FROM registration_changes
+                WHERE change_id > ? AND change_id <= ?
+                GROUP BY registration_id
+            ) c
+            LEFT JOIN registrations r ON r.id = c.registration_id
+            ORDER BY c.last_change
+            ''', (since_change_id, change_id))
+            
+            with open(filepath, 'w', encoding='utf-8') as f:
+                f.write(json.dumps({
+                    'format': DIFF_BACKUP_FORMAT,
+                    'version': 1,
+                    'since_change_id': since_change_id,
+                    'change_id': change_id,
+                    'created_at': datetime.now().isoformat(),
+                    'columns': columns
+                }) + "\n")
+                
+                for row in cursor:
+                    registration_id, ticket_id, values = row[0], row[1], row[2:]
+                    if values[0] is None:
+                        entry = {'op': 'delete', 'id': registration_id, 'ticket_id': ticket_id}
+                        report['deletes'] += 1
+                    else:
+                        entry = {'op': 'upsert', 'row': dict(zip(columns, values))}
+                        report['upserts'] += 1
+                    f.write(json.dumps(entry) + "\n")
+            if own_snapshot:
+                conn.rollback()
+        
+        if record:
+            self.record_backup(report)
+        return report
+    
+    @staticmethod
+    def restore_backup_chain(base_path, diff_paths, dest_path):
+        """Rebuild a database at dest_path from a base snapshot plus diffs.
 
-        return df
+        Diffs must be given in order and form an unbroken chain starting at
+        the base snapshot's change id. Replayed rows are not logged as new
+        changes, and the restored database continues at the chain's last
+        change id. Returns a summary with the final change_id and
+        upsert/delete counts.
+        """
+        import json
+        
+        source = sqlite3.connect(base_path)
+        target = sqlite3.connect(dest_path)
+        try:
+            source.backup(target)
+            chain_id = target.execute(LAST_CHANGE_ID_SQL).fetchone()[0]
+            summary = {'change_id': chain_id, 'upserts': 0, 'deletes': 0, 'diffs': 0}
+            
+            for diff_path in diff_paths:
+                with open(diff_path, encoding='utf-8') as f:
+                    header = json.loads(f.readline())
+                    if header.get('format') != DIFF_BACKUP_FORMAT:
+                        raise Exception(f"{diff_path} is not a differential backup")
+                    if header['since_change_id'] != chain_id:
+                        raise Exception(
+                            f"Broken backup chain: {diff_path} starts at change "
+                            f"{header['since_change_id']}, expected {chain_id}"
+                        )
+                    
+                    with target:
+                        # Change capture off: these changes already have ids
+                        for trigger in CHANGE_LOG_TRIGGERS:
+                            target.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+                        
+                        for line in f:
+                            entry = json.loads(line)
+                            if entry['op'] == 'delete':
+                                target.execute("DELETE FROM registrations WHERE id = ?", (entry['id'],))
+                                summary['deletes'] += 1
+                                continue
+                            
+                            row = entry['row']
+                            names = list(row)
+                            target.execute(f'''
+                            INSERT INTO registrations ({", ".join(names)})
+                            VALUES ({", ".join("?" * len(names))})
+                            ON CONFLICT(id) DO UPDATE SET
+                            {", ".join(f"{n} = excluded.{n}" for n in names if n != 'id')}
+                            ''', [row[n] for n in names])
+                            summary['upserts'] += 1
+                        
+                        for statement in CHANGE_LOG_SCHEMA:
+                            if 'CREATE TRIGGER' in statement:
+                                target.execute(statement)
+                        cursor = target.execute(
+                            "UPDATE sqlite_sequence SET seq = ? WHERE name = 'registration_changes'",
+                            (header['change_id'],)
+                        )
+                        if cursor.rowcount == 0:
+                            target.execute(
+                                "INSERT INTO sqlite_sequence (name, seq) VALUES ('registration_changes', ?)",
+                                (header['change_id'],)
+                            )
+                
+                chain_id = header['change_id']
+                summary['diffs'] += 1
+            
+            summary['change_id'] = chain_id
+            return summary
+        finally:
+            target.close()
+            source.close()
     
-    def get_recent_registrations(self, limit=20):
-        """Get recent registrations"""
-        conn = self.get_connection()
+    def prune_change_log(self, before_change_id=None):
+        """Drop change log rows already covered by a backup"""
+        if before_change_id is None:
+            before_change_id = self.last_backup_change_id() or 0
+        with self.transaction() as conn:
+            cursor = conn.execute(
+                "DELETE FROM registration_changes WHERE change_id <= ?", (before_change_id,)
+            )
+            return cursor.rowcount
+    
+    def create_backup_artifact(self, backup_dir="backups", compresslevel=6):
+        """Write a compressed, self-describing backup artifact.
+
+        Takes an online snapshot, exports its registrations to CSV and packs
+        both into backup_dir/registrations_<timestamp>.tar.gz behind a
+        manifest with SHA-256 checksums and sizes of both files, per-table
+        row counts, the schema version (PRAGMA user_version) and the change
+        id covered. The CSV is written from the snapshot, so the two always
+        agree. The artifact only appears under its final name once complete.
+        Returns a report with path, size and manifest.
+        """
+        import csv
+        import json
+        import shutil
+        import tarfile
+        import tempfile
         
-        query = f'''
-        SELECT ticket_id, first_name, last_name, email, status, 
-               datetime(registration_time) as reg_time
-        FROM registrations
-        ORDER BY registration_time DESC
-        LIMIT {limit}
-        '''
+        os.makedirs(backup_dir, exist_ok=True)
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+        path = os.path.join(backup_dir, f"registrations_{timestamp}.tar.gz")
         
-        df = pd.read_sql_query(query, conn)
-        conn.close()
+        workdir = tempfile.mkdtemp(dir=backup_dir, prefix=".backup-")
+        try:
+            snapshot_path = os.path.join(workdir, SNAPSHOT_NAME)
+            export_path = os.path.join(workdir, EXPORT_NAME)
+            
+            report = self.online_backup(snapshot_path)
+            if report['integrity'] != 'ok':
+                raise Exception(f"integrity check failed: {report['integrity']}")
+            
+            snapshot = sqlite3.connect(snapshot_path)
+            try:
+                tables = [row[0] for row in snapshot.execute('''
+                SELECT name FROM sqlite_master
+                WHERE type = 'table' AND name NOT LIKE 'sqlite_%' AND name NOT LIKE 'registrations_fts%'
+                ORDER BY name
+                ''')]
+                row_counts = {
+                    table: snapshot.execute(f'SELECT COUNT(*) FROM "{table}"').fetchone()[0]
+                    for table in tables
+                }
+                schema_version = snapshot.execute("PRAGMA user_version").fetchone()[0]
+                change_id = snapshot.execute(LAST_CHANGE_ID_SQL).fetchone()[0]
+                
+                columns, cursor = _csv_export_cursor(snapshot)
+                with open(export_path, 'w', newline='', encoding='utf-8') as f:
+                    writer = csv.writer(f)
+                    writer.writerow(columns)
+                    batch = cursor.fetchmany(1000)
+                    while batch:
+                        writer.writerows(batch)
+                        batch = cursor.fetchmany(1000)
+            finally:
+                snapshot.close()
+            
+            manifest = {
+                'format': BACKUP_ARTIFACT_FORMAT,
+                'version': 1,
+                'created_at': datetime.now().isoformat(),
+                'schema_version': schema_version,
+                'change_id': change_id,
+                'sqlite_version': sqlite3.sqlite_version,
+                'row_counts': row_counts,
+                'files': {
+                    name: {'sha256': _sha256_file(file_path), 'size': os.path.getsize(file_path)}
+                    for name, file_path in ((SNAPSHOT_NAME, snapshot_path), (EXPORT_NAME, export_path))
+                }
+            }
+            manifest_path = os.path.join(workdir, MANIFEST_NAME)
+            with open(manifest_path, 'w', encoding='utf-8') as f:
+                json.dump(manifest, f, indent=2)
+            
+            # Manifest first, so list/verify can read it without the payload
+            partial_path = path + ".partial"
+            with tarfile.open(partial_path, "w:gz", compresslevel=compresslevel) as tar:
+                for name in (MANIFEST_NAME, SNAPSHOT_NAME, EXPORT_NAME):
+                    tar.add(os.path.join(workdir, name), arcname=name)
+            os.replace(partial_path, path)
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
         
-        if 'phone' in df.columns:
-            df['phone'] = df['phone'].astype(str)
-            df['phone'] = df['phone'].apply(lambda x: str(x).replace(',', '') if pd.notna(x) else '')
+        with self.transaction() as conn:
+            self._record_backup(conn, 'artifact', path, None, change_id)
         
-        return df
+        return {'path': path, 'size': os.path.getsize(path), 'manifest': manifest}
     
-    def backup_database(self, backup_dir="backups"):
-        """Create a backup of the database"""
-        import os
+    @staticmethod
+    def read_backup_manifest(path):
+        """Manifest of a backup artifact, read without decompressing the rest"""
+        import json
+        import tarfile
+        
+        with tarfile.open(path, "r|gz") as tar:
+            member = tar.next()
+            if member is None or member.name != MANIFEST_NAME:
+                raise Exception(f"{path} is not a backup artifact (no manifest)")
+            manifest = json.load(tar.extractfile(member))
+        if manifest.get('format') != BACKUP_ARTIFACT_FORMAT:
+            raise Exception(f"{path} is not a backup artifact")
+        return manifest
+    
+    @staticmethod
+    def verify_backup_artifact(path, deep=False):
+        """Check a backup artifact against its manifest without restoring it.
+
+        Streams every member once, comparing SHA-256 and size with the
+        manifest. With deep=True the snapshot is also extracted to a
+        temporary file and checked with PRAGMA integrity_check and the
+        manifest's row counts. Returns a report with ok, errors and manifest.
+        """
+        import hashlib
+        import json
         import shutil
-        from datetime import datetime
+        import tarfile
+        import tempfile
         
+        report = {'path': path, 'ok': False, 'errors': [], 'manifest': None}
+        seen = set()
+        tmpdir = tempfile.mkdtemp() if deep else None
         try:
-            # Create backup directory if it doesn't exist
-            os.makedirs(backup_dir, exist_ok=True)
+            with tarfile.open(path, "r|gz") as tar:
+                for member in tar:
+                    f = tar.extractfile(member)
+                    if member.name == MANIFEST_NAME and report['manifest'] is None:
+                        report['manifest'] = json.load(f)
+                        continue
+                    
+                    expected = (report['manifest'] or {}).get('files', {}).get(member.name)
+                    if expected is None:
+                        report['errors'].append(f"unexpected member {member.name}")
+                        continue
+                    
+                    digest = hashlib.sha256()
+                    out = (open(os.path.join(tmpdir, SNAPSHOT_NAME), 'wb')
+                           if deep and member.name == SNAPSHOT_NAME else None)
+                    try:
+                        for chunk in iter(lambda: f.read(1 << 20), b''):
+                            digest.update(chunk)
+                            if out:
+                                out.write(chunk)
+                    finally:
+                        if out:
+                            out.close()
+                    
+                    seen.add(member.name)
+                    if digest.hexdigest() != expected['sha256']:
+                        report['errors'].append(f"{member.name}: checksum mismatch")
+                    if member.size != expected['size']:
+                        report['errors'].append(f"{member.name}: size mismatch")
             
-            # Create timestamped backup filename
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            backup_path = os.path.join(backup_dir, f"event_registration_backup_{timestamp}.db")
+            manifest = report['manifest']
+            if manifest is None or manifest.get('format') != BACKUP_ARTIFACT_FORMAT:
+                report['errors'].append("missing or invalid manifest")
+                return report
+            for name in set(manifest['files']) - seen:
+                report['errors'].append(f"missing member {name}")
             
-            # Copy the database file
-            shutil.copy2(self.db_path, backup_path)
+            if deep and SNAPSHOT_NAME in seen:
+                snapshot = sqlite3.connect(os.path.join(tmpdir, SNAPSHOT_NAME))
+                try:
+                    integrity = snapshot.execute("PRAGMA integrity_check").fetchone()[0]
+                    if integrity != 'ok':
+                        report['errors'].append(f"snapshot integrity: {integrity}")
+                    for table, count in manifest['row_counts'].items():
+                        actual = snapshot.execute(f'SELECT COUNT(*) FROM "{table}"').fetchone()[0]
+                        if actual != count:
+                            report['errors'].append(f"{table}: {actual} rows, manifest says {count}")
+                finally:
+                    snapshot.close()
+        except (tarfile.TarError, OSError, EOFError, ValueError) as e:
+            # Truncated or corrupt archive
+            report['errors'].append(f"unreadable archive: {e}")
+        finally:
+            if tmpdir:
+                shutil.rmtree(tmpdir, ignore_errors=True)
+        
+        report['ok'] = not report['errors']
+        return report
+    
+    @staticmethod
+    def list_backup_artifacts(backup_dir="backups"):
+        """Manifests of the backup artifacts in backup_dir, oldest first.
+
+        Only manifests are read. duplicate_of names an earlier artifact with
+        an identical registrations export.
+        """
+        import glob
+        
+        artifacts = []
+        first_by_content = {}
+        for path in sorted(glob.glob(os.path.join(backup_dir, "registrations_*.tar.gz"))):
+            entry = {'path': path, 'size': os.path.getsize(path)}
+            try:
+                manifest = EventDatabase.read_backup_manifest(path)
+            except Exception as e:
+                entry['error'] = str(e)
+                artifacts.append(entry)
+                continue
+            
+            content = manifest['files'][EXPORT_NAME]['sha256']
+            entry.update(
+                created_at=manifest['created_at'],
+                schema_version=manifest['schema_version'],
+                change_id=manifest['change_id'],
+                registrations=manifest['row_counts'].get('registrations'),
+                duplicate_of=first_by_content.get(content)
+            )
+            first_by_content.setdefault(content, path)
+            artifacts.append(entry)
+        return artifacts
+    
+    def database_size(self):
+        """Bytes used on disk by the database file and its WAL"""
+        return sum(os.path.getsize(path) for path in (self.db_path, self.db_path + "-wal")
+                   if os.path.exists(path))
+    
+    def compact(self, pages=None):
+        """Return free pages to the filesystem.
+
+        Runs PRAGMA incremental_vacuum (at most pages pages, all when None)
+        and truncates the WAL. A database created before incremental
+        auto-vacuum was enabled is converted with one full VACUUM first.
+        Returns a report with size_before, size_after, freed_pages and mode.
+        """
+        size_before = self.database_size()
+        with self.connection() as conn:
+            if conn.in_transaction:
+                raise Exception("compact() cannot run inside a transaction")
             
-            # Also export to CSV
-            csv_path = os.path.join(backup_dir, f"registrations_backup_{timestamp}.csv")
-            self.export_to_csv(csv_path)
+            free_pages = conn.execute("PRAGMA freelist_count").fetchone()[0]
             
-            return backup_path
+            if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+                conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+                conn.execute("VACUUM")
+                mode = 'full'
+            else:
+                # executescript steps the pragma to completion; execute() would
+                # free a single page
+                if pages is None:
+                    conn.executescript("PRAGMA incremental_vacuum;")
+                else:
+                    conn.executescript(f"PRAGMA incremental_vacuum({int(pages)});")
+                mode = 'incremental'
             
-        except Exception as e:
-            raise Exception(f"Backup failed: {str(e)}")
+            freed_pages = free_pages - conn.execute("PRAGMA freelist_count").fetchone()[0]
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        
+        return {
+            'size_before': size_before,
+            'size_after': self.database_size(),
+            'freed_pages': freed_pages,
+            'mode': mode
+        }
+    
+    def archive_event(self, event_id, archive_dir="archives", compact=True):
+        """Move one finished event's registrations to its own database file.
+
+        The rows (and the event row) are copied to archive_dir/event_<id>.db,
+        then deleted from the live tables in a second transaction that also
+        records a summary row in event_archives. If registrations for the
+        event arrive in between, the delete is rolled back and nothing is
+        lost. The archive stays queryable through attached_archive(). Returns
+        a report with the summary counts, archive_path and, when compact is
+        set, the compaction report.
+        """
+        event_id = int(event_id)
+        if event_id == self.active_event_id:
+            raise Exception("The active event cannot be archived")
+        
+        with self.connection() as conn:
+            event = conn.execute(
+                "SELECT event_name, event_date FROM events WHERE id = ?", (event_id,)
+            ).fetchone()
+            archived = conn.execute(
+                "SELECT 1 FROM event_archives WHERE event_id = ?", (event_id,)
+            ).fetchone()
+        if event is None:
+            raise Exception(f"Event {event_id} does not exist")
+        if archived:
+            raise Exception(f"Event {event_id} is already archived")
+        
+        os.makedirs(archive_dir, exist_ok=True)
+        archive_path = os.path.abspath(os.path.join(archive_dir, f"event_{event_id}.db"))
+        if os.path.exists(archive_path):
+            # Left over from an interrupted run: no summary row points at it
+            os.remove(archive_path)
+        
+        # 1. Copy into the archive file, on a connection of its own from
+        # ATTACH to close, so no pooled connection is left with it attached
+        conn = self.pool.connect()
+        try:
+            conn.execute("ATTACH DATABASE ? AS archive", (archive_path,))
+            conn.execute("BEGIN IMMEDIATE")
+            with conn:
+                for table in ('registrations', 'events'):
+                    sql = conn.execute(
+                        "SELECT sql FROM main.sqlite_master WHERE type = 'table' AND name = ?",
+                        (table,)
+                    ).fetchone()[0]
+                    conn.execute("CREATE TABLE archive." + sql[len("CREATE TABLE "):])
+                conn.execute(
+                    "INSERT INTO archive.registrations SELECT * FROM main.registrations WHERE event_id = ?",
+                    (event_id,)
+                )
+                conn.execute(
+                    "INSERT INTO archive.events SELECT * FROM main.events WHERE id = ?", (event_id,)
+                )
+                summary = conn.execute('''
+                SELECT COUNT(*), COALESCE(SUM(status IS 'checked_in'), 0),
+                       COALESCE(SUM(worship_team IS 1), 0), COALESCE(SUM(volunteer IS 1), 0)
+                FROM archive.registrations
+                ''').fetchone()
+            conn.execute("DETACH DATABASE archive")
+        finally:
+            conn.close_for_real()
+        
+        # 2. Record the summary and drop the rows from the live tables
+        with self.transaction() as conn:
+            conn.execute('''
+            INSERT INTO event_archives
+            (event_id, event_name, event_date, archive_path,
+             registrations, checked_in, worship_team, volunteers)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (event_id, event[0], event[1], archive_path) + tuple(summary))
+            deleted = conn.execute(
+                "DELETE FROM registrations WHERE event_id = ?", (event_id,)
+            ).rowcount
+            if deleted != summary[0]:
+                raise Exception(
+                    f"Event {event_id} changed while archiving ({deleted} rows, "
+                    f"{summary[0]} copied); nothing was removed, try again"
+                )
+            # The triggers left zeroed counters behind
+            conn.execute("DELETE FROM registration_stats WHERE event_id = ?", (event_id,))
+            conn.execute("DELETE FROM checkin_rollup WHERE event_id = ?", (event_id,))
+        
+        report = {
+            'event_id': event_id,
+            'archive_path': archive_path,
+            'registrations': summary[0],
+            'checked_in': summary[1],
+            'worship_team': summary[2],
+            'volunteers': summary[3]
+        }
+        if compact:
+            report['compaction'] = self.compact()
+        return report
+    
+    def archive_finished_events(self, archive_dir="archives", before=None):
+        """Archive every event dated before `before` (default: today) that is
+        not archived or active, then compact once. Returns the reports."""
+        before = before or datetime.now().date()
+        with self.connection() as conn:
+            event_ids = [row[0] for row in conn.execute('''
+            SELECT id FROM events
+            WHERE event_date < ?
+            AND id NOT IN (SELECT event_id FROM event_archives)
+            ORDER BY event_date
+            ''', (str(before),))]
+        
+        reports = [
+            self.archive_event(event_id, archive_dir, compact=False)
+            for event_id in event_ids if event_id != self.active_event_id
+        ]
+        if reports:
+            reports[-1]['compaction'] = self.compact()
+        return reports
+    
+    def list_archives(self):
+        """Summary rows of archived events"""
+        with self.connection() as conn:
+            return pd.read_sql_query(
+                "SELECT * FROM event_archives ORDER BY event_date DESC, event_id DESC", conn
+            )
+    
+    @contextmanager
+    def attached_archive(self, event_id, alias="archive"):
+        """Lend a pooled connection with an event's archive attached as
+        `alias`, detaching it afterwards. Archived rows can be queried (or
+        joined with live tables) as alias.registrations."""
+        if not alias.isidentifier():
+            raise ValueError(f"Invalid archive alias: {alias}")
+        
+        with self.connection() as conn:
+            row = conn.execute(
+                "SELECT archive_path FROM event_archives WHERE event_id = ?", (int(event_id),)
+            ).fetchone()
+        if row is None:
+            raise Exception(f"Event {event_id} is not archived")
+        if not os.path.exists(row[0]):
+            raise Exception(f"Archive file missing: {row[0]}")
+        
+        with self.connection() as conn:
+            conn.execute(f"ATTACH DATABASE ? AS {alias}", (row[0],))
+            try:
+                yield conn
+            finally:
+                conn.execute(f"DETACH DATABASE {alias}")
+    
+    def get_archived_registrations(self, event_id):
+        """All registrations of an archived event as a DataFrame"""
+        with self.attached_archive(event_id) as conn:
+            return pd.read_sql_query("SELECT * FROM archive.registrations ORDER BY id", conn)
+    
+    def export_to_csv(self, filepath, batch_size=1000, all_events=False):
+        """Export the active event's registrations to CSV (every event when
+        none is active or all_events is set, as backups do).
 
-    def export_to_csv(self, filepath):
-        """Export all registrations to CSV"""
-        conn = self.get_connection()
-        df = pd.read_sql_query("SELECT * FROM registrations", conn)
-        conn.close()
+        Rows are streamed from the cursor in batches of batch_size straight to
+        filepath (a path or a text file-like object), so memory stays flat
+        regardless of table size. Returns False when there is nothing to export.
+        """
+        import csv
         
-        if 'phone' in df.columns:
-            df['phone'] = df['phone'].astype(str)
-            df['phone'] = df['phone'].apply(lambda x: str(x).replace(',', '') if pd.notna(x) else '')
+        with self.connection() as conn:
+            event_where, event_params = ("1", ()) if all_events else self._event_filter()
+            columns, cursor = _csv_export_cursor(conn, event_where, event_params)
+            
+            batch = cursor.fetchmany(batch_size)
+            if not batch:
+                return False
+            
+            opened = not hasattr(filepath, 'write')
+            f = open(filepath, 'w', newline='', encoding='utf-8') if opened else filepath
+            try:
+                writer = csv.writer(f)
+                writer.writerow(columns)
+                while batch:
+                    writer.writerows(batch)
+                    batch = cursor.fetchmany(batch_size)
+            finally:
+                if opened:
+                    f.close()
         
-        if not df.empty:
-            df.to_csv(filepath, index=False)
-            return True
-        return False
+        return True
+    
+    def export_snapshot(self, filepath, format="parquet", batch_size=10000,
+                        all_events=False, where=None, params=()):
+        """Write registrations to a typed columnar file.
 
-    def import_from_csv(self, filepath):
-        """Import registrations from CSV"""
+        format is 'parquet' or 'arrow' (Arrow IPC file). Rows are streamed
+        from the cursor batch_size at a time and each batch becomes one
+        Parquet row group / Arrow record batch, so memory stays flat.
+        Columns keep their SQLite types: INTEGER columns as int64,
+        TIMESTAMP columns as timestamps, the rest (phone included) as
+        strings. Scoped like export_to_csv; `where` adds an SQL condition
+        with its params. filepath may be a path or a binary file-like
+        object. Returns a report with rows, batches and format.
+        """
         try:
-            df = pd.read_csv(filepath)
-            conn = self.get_connection()
-            cursor = conn.cursor()
+            import pyarrow as pa
+            import pyarrow.ipc
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise Exception("Columnar export requires pyarrow. Install with: pip install pyarrow")
+        
+        if format not in ('parquet', 'arrow'):
+            raise ValueError(f"Unknown snapshot format: {format}")
+        
+        with self.connection() as conn:
+            table_info = [(row[1], (row[2] or '').upper())
+                          for row in conn.execute("PRAGMA table_info(registrations)")]
             
-            for _, row in df.iterrows():
-                try:
-                    cursor.execute('''
-                    INSERT OR REPLACE INTO registrations 
-                    (ticket_id, first_name, last_name, email, phone, status, 
-                    registration_time, checkin_time, worship_team, volunteer)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    ''', (
-                        row.get('ticket_id'),
-                        row.get('first_name'),
-                        row.get('last_name'),
-                        row.get('email'),
-                        row.get('phone'),
-                        row.get('status', 'registered'),
-                        row.get('registration_time'),
-                        row.get('checkin_time'),
-                        row.get('worship_team', 0),
-                        row.get('volunteer', 0)
-                    ))
-                except Exception as e:
-                    print(f"Error importing row: {e}")
+            fields, integer_columns, time_columns = [], [], []
+            for name, declared in table_info:
+                if 'INT' in declared:
+                    fields.append(pa.field(name, pa.int64()))
+                    integer_columns.append(name)
+                elif declared in ('TIMESTAMP', 'DATETIME', 'DATE'):
+                    fields.append(pa.field(name, pa.timestamp('us')))
+                    time_columns.append(name)
+                else:
+                    fields.append(pa.field(name, pa.string()))
+            schema = pa.schema(fields)
+            columns = [name for name, _ in table_info]
+            
+            select_list = ", ".join(
+                "REPLACE(COALESCE(phone, ''), ',', '') AS phone" if c == 'phone' else c
+                for c in columns
+            )
+            event_where, event_params = ("1", ()) if all_events else self._event_filter()
+            query = f"SELECT {select_list} FROM registrations WHERE {event_where}"
+            if where:
+                query += f" AND ({where})"
+            cursor = conn.execute(query + " ORDER BY id", event_params + tuple(params))
             
-            conn.commit()
-            conn.close()
-            return True
+            if format == 'parquet':
+                writer = pq.ParquetWriter(filepath, schema, compression='snappy')
+            else:
+                writer = pa.ipc.new_file(filepath, schema)
+            
+            report = {'format': format, 'rows': 0, 'batches': 0}
+            try:
+                batch = cursor.fetchmany(batch_size)
+                while batch:
+                    df = pd.DataFrame.from_records(batch, columns=columns)
+                    for column in integer_columns:
+                        df[column] = pd.to_numeric(df[column], errors='coerce').astype('Int64')
+                    for column in time_columns:
+                        df[column] = pd.to_datetime(df[column], format='ISO8601', errors='coerce')
+                    
+                    writer.write_table(pa.Table.from_pandas(df, schema=schema, preserve_index=False))
+                    report['rows'] += len(batch)
+                    report['batches'] += 1
+                    batch = cursor.fetchmany(batch_size)
+            finally:
+                writer.close()
+        
+        if isinstance(filepath, str):
+            report['path'] = filepath
+        return report
+    
+    def import_from_csv(self, filepath, chunk_size=5000):
+        """Import registrations from CSV.
+
+        Streams the file in chunks, coerces column types per chunk and upserts
+        each chunk with executemany; the whole file is one transaction. Returns
+        a dict with 'inserted', 'replaced' and 'rejected' counts and an
+        'error' message when the import was rolled back. Rows without an
+        event_id column value go to the active event.
+        """
+        summary = {'inserted': 0, 'replaced': 0, 'rejected': 0, 'error': None}
+        ticket_ids = []
+        
+        try:
+            reader = pd.read_csv(filepath, chunksize=chunk_size,
+                                 dtype={'ticket_id': str, 'phone': str})
+            
+            with self.transaction() as conn:
+                for chunk in reader:
+                    rows = self._coerce_import_chunk(chunk, summary)
+                    if not rows:
+                        continue
+                    
+                    # Count rows that will replace an existing ticket
+                    chunk_ids = list({row[0] for row in rows})
+                    existing = set()
+                    for i in range(0, len(chunk_ids), 500):
+                        batch = chunk_ids[i:i + 500]
+                        placeholders = ", ".join("?" * len(batch))
+                        existing.update(r[0] for r in conn.execute(
+                            f"SELECT ticket_id FROM registrations WHERE ticket_id IN ({placeholders})",
+                            batch
+                        ))
+                    for row in rows:
+                        if row[0] in existing:
+                            summary['replaced'] += 1
+                        else:
+                            summary['inserted'] += 1
+                            existing.add(row[0])
+                    
+                    conn.executemany(IMPORT_REGISTRATION_SQL, rows)
+                    ticket_ids.extend(row[0] for row in rows)
+            
+            self.ticket_filter.add(ticket_ids)
+            self.attendee_cache.invalidate(ticket_ids)
+            return summary
             
         except Exception as e:
-            print(f"Import failed: {e}")
-            return False
+            # Rolled back: nothing from any chunk was committed
+            summary.update(inserted=0, replaced=0, rejected=0, error=str(e))
+            return summary
+    
+    def _coerce_import_chunk(self, chunk, summary):
+        """Vectorized cleanup of one CSV chunk into IMPORT_COLUMNS rows"""
+        df = chunk.reindex(columns=IMPORT_COLUMNS)
+        
+        text_columns = ['ticket_id', 'first_name', 'last_name', 'email']
+        for column in text_columns:
+            df[column] = df[column].astype('string').str.strip().replace('', pd.NA)
+        
+        # Rows without a ticket id or the NOT NULL fields cannot be restored
+        valid = df[text_columns].notna().all(axis=1)
+        summary['rejected'] += int((~valid).sum())
+        df = df[valid].copy()
+        
+        df['phone'] = df['phone'].astype('string').str.replace(',', '', regex=False).fillna('')
+        df['status'] = df['status'].fillna('registered')
+        df['source_system'] = df['source_system'].fillna('manual')
+        for column in ['scanned_data', 'emergency_contact', 'medical_notes']:
+            df[column] = df[column].fillna('')
+        for column in ['worship_team', 'volunteer']:
+            df[column] = pd.to_numeric(df[column], errors='coerce').fillna(0).astype(int)
+        df['event_id'] = (pd.to_numeric(df['event_id'], errors='coerce')
+                          .fillna(self.active_event_id or 0).astype(int))
+        
+        df = df.astype(object).where(df.notna(), None)
+        return list(df.itertuples(index=False, name=None))
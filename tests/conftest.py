@@ -0,0 +1,36 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import EventDatabase  # noqa: E402
+
+
+def attendee(n):
+    return {
+        'first_name': f'First{n}',
+        'last_name': f'Last{n}',
+        'email': f'attendee{n}@example.com',
+        'phone': f'555-{n:04d}',
+    }
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "event.db")
+
+
+@pytest.fixture
+def db(db_path):
+    database = EventDatabase(db_path)
+    yield database
+    database.close()
+
+
+def register(db, n, **fields):
+    """Add attendee n (fields override the defaults); returns the ticket id"""
+    success, message, ticket_id, _ = db.add_registration({**attendee(n), **fields})
+    assert success, message
+    return ticket_id
@@ -0,0 +1,112 @@
+import os
+import sqlite3
+
+import pytest
+
+from conftest import register
+
+
+@pytest.fixture
+def events(db):
+    old, _ = db.create_event("Old", "2024-05-01", "Hall A")
+    current, _ = db.create_event("Current", "2099-05-01", "Hall B")
+    db.set_active_event(old)
+    tickets = [register(db, n, volunteer=n == 0) for n in range(5)]
+    db.checkin_ticket(tickets[0])
+    db.set_active_event(current)
+    register(db, 10)
+    return old, current, tickets
+
+
+def live_count(db):
+    with db.connection() as conn:
+        return conn.execute("SELECT COUNT(*) FROM registrations").fetchone()[0]
+
+
+def test_archive_moves_the_event_out(db, events, tmp_path):
+    old, current, tickets = events
+    
+    report = db.archive_event(old, archive_dir=str(tmp_path / "archives"))
+    
+    assert (report['registrations'], report['checked_in'], report['volunteers']) == (5, 1, 1)
+    assert os.path.exists(report['archive_path'])
+    assert report['compaction']['mode'] == 'incremental'
+    assert live_count(db) == 1
+    
+    archived = db.get_archived_registrations(old)
+    assert sorted(archived['ticket_id']) == sorted(tickets)
+    assert list(db.list_archives()['event_id']) == [old]
+    
+    db.set_active_event(old)
+    assert db.get_dashboard_stats()['total'] == 0
+    with db.connection() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM registration_stats WHERE event_id = ?",
+                            (old,)).fetchone()[0] == 0
+
+
+def test_archive_leaves_pooled_connections_as_they_were(db, events, tmp_path):
+    db.archive_event(events[0], archive_dir=str(tmp_path), compact=False)
+    
+    assert db.pool._checked_out == {}
+    with db.connection() as conn:
+        assert [row[1] for row in conn.execute("PRAGMA database_list")] == ['main']
+    
+    with db.attached_archive(events[0]) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM archive.registrations").fetchone()[0] == 5
+    assert db.pool._checked_out == {}
+    with db.connection() as conn:
+        assert [row[1] for row in conn.execute("PRAGMA database_list")] == ['main']
+
+
+def test_archive_refuses_active_or_archived_events(db, events, tmp_path):
+    old, current, _ = events
+    with pytest.raises(Exception, match="active event"):
+        db.archive_event(current, archive_dir=str(tmp_path))
+    
+    db.archive_event(old, archive_dir=str(tmp_path), compact=False)
+    with pytest.raises(Exception, match="already archived"):
+        db.archive_event(old, archive_dir=str(tmp_path))
+
+
+def test_archive_finished_events_skips_the_active_one(db, events, tmp_path):
+    db.set_active_event(None)
+    reports = db.archive_finished_events(archive_dir=str(tmp_path), before="2050-01-01")
+    assert [report['event_id'] for report in reports] == [events[0]]
+    assert 'compaction' in reports[-1]
+
+
+def test_compact_returns_free_pages(db):
+    db.add_registrations_bulk([{'first_name': 'A' * 200, 'last_name': 'B', 'email': f'{n}@example.com'}
+                               for n in range(500)])
+    with db.transaction() as conn:
+        conn.execute("DELETE FROM registrations")
+    
+    report = db.compact()
+    assert report['mode'] == 'incremental'
+    assert report['freed_pages'] > 0
+    assert report['size_after'] < report['size_before']
+
+
+def test_new_file_gets_incremental_auto_vacuum(db):
+    with db.connection() as conn:
+        assert conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2
+
+
+def test_new_connection_reads_while_another_process_writes(db, db_path):
+    ticket_id = register(db, 1)
+    writer = sqlite3.connect(db_path)
+    db.pool.timeout = 0.1
+    try:
+        writer.execute("BEGIN IMMEDIATE")
+        writer.execute("UPDATE registrations SET phone = 'x'")
+        
+        # Opening a connection must not wait for the write lock
+        conn = db.pool.connect()
+        try:
+            assert conn.execute("SELECT first_name FROM registrations WHERE ticket_id = ?",
+                                (ticket_id,)).fetchone() == ('First1',)
+        finally:
+            conn.close_for_real()
+    finally:
+        writer.rollback()
+        writer.close()
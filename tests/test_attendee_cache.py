@@ -0,0 +1,66 @@
+import sqlite3
+
+from conftest import register
+from database import AttendeeCache
+
+
+def test_repeat_lookups_are_served_from_memory(db):
+    ticket_id = register(db, 1)
+    assert db.get_attendee(ticket_id)['status'] == 'registered'
+    assert db.get_attendee(ticket_id)['first_name'] == 'First1'
+    
+    stats = db.get_attendee_cache_stats()
+    assert (stats['misses'], stats['hits'], stats['size']) == (1, 1, 1)
+
+
+def test_checkin_replaces_the_entry(db):
+    ticket_id = register(db, 1)
+    db.get_attendee(ticket_id)
+    assert db.quick_checkin(ticket_id)[0] is True
+    
+    assert db.get_attendee(ticket_id)['status'] == 'checked_in'
+    # The rescan is answered from the cache
+    hits = db.get_attendee_cache_stats()['hits']
+    assert db.quick_checkin(ticket_id) == (False, ('First1', 'Last1'))
+    assert db.get_attendee_cache_stats()['hits'] == hits + 1
+
+
+def test_outside_write_evicts_on_refresh(db, db_path):
+    ticket_id = register(db, 1)
+    db.quick_checkin(ticket_id)
+    db.get_attendee(ticket_id)
+    
+    # Another station undoes the check-in
+    conn = sqlite3.connect(db_path)
+    with conn:
+        conn.execute("UPDATE registrations SET status = 'registered', checkin_time = NULL "
+                     "WHERE ticket_id = ?", (ticket_id,))
+    conn.close()
+    
+    db.attendee_cache.refresh()
+    assert db.get_attendee_cache_stats()['invalidations'] == 1
+    assert db.get_attendee(ticket_id)['status'] == 'registered'
+    assert db.quick_checkin(ticket_id)[0] is True
+
+
+def test_import_invalidates_replaced_tickets(db, tmp_path):
+    ticket_id = register(db, 1)
+    db.get_attendee(ticket_id)
+    
+    path = tmp_path / "import.csv"
+    path.write_text(f"ticket_id,first_name,last_name,email\n{ticket_id},New,Name,new@example.com\n")
+    assert db.import_from_csv(str(path))['replaced'] == 1
+    
+    assert db.get_attendee(ticket_id)['first_name'] == 'New'
+
+
+def test_least_recently_used_entry_is_dropped(db):
+    cache = AttendeeCache(db.pool, max_size=2, refresh_interval=3600)
+    for ticket_id in ('A', 'B'):
+        cache.put({'ticket_id': ticket_id}, 0)
+    cache.get('A')
+    cache.put({'ticket_id': 'C'}, 0)
+    
+    assert cache.get('B') is None
+    assert cache.get('A') is not None
+    assert cache.get_stats()['evictions'] == 1
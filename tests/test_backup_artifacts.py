@@ -0,0 +1,65 @@
+import os
+import tarfile
+
+import pytest
+
+from conftest import register
+from database import EventDatabase
+
+
+@pytest.fixture
+def backup_dir(tmp_path):
+    return str(tmp_path / "backups")
+
+
+def test_artifact_is_checksummed_and_verifiable(db, backup_dir):
+    tickets = [register(db, n) for n in range(3)]
+    db.checkin_ticket(tickets[0])
+    
+    report = db.create_backup_artifact(backup_dir)
+    manifest = report['manifest']
+    
+    assert manifest['row_counts']['registrations'] == 3
+    assert manifest['schema_version'] == db._migrations()[-1][0]
+    assert EventDatabase.read_backup_manifest(report['path']) == manifest
+    with tarfile.open(report['path']) as tar:
+        assert tar.getnames() == ['manifest.json', 'event_registration.db', 'registrations.csv']
+    
+    assert EventDatabase.verify_backup_artifact(report['path'], deep=True)['ok']
+    # Nothing is left behind besides the artifact
+    assert os.listdir(backup_dir) == [os.path.basename(report['path'])]
+
+
+def test_corrupt_artifact_fails_verification(db, backup_dir):
+    register(db, 1)
+    path = db.create_backup_artifact(backup_dir)['path']
+    with open(path, 'r+b') as f:
+        f.truncate(os.path.getsize(path) // 2)
+    
+    report = EventDatabase.verify_backup_artifact(path)
+    assert not report['ok']
+    assert report['errors']
+
+
+def test_listing_marks_unchanged_exports(db, backup_dir):
+    register(db, 1)
+    first = db.create_backup_artifact(backup_dir)['path']
+    second = db.create_backup_artifact(backup_dir)['path']
+    register(db, 2)
+    third = db.create_backup_artifact(backup_dir)['path']
+    
+    listed = {entry['path']: entry for entry in EventDatabase.list_backup_artifacts(backup_dir)}
+    assert listed[first]['duplicate_of'] is None
+    assert listed[second]['duplicate_of'] == first
+    assert listed[third]['duplicate_of'] is None
+    assert listed[third]['registrations'] == 2
+
+
+def test_artifact_does_not_move_the_diff_base(db, backup_dir):
+    register(db, 1)
+    base = db.create_snapshot_backup(backup_dir)
+    register(db, 2)
+    db.create_backup_artifact(backup_dir)
+    
+    assert db.last_backup_change_id() == base['change_id']
+    assert db.create_differential_backup(backup_dir)['upserts'] == 1
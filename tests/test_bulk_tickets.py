@@ -0,0 +1,58 @@
+import io
+import zipfile
+
+import pytest
+from PIL import Image
+
+from barcode_generator import EventQRGenerator
+
+
+@pytest.fixture(scope="module")
+def generator():
+    yield EventQRGenerator(base_url="https://tickets.example")
+    EventQRGenerator.shutdown_render_pool()
+
+
+def ticket_ids(n):
+    return [f"RWT-{i:08X}" for i in range(n)]
+
+
+def test_in_process_rendering_reports_progress(generator):
+    progress = []
+    rendered = dict(generator.render_tickets(ticket_ids(3), workers=1, progress=lambda *p: progress.append(p)))
+    
+    assert rendered["RWT-00000001"] == generator.render_ticket_png("RWT-00000001")
+    assert progress == [(1, 3), (2, 3), (3, 3)]
+    assert EventQRGenerator._render_pool is None
+
+
+def test_process_pool_renders_every_ticket(generator):
+    ids = ticket_ids(10)
+    progress = []
+    rendered = dict(generator.render_tickets(ids, workers=2, chunk_size=3,
+                                             progress=lambda *p: progress.append(p)))
+    
+    assert sorted(rendered) == ids
+    assert rendered[ids[7]] == generator.render_ticket_png(ids[7])
+    assert progress[-1] == (10, 10)
+    assert len(progress) == 4
+
+
+def test_zip_holds_one_png_per_ticket(generator):
+    ids = ticket_ids(4)
+    with zipfile.ZipFile(io.BytesIO(generator.build_tickets_zip(ids, workers=1))) as archive:
+        assert sorted(archive.namelist()) == [f"ticket_{t}.png" for t in ids]
+        png = archive.read(f"ticket_{ids[0]}.png")
+    assert png == generator.render_ticket_png(ids[0])
+
+
+def test_bulk_codes_keep_ticket_order_and_keys(generator):
+    codes = generator.generate_bulk_qr_codes(3, prefix="EVT", workers=1)
+    
+    assert [set(code) for code in codes] == [{'ticket_id', 'qr_image', 'qr_png', 'qr_data'}] * 3
+    assert all(code['ticket_id'].startswith("EVT-") for code in codes)
+    assert len({code['ticket_id'] for code in codes}) == 3
+    first = codes[0]
+    assert first['qr_data'] == generator.checkin_url(first['ticket_id'])
+    assert isinstance(first['qr_image'], Image.Image)
+    assert Image.open(io.BytesIO(first['qr_png'])).size == first['qr_image'].size
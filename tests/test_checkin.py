@@ -0,0 +1,97 @@
+import threading
+
+from conftest import register
+from database import EventDatabase, normalize_ticket_payload
+
+
+def test_payload_keeps_case_and_unwraps_urls():
+    assert normalize_ticket_payload("  rwt-Abc12345 ") == "rwt-Abc12345"
+    assert normalize_ticket_payload("https://example.com/?ticket=RWT-ABC12345&action=checkin") == "RWT-ABC12345"
+    assert normalize_ticket_payload("") is None
+
+
+def test_exact_ticket_id(db):
+    ticket_id = register(db, 1)
+    assert db.quick_checkin(ticket_id) == (True, ('First1', 'Last1'))
+
+
+def test_ticket_ids_match_case_insensitively(db):
+    ticket_id = register(db, 1, ticket_id='rwt-abc12345')
+    
+    assert db.quick_checkin('RWT-ABC12345') == (True, ('First1', 'Last1'))
+    assert db.get_attendee('Rwt-Abc12345')['ticket_id'] == ticket_id
+
+
+def test_url_payload_with_other_case(db):
+    register(db, 1, ticket_id='RWT-ABC12345')
+    assert db.quick_checkin("https://example.com/?ticket=rwt-abc12345&action=checkin")[0] is True
+
+
+def test_damaged_scans_resolve_uniquely(db):
+    register(db, 1, ticket_id='RWT-ABC12345')
+    register(db, 2, ticket_id='RWT-XYZ98765')
+    
+    # Truncated, prefix missing, wrong prefix, truncated code
+    for payload in ('RWT-ABC123', 'abc12345', 'VIP-ABC12345', 'ABC1234'):
+        assert db.resolve_ticket(payload)[1] == 'RWT-ABC12345', payload
+
+
+def test_ambiguous_or_short_scans_do_not_guess(db):
+    register(db, 1, ticket_id='RWT-ABC12345')
+    register(db, 2, ticket_id='RWT-ABC19999')
+    
+    assert db.resolve_ticket('RWT-ABC1') is None
+    assert db.resolve_ticket('ABC') is None
+
+
+def test_unknown_ticket(db):
+    register(db, 1)
+    assert db.quick_checkin('RWT-NOPE0000') == (False, None)
+
+
+def change_count(db):
+    with db.connection() as conn:
+        return conn.execute("SELECT COUNT(*) FROM registration_changes").fetchone()[0]
+
+
+def test_single_transition_and_quiet_rescan(db):
+    ticket_id = register(db, 1)
+    register(db, 2)
+    
+    first = db.checkin_ticket(ticket_id)
+    assert first['previous_status'] == 'registered'
+    assert first['status'] == 'checked_in'
+    assert first['checkin_time'] is not None
+    changes = change_count(db)
+    
+    again = db.checkin_ticket(ticket_id)
+    assert again['previous_status'] == 'checked_in'
+    assert again['previous_checkin_time'] == again['checkin_time'] == first['checkin_time']
+    # No row change, so neither the change log nor the counters moved
+    assert change_count(db) == changes
+    assert db.get_dashboard_stats()['checked_in'] == 1
+    assert db.quick_checkin(ticket_id)[0] is False
+
+
+def test_checkin_ticket_unknown_id(db):
+    register(db, 1)
+    assert db.checkin_ticket('RWT-NOPE0000') is None
+
+
+def test_only_one_of_two_racing_stations_checks_in(db_path):
+    db = EventDatabase(db_path)
+    ticket_id = register(db, 1)
+    start = threading.Barrier(4)
+    results = []
+    
+    def station():
+        start.wait(timeout=5)
+        results.append(db.checkin_ticket(ticket_id)['previous_status'])
+    
+    threads = [threading.Thread(target=station) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    db.close()
+    assert sorted(results) == ['checked_in'] * 3 + ['registered']
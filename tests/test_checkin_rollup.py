@@ -0,0 +1,53 @@
+from conftest import register
+
+
+def rollup(db):
+    with db.connection() as conn:
+        return conn.execute(
+            "SELECT event_id, bucket_size, bucket, registrations, checkins FROM checkin_rollup "
+            "WHERE registrations != 0 OR checkins != 0 ORDER BY 1, 2, 3"
+        ).fetchall()
+
+
+def place(db, ticket_id, registered, checked_in=None):
+    with db.transaction() as conn:
+        conn.execute(
+            "UPDATE registrations SET registration_time = ?, checkin_time = ?, status = ? WHERE ticket_id = ?",
+            (registered, checked_in, 'checked_in' if checked_in else 'registered', ticket_id)
+        )
+
+
+def test_timeline_buckets_registrations_and_checkins(db):
+    tickets = [register(db, n) for n in range(3)]
+    place(db, tickets[0], '2026-05-01 18:05:00', '2026-05-01 19:10:00')
+    place(db, tickets[1], '2026-05-01 18:40:00', '2026-05-01 19:15:00')
+    place(db, tickets[2], '2026-05-01 19:05:00')
+    
+    hourly = db.get_activity_timeline('2026-05-01', '2026-05-02')
+    assert hourly.values.tolist() == [
+        ['2026-05-01 18:00', 2, 0],
+        ['2026-05-01 19:00', 1, 2],
+    ]
+    
+    minutes = db.get_activity_timeline('2026-05-01 19:00', '2026-05-01 19:12', bucket_size='minute')
+    assert minutes.values.tolist() == [['2026-05-01 19:05', 1, 0], ['2026-05-01 19:10', 0, 1]]
+
+
+def test_triggers_agree_with_a_rebuild(db):
+    tickets = [register(db, n) for n in range(4)]
+    for ticket_id in tickets[:3]:
+        db.checkin_ticket(ticket_id)
+    place(db, tickets[1], '2026-05-01 18:05:00', '2026-05-01 19:10:00')
+    with db.transaction() as conn:
+        conn.execute("DELETE FROM registrations WHERE ticket_id = ?", (tickets[2],))
+    
+    maintained = rollup(db)
+    db.rebuild_rollups()
+    assert rollup(db) == maintained
+
+
+def test_hourly_checkins_on_the_dashboard(db):
+    ticket_id = register(db, 1)
+    db.checkin_ticket(ticket_id)
+    hour = db.get_attendee(ticket_id)['checkin_time'][11:13]
+    assert db.get_dashboard_stats()['hourly_checkins'] == {hour: 1}
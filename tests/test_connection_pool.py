@@ -0,0 +1,87 @@
+import threading
+
+from conftest import attendee
+from database import EventDatabase
+
+
+def in_thread(func):
+    """Run func in a new thread, as Streamlit does for every rerun"""
+    result = {}
+    
+    def target():
+        try:
+            result['value'] = func()
+        except Exception as e:
+            result['error'] = e
+    
+    thread = threading.Thread(target=target)
+    thread.start()
+    thread.join()
+    if 'error' in result:
+        raise result['error']
+    return result['value']
+
+
+def test_new_file_uses_wal(db):
+    with db.connection() as conn:
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == 'wal'
+
+
+def test_connection_is_reused_within_a_thread(db):
+    with db.connection() as outer:
+        with db.connection() as inner:
+            assert inner is outer
+    assert db.get_connection() is db.get_connection()
+
+
+def test_connection_is_reused_by_the_next_thread(db):
+    def used_connection():
+        with db.connection() as conn:
+            conn.execute("SELECT 1")
+            return conn
+    
+    first = in_thread(used_connection)
+    assert in_thread(used_connection) is first
+
+
+def test_unreturned_connection_is_reclaimed_after_its_thread_ends(db):
+    # Legacy callers may never close() what get_connection() gave them
+    first = in_thread(db.get_connection)
+    assert in_thread(db.get_connection) is first
+
+
+def test_concurrent_threads_get_their_own_connections(db):
+    inside = threading.Barrier(2)
+    seen = []
+    
+    def hold():
+        with db.connection() as conn:
+            seen.append(conn)
+            inside.wait(timeout=5)
+    
+    threads = [threading.Thread(target=hold) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert seen[0] is not seen[1]
+
+
+def test_failed_block_rolls_back_before_reuse(db):
+    try:
+        with db.transaction() as conn:
+            conn.execute("INSERT INTO events (event_name) VALUES ('Gone')")
+            raise RuntimeError
+    except RuntimeError:
+        pass
+    with db.connection() as conn:
+        assert not conn.in_transaction
+        assert conn.execute("SELECT COUNT(*) FROM events WHERE event_name = 'Gone'").fetchone()[0] == 0
+
+
+def test_closed_connection_goes_back_to_the_pool(db):
+    conn = db.get_connection()
+    conn.close()
+    assert in_thread(db.get_connection) is conn
+    success, message, _, _ = db.add_registration(attendee(1))
+    assert success, message
@@ -0,0 +1,47 @@
+import csv
+import io
+
+from conftest import register
+
+
+def read_rows(text):
+    return list(csv.DictReader(io.StringIO(text)))
+
+
+def test_export_streams_every_row_in_id_order(db, tmp_path):
+    ticket_ids = [register(db, n, phone=f"555,{n:03d}") for n in range(7)]
+    path = tmp_path / "export.csv"
+    
+    assert db.export_to_csv(str(path), batch_size=3) is True
+    
+    rows = read_rows(path.read_text(encoding='utf-8'))
+    assert [row['ticket_id'] for row in rows] == ticket_ids
+    # Thousands separators are stripped from phone numbers
+    assert rows[1]['phone'] == '555001'
+
+
+def test_export_to_file_object(db):
+    register(db, 1)
+    buffer = io.StringIO()
+    assert db.export_to_csv(buffer) is True
+    assert read_rows(buffer.getvalue())[0]['first_name'] == 'First1'
+
+
+def test_empty_export(db, tmp_path):
+    path = tmp_path / "export.csv"
+    assert db.export_to_csv(str(path)) is False
+    assert not path.exists()
+
+
+def test_export_round_trips_through_import(db, tmp_path):
+    ticket_id = register(db, 1)
+    db.checkin_ticket(ticket_id)
+    path = str(tmp_path / "export.csv")
+    db.export_to_csv(path)
+    
+    with db.transaction() as conn:
+        conn.execute("DELETE FROM registrations")
+    summary = db.import_from_csv(path)
+    
+    assert (summary['inserted'], summary['error']) == (1, None)
+    assert db.get_attendee(ticket_id)['status'] == 'checked_in'
@@ -0,0 +1,54 @@
+from conftest import register
+
+HEADER = "ticket_id,first_name,last_name,email,phone,status,worship_team\n"
+
+
+def write_csv(tmp_path, lines):
+    path = tmp_path / "import.csv"
+    path.write_text(HEADER + "".join(line + "\n" for line in lines), encoding='utf-8')
+    return str(path)
+
+
+def test_import_counts_inserted_replaced_and_rejected(db, tmp_path):
+    existing = register(db, 1, ticket_id='RWT-OLD00001')
+    path = write_csv(tmp_path, [
+        f"{existing},Renamed,Person,r@example.com,555,checked_in,1",
+        "RWT-NEW00001,New,Person,n@example.com,\"1,234\",,",
+        ",No,Ticket,x@example.com,1,,",
+        "RWT-NEW00002,,Missing,m@example.com,1,,",
+        "RWT-NEW00003,Third,Person,t@example.com,1,,0",
+    ])
+    
+    summary = db.import_from_csv(path, chunk_size=2)
+    
+    assert summary == {'inserted': 2, 'replaced': 1, 'rejected': 2, 'error': None}
+    renamed = db.get_attendee(existing)
+    assert (renamed['first_name'], renamed['status']) == ('Renamed', 'checked_in')
+    with db.connection() as conn:
+        assert conn.execute(
+            "SELECT phone, status FROM registrations WHERE ticket_id = 'RWT-NEW00001'"
+        ).fetchone() == ('1234', 'registered')
+    # Rows from every chunk reach the prefilter
+    assert db.quick_checkin('RWT-NEW00001')[0] is True
+    assert db.quick_checkin('RWT-NEW00003')[0] is True
+
+
+def test_failed_import_rolls_back_and_reports_nothing_committed(db, tmp_path):
+    path = write_csv(tmp_path, [
+        ",Rejected,Row,r@example.com,1,,",
+        "RWT-NEW00001,New,Person,n@example.com,1,,",
+        "RWT-NEW00002,New,Person,n@example.com,1,,",
+        "RWT-NEW00003,Too,Many,fields,1,,,,,,",
+    ])
+    
+    summary = db.import_from_csv(path, chunk_size=2)
+    
+    assert summary['error']
+    assert (summary['inserted'], summary['replaced'], summary['rejected']) == (0, 0, 0)
+    assert db.get_attendee('RWT-NEW00001') is None
+
+
+def test_missing_file(db, tmp_path):
+    summary = db.import_from_csv(str(tmp_path / "missing.csv"))
+    assert summary['error']
+    assert summary['inserted'] == 0
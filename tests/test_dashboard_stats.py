@@ -0,0 +1,59 @@
+from conftest import register
+
+
+def counters(db):
+    with db.connection() as conn:
+        return conn.execute(
+            "SELECT event_id, reg_date, total, checked_in, worship_team, volunteers "
+            "FROM registration_stats WHERE total > 0 ORDER BY 1, 2"
+        ).fetchall()
+
+
+def test_dashboard_stats_follow_writes(db):
+    tickets = [register(db, n, worship_team=n % 2, volunteer=int(n == 0)) for n in range(4)]
+    db.checkin_ticket(tickets[0])
+    
+    stats = db.get_dashboard_stats()
+    assert (stats['total'], stats['checked_in'], stats['pending']) == (4, 1, 3)
+    assert (stats['worship_team'], stats['volunteers']) == (2, 1)
+    assert stats['checkin_rate'] == "25.0%"
+    assert stats['active_days'] == 1
+    
+    with db.transaction() as conn:
+        conn.execute("UPDATE registrations SET volunteer = 1 WHERE ticket_id = ?", (tickets[1],))
+        conn.execute("DELETE FROM registrations WHERE ticket_id = ?", (tickets[0],))
+    
+    stats = db.get_dashboard_stats()
+    assert (stats['total'], stats['checked_in'], stats['volunteers']) == (3, 0, 1)
+
+
+def test_triggers_agree_with_a_rebuild(db):
+    tickets = [register(db, n, worship_team=n % 3 == 0) for n in range(6)]
+    for ticket_id in tickets[::2]:
+        db.checkin_ticket(ticket_id)
+    with db.transaction() as conn:
+        conn.execute("UPDATE registrations SET registration_time = '2026-01-02 10:00:00' WHERE ticket_id = ?",
+                     (tickets[1],))
+        conn.execute("DELETE FROM registrations WHERE ticket_id = ?", (tickets[2],))
+    
+    maintained = counters(db)
+    db.rebuild_stats()
+    assert counters(db) == maintained
+    assert len(maintained) == 2
+
+
+def test_stats_for_one_day(db):
+    ticket_id = register(db, 1)
+    with db.transaction() as conn:
+        conn.execute("UPDATE registrations SET registration_time = '2026-01-02 10:00:00' WHERE ticket_id = ?",
+                     (ticket_id,))
+    register(db, 2)
+    
+    assert db.get_dashboard_stats(event_date='2026-01-02')['total'] == 1
+    assert db.get_dashboard_stats()['active_days'] == 2
+
+
+def test_empty_database(db):
+    stats = db.get_dashboard_stats()
+    assert (stats['total'], stats['pending'], stats['checkin_rate']) == (0, 0, "0%")
+    assert stats['hourly_checkins'] == {}
@@ -0,0 +1,125 @@
+import json
+import sqlite3
+
+import pytest
+
+from conftest import register
+from database import EventDatabase
+
+
+def rows(path):
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute(
+            "SELECT ticket_id, first_name, status, checkin_time FROM registrations ORDER BY ticket_id"
+        ).fetchall()
+    finally:
+        conn.close()
+
+
+def scalar(path, sql):
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute(sql).fetchone()[0]
+    finally:
+        conn.close()
+
+
+@pytest.fixture
+def backup_dir(tmp_path):
+    return str(tmp_path / "backups")
+
+
+def test_chain_restores_the_live_rows(db, db_path, backup_dir, tmp_path):
+    tickets = [register(db, n) for n in range(5)]
+    base = db.create_snapshot_backup(backup_dir)
+    
+    db.checkin_ticket(tickets[0])
+    register(db, 10)
+    first = db.create_differential_backup(backup_dir)
+    assert (first['upserts'], first['deletes']) == (2, 0)
+    
+    with db.transaction() as conn:
+        conn.execute("DELETE FROM registrations WHERE ticket_id = ?", (tickets[1],))
+        conn.execute("UPDATE registrations SET first_name = 'Renamed' WHERE ticket_id = ?", (tickets[2],))
+    second = db.create_differential_backup(backup_dir)
+    assert second['since_change_id'] == first['change_id']
+    assert (second['upserts'], second['deletes']) == (1, 1)
+    
+    restored = str(tmp_path / "restored.db")
+    summary = EventDatabase.restore_backup_chain(base['path'], [first['path'], second['path']], restored)
+    
+    assert summary['change_id'] == second['change_id']
+    assert rows(restored) == rows(db_path)
+    # Replayed rows are not logged again, and numbering continues
+    changes = "SELECT COUNT(*) FROM registration_changes"
+    assert scalar(restored, changes) == scalar(base['path'], changes)
+    assert scalar(restored, "SELECT seq FROM sqlite_sequence WHERE name = 'registration_changes'") \
+        == second['change_id']
+
+
+def test_broken_chain_is_rejected(db, backup_dir, tmp_path):
+    register(db, 1)
+    base = db.create_snapshot_backup(backup_dir)
+    register(db, 2)
+    db.create_differential_backup(backup_dir)
+    register(db, 3)
+    last = db.create_differential_backup(backup_dir)
+    
+    with pytest.raises(Exception):
+        EventDatabase.restore_backup_chain(base['path'], [last['path']], str(tmp_path / "restored.db"))
+
+
+def test_unrecorded_diff_does_not_move_the_base(db, backup_dir):
+    register(db, 1)
+    base = db.create_snapshot_backup(backup_dir)
+    register(db, 2)
+    
+    # e.g. the upload failed, so the report was never recorded
+    db.create_differential_backup(backup_dir, record=False)
+    assert db.last_backup_change_id() == base['change_id']
+    
+    diff = db.create_differential_backup(backup_dir)
+    with open(diff['path'], encoding='utf-8') as f:
+        assert json.loads(f.readline())['since_change_id'] == base['change_id']
+    assert diff['upserts'] == 1
+
+
+def test_full_snapshot_prunes_the_change_log(db, backup_dir):
+    register(db, 1)
+    register(db, 2)
+    base = db.create_snapshot_backup(backup_dir)
+    
+    with db.connection() as conn:
+        assert conn.execute(
+            "SELECT COUNT(*) FROM registration_changes WHERE change_id <= ?", (base['change_id'],)
+        ).fetchone()[0] == 0
+    assert db.change_log_covers(base['change_id'])
+
+
+def test_diff_refuses_a_gap_in_the_change_log(db, backup_dir):
+    register(db, 1)
+    base = db.create_snapshot_backup(backup_dir)
+    register(db, 2)
+    register(db, 3)
+    db.prune_change_log(base['change_id'] + 1)
+    
+    assert not db.change_log_covers(base['change_id'])
+    with pytest.raises(Exception, match="no longer covers"):
+        db.create_differential_backup(backup_dir)
+
+
+def test_diff_refuses_reset_change_ids(db, backup_dir):
+    for n in range(3):
+        register(db, n)
+    base = db.create_snapshot_backup(backup_dir)
+    # What the old Clear Data did: ids restart once the log is empty
+    with db.transaction() as conn:
+        conn.execute("DELETE FROM registrations")
+        conn.execute("DELETE FROM registration_changes")
+        conn.execute("DELETE FROM sqlite_sequence")
+    register(db, 3)
+    
+    assert not db.change_log_covers(base['change_id'])
+    with pytest.raises(Exception, match="no longer covers"):
+        db.create_differential_backup(backup_dir)
@@ -0,0 +1,73 @@
+import pytest
+
+from conftest import register
+
+
+@pytest.fixture
+def events(db):
+    first, _ = db.create_event("First", "2024-05-01", "Hall A")
+    second, _ = db.create_event("Second", "2024-05-01", "Hall B")
+    return first, second
+
+
+def register_for(db, event_id, n):
+    db.set_active_event(event_id)
+    return register(db, n)
+
+
+def test_stats_are_scoped_to_the_active_event(db, events):
+    first, second = events
+    for n in range(3):
+        register_for(db, first, n)
+    register_for(db, second, 10)
+    
+    db.set_active_event(first)
+    assert db.get_dashboard_stats()['total'] == 3
+    db.set_active_event(None)
+    stats = db.get_dashboard_stats()
+    assert stats['total'] == 4
+    # Both events registered on the same day
+    assert stats['active_days'] == 1
+
+
+def test_checkin_refuses_another_events_ticket(db, events):
+    first, second = events
+    other = register_for(db, second, 1)
+    
+    db.set_active_event(first)
+    assert db.checkin_ticket(other) is None
+    assert db.quick_checkin(other) == (False, None)
+    assert db.get_attendee(other) is None
+    
+    db.set_active_event(second)
+    assert db.checkin_ticket(other)['status'] == 'checked_in'
+
+
+def test_unassigned_tickets_are_accepted_under_any_event(db, events, caplog):
+    legacy = register_for(db, None, 1)
+    
+    db.set_active_event(events[0])
+    result = db.checkin_ticket(legacy)
+    
+    assert (result['status'], result['event_id']) == ('checked_in', 0)
+    assert "unassigned ticket" in caplog.text
+
+
+def test_bulk_checkin_only_touches_the_active_event(db, events):
+    first, second = events
+    mine = [register_for(db, first, n) for n in range(3)]
+    other = register_for(db, second, 10)
+    legacy = register_for(db, None, 11)
+    
+    db.set_active_event(first)
+    db.checkin_ticket(mine[0])
+    assert db.checkin_all_registered() == 2
+    
+    db.set_active_event(None)
+    assert [db.get_attendee(t)['status'] for t in mine] == ['checked_in'] * 3
+    assert db.get_attendee(other)['status'] == 'registered'
+    assert db.get_attendee(legacy)['status'] == 'registered'
+    
+    # A scan after the bulk check-in is a repeat
+    db.set_active_event(first)
+    assert db.quick_checkin(mine[1])[0] is False
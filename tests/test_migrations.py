@@ -0,0 +1,82 @@
+import sqlite3
+
+from database import EventDatabase
+
+
+# registrations as the app created it before schema migrations existed
+BASELINE_SCHEMA = '''
+CREATE TABLE registrations (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    ticket_id TEXT UNIQUE,
+    first_name TEXT NOT NULL,
+    last_name TEXT NOT NULL,
+    email TEXT NOT NULL,
+    phone TEXT,
+    registration_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    checkin_time TIMESTAMP,
+    status TEXT DEFAULT 'registered',
+    source_system TEXT DEFAULT 'manual'
+);
+CREATE TABLE events (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    event_name TEXT NOT NULL,
+    event_date DATE,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+'''
+
+
+def baseline_db(path):
+    conn = sqlite3.connect(path)
+    conn.executescript(BASELINE_SCHEMA)
+    conn.executemany(
+        "INSERT INTO registrations (ticket_id, first_name, last_name, email, status, checkin_time) "
+        "VALUES (?, ?, ?, ?, ?, ?)",
+        [
+            ('EVT-AAAA1111', 'Ada', 'Lovelace', 'ada@example.com', 'registered', None),
+            ('EVT-BBBB2222', 'Alan', 'Turing', 'alan@example.com', 'checked_in', '2024-05-01 10:15:00'),
+        ],
+    )
+    conn.commit()
+    conn.close()
+
+
+def test_baseline_database_is_migrated(db_path):
+    baseline_db(db_path)
+    db = EventDatabase(db_path)
+    try:
+        with db.connection() as conn:
+            assert conn.execute("PRAGMA user_version").fetchone()[0] == db._migrations()[-1][0]
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(registrations)")}
+            triggers = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'trigger'")}
+        
+        assert {'event_id', 'scanned_data', 'synced_to_cloud'} <= columns
+        assert {'trg_registration_changes_insert', 'trg_registration_changes_update'} <= triggers
+        
+        # Existing rows seed the derived tables
+        stats = db.get_dashboard_stats()
+        assert (stats['total'], stats['checked_in']) == (2, 1)
+        assert list(db.search_registrations('Turing')['ticket_id']) == ['EVT-BBBB2222']
+        assert db.quick_checkin('EVT-AAAA1111') == (True, ('Ada', 'Lovelace'))
+    finally:
+        db.close()
+
+
+def test_migrations_are_idempotent(db_path):
+    baseline_db(db_path)
+    EventDatabase(db_path).close()
+    db = EventDatabase(db_path)
+    try:
+        assert db.get_dashboard_stats()['total'] == 2
+    finally:
+        db.close()
+
+
+def test_up_to_date_database_reads_only_user_version(db):
+    again = EventDatabase(db.db_path, trace_sql=True)
+    statements = [record['sql'] for record in again.pool.tracer.records()]
+    again.disable_sql_tracing()
+    
+    # Besides opening connections, which tracing reopens
+    assert statements.count("PRAGMA user_version") == 1
+    assert not [sql for sql in statements if 'sqlite_master' in sql or 'compile_options' in sql]
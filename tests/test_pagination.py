@@ -0,0 +1,51 @@
+from conftest import attendee, register
+
+
+def all_pages(db, page_size, **filters):
+    pages, cursor = [], None
+    while True:
+        page, cursor = db.get_registrations_page(after=cursor, page_size=page_size, **filters)
+        pages.append(list(page['ticket_id']))
+        if cursor is None:
+            return pages
+
+
+def test_pages_cover_every_row_once_newest_first(db):
+    # One bulk insert: rows share registration_time, so id breaks the ties
+    ticket_ids = db.add_registrations_bulk([attendee(n) for n in range(23)])['ticket_ids']
+    
+    pages = all_pages(db, 10)
+    
+    assert [len(page) for page in pages] == [10, 10, 3]
+    assert [t for page in pages for t in page] == ticket_ids[::-1]
+
+
+def test_exact_multiple_ends_without_cursor(db):
+    db.add_registrations_bulk([attendee(n) for n in range(10)])
+    page, cursor = db.get_registrations_page(page_size=10)
+    assert len(page) == 10
+    assert cursor is None
+
+
+def test_filters(db):
+    volunteer = register(db, 1, volunteer=True)
+    worship = register(db, 2, worship_team=True)
+    checked_in = register(db, 3)
+    db.checkin_ticket(checked_in)
+    
+    assert all_pages(db, 2, status='checked_in') == [[checked_in]]
+    assert sorted(all_pages(db, 2, status=['registered'])[0]) == sorted([volunteer, worship])
+    assert all_pages(db, 2, volunteer=True) == [[volunteer]]
+    assert all_pages(db, 2, worship_team=True) == [[worship]]
+
+
+def test_scoped_to_active_event(db):
+    first, _ = db.create_event("First", "2024-05-01", "Hall A")
+    second, _ = db.create_event("Second", "2024-06-01", "Hall B")
+    db.set_active_event(first)
+    mine = [register(db, n) for n in range(3)]
+    db.set_active_event(second)
+    register(db, 10)
+    
+    db.set_active_event(first)
+    assert sorted(t for page in all_pages(db, 2) for t in page) == sorted(mine)
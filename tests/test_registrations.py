@@ -0,0 +1,65 @@
+import pandas as pd
+
+from conftest import attendee, register
+
+
+def count_rows(db):
+    with db.connection() as conn:
+        return conn.execute("SELECT COUNT(*) FROM registrations").fetchone()[0]
+
+
+def test_add_registration_returns_ticket_and_image(db):
+    success, message, ticket_id, image = db.add_registration(attendee(1))
+    assert success, message
+    assert ticket_id.startswith('RWT-')
+    assert image is not None
+    assert db.get_attendee(ticket_id)['status'] == 'registered'
+
+
+def test_duplicate_ticket_id_is_rejected(db):
+    ticket_id = register(db, 1)
+    success, message, _, _ = db.add_registration({**attendee(2), 'ticket_id': ticket_id})
+    assert not success
+    assert message == "Ticket ID already exists!"
+    assert count_rows(db) == 1
+
+
+def test_bulk_insert_across_chunks(db):
+    result = db.add_registrations_bulk([attendee(n) for n in range(25)], chunk_size=10)
+    assert result['inserted'] == 25
+    assert len(set(result['ticket_ids'])) == 25
+    assert result['failed'] == []
+    assert count_rows(db) == 25
+    # New ids are known to the prefilter and the attendee lookup
+    assert db.quick_checkin(result['ticket_ids'][-1])[0] is True
+
+
+def test_bulk_insert_isolates_bad_rows(db):
+    existing = register(db, 0, ticket_id='RWT-DUPE0001')
+    records = [
+        {**attendee(1), 'ticket_id': 'RWT-GOOD0001'},
+        {**attendee(2), 'ticket_id': existing},
+        None,
+        {**attendee(3), 'ticket_id': 'RWT-GOOD0002'},
+    ]
+    result = db.add_registrations_bulk(records, chunk_size=10)
+    
+    assert result['inserted'] == 2
+    assert result['ticket_ids'] == ['RWT-GOOD0001', 'RWT-GOOD0002']
+    failed = {index: (ticket_id, message) for index, ticket_id, message in result['failed']}
+    assert failed[1] == (existing, "Ticket ID already exists!")
+    assert failed[2][0] is None
+    assert count_rows(db) == 3
+
+
+def test_bulk_insert_from_dataframe_with_missing_cells(db):
+    frame = pd.DataFrame([
+        {'first_name': 'Ada', 'last_name': 'L', 'email': 'a@example.com', 'phone': 5551234.0},
+        {'first_name': 'Bo', 'last_name': None, 'email': 'b@example.com', 'phone': None},
+    ])
+    result = db.add_registrations_bulk(frame)
+    assert result['inserted'] == 2
+    
+    with db.connection() as conn:
+        rows = conn.execute("SELECT first_name, last_name, phone FROM registrations ORDER BY first_name").fetchall()
+    assert rows == [('Ada', 'L', '5551234'), ('Bo', '', '')]
@@ -0,0 +1,58 @@
+import pytest
+
+from conftest import register
+
+
+@pytest.fixture
+def people(db):
+    return {
+        'ada': register(db, 1, first_name='Ada', last_name='Lovelace', email='ada@example.com'),
+        'alan': register(db, 2, first_name='Alan', last_name='Turing', email='alan@example.com'),
+        'grace': register(db, 3, first_name='Grace', last_name='Hopper', email='gh@navy.example'),
+    }
+
+
+def found(db, term):
+    return set(db.search_registrations(term)['ticket_id'])
+
+
+def test_search_index_exists(db):
+    assert db.fts_available
+
+
+def test_words_match_as_prefixes(db, people):
+    # Ticket ids are indexed too, and a random code may also start with 'a'
+    assert found(db, 'a') >= {people['ada'], people['alan']}
+    assert found(db, 'tur') == {people['alan']}
+    assert found(db, 'grace hop') == {people['grace']}
+    assert found(db, 'navy') == {people['grace']}
+    assert found(db, 'nobody') == set()
+
+
+def test_names_rank_above_email(db, people):
+    register(db, 4, first_name='Zoe', last_name='Zed', email='lovelace.fan@example.com')
+    assert db.search_registrations('lovelace')['ticket_id'].iloc[0] == people['ada']
+
+
+def test_ticket_id_and_punctuation(db, people):
+    assert found(db, people['alan']) == {people['alan']}
+    assert found(db, '"ada" (') == {people['ada']}
+
+
+def test_index_follows_updates_and_deletes(db, people):
+    with db.transaction() as conn:
+        conn.execute("UPDATE registrations SET last_name = 'Byron' WHERE ticket_id = ?", (people['ada'],))
+        conn.execute("DELETE FROM registrations WHERE ticket_id = ?", (people['alan'],))
+    
+    assert found(db, 'byron') == {people['ada']}
+    assert found(db, 'lovelace') == set()
+    assert found(db, 'turing') == set()
+
+
+def test_empty_term_lists_latest(db, people):
+    assert len(db.search_registrations('', limit=2)) == 2
+
+
+def test_like_fallback_without_fts(db, people):
+    db._fts_available = False
+    assert found(db, 'ove') == {people['ada']}
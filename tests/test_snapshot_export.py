@@ -0,0 +1,63 @@
+import io
+
+import pytest
+
+from conftest import attendee, register
+
+pa = pytest.importorskip("pyarrow")
+import pyarrow.ipc  # noqa: E402
+import pyarrow.parquet as pq  # noqa: E402
+
+
+@pytest.fixture
+def tickets(db):
+    ids = db.add_registrations_bulk([{**attendee(n), 'phone': f'555,{n:04d}'} for n in range(25)])['ticket_ids']
+    db.checkin_ticket(ids[0])
+    return ids
+
+
+def test_parquet_streams_batches_with_sqlite_types(db, tickets, tmp_path):
+    path = str(tmp_path / "registrations.parquet")
+    report = db.export_snapshot(path, batch_size=10)
+    
+    assert (report['rows'], report['batches'], report['path']) == (25, 3, path)
+    parquet = pq.ParquetFile(path)
+    assert parquet.metadata.num_row_groups == 3
+    
+    table = parquet.read()
+    schema = table.schema
+    assert schema.field('id').type == pa.int64()
+    assert schema.field('volunteer').type == pa.int64()
+    assert pa.types.is_timestamp(schema.field('registration_time').type)
+    assert schema.field('phone').type == pa.string()
+    
+    rows = table.to_pylist()
+    assert [row['ticket_id'] for row in rows] == tickets
+    assert rows[0]['phone'] == '5550000'
+    assert rows[0]['checkin_time'] is not None
+    assert rows[1]['checkin_time'] is None
+
+
+def test_arrow_file_object_and_filters(db, tickets):
+    buffer = io.BytesIO()
+    report = db.export_snapshot(buffer, format='arrow', where="status = ?", params=('checked_in',))
+    
+    assert report == {'format': 'arrow', 'rows': 1, 'batches': 1}
+    table = pa.ipc.open_file(pa.BufferReader(buffer.getvalue())).read_all()
+    assert table.column('ticket_id').to_pylist() == [tickets[0]]
+
+
+def test_scoped_to_the_active_event(db, tmp_path):
+    event_id, _ = db.create_event("Event", "2024-05-01", "Hall")
+    register(db, 1)
+    db.set_active_event(event_id)
+    register(db, 2)
+    
+    path = str(tmp_path / "event.parquet")
+    assert db.export_snapshot(path)['rows'] == 1
+    assert db.export_snapshot(path, all_events=True)['rows'] == 2
+
+
+def test_unknown_format(db, tmp_path):
+    with pytest.raises(ValueError):
+        db.export_snapshot(str(tmp_path / "x"), format='orc')
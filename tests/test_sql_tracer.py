@@ -0,0 +1,74 @@
+import json
+import threading
+
+from conftest import register
+from database import PooledConnection, TracedConnection, normalize_sql
+
+
+def test_normalize_sql_groups_by_shape():
+    assert normalize_sql("SELECT * FROM t WHERE a = 'x' AND b IN (?, ?, ?)  LIMIT 10;") == \
+        "SELECT * FROM t WHERE a = ? AND b IN (?, ...) LIMIT ?"
+
+
+def test_records_statements_with_their_caller(db):
+    ticket_id = register(db, 1)
+    tracer = db.enable_sql_tracing()
+    
+    db.checkin_ticket(ticket_id)
+    
+    records = tracer.records()
+    update = next(r for r in records if r['sql'].startswith("UPDATE registrations"))
+    assert update['caller'].endswith('checkin_ticket')
+    assert update['rows'] == 1
+    # The triggers run inside the UPDATE
+    assert update['statements'] >= 1
+    assert update['vm_steps'] >= 0
+    assert any(r['sql'] == "COMMIT" for r in records)
+
+
+def test_summary_orders_statement_shapes(db):
+    tracer = db.enable_sql_tracing()
+    for n in range(3):
+        register(db, n)
+    
+    summary = db.get_slow_statements(n=50, order_by='total_ms')
+    assert [group['total_ms'] for group in summary] == sorted(
+        (group['total_ms'] for group in summary), reverse=True)
+    inserts = [group for group in summary if group['sql'].startswith("INSERT INTO registrations")]
+    assert inserts[0]['count'] == 3
+    assert tracer.summary(1)[0]['max_ms'] == max(group['max_ms'] for group in summary)
+
+
+def test_enable_and_disable_switch_the_connection_class(db):
+    with db.connection() as conn:
+        assert type(conn) is PooledConnection
+    
+    db.enable_sql_tracing()
+    with db.connection() as conn:
+        assert type(conn) is TracedConnection
+    
+    db.disable_sql_tracing()
+    with db.connection() as conn:
+        assert type(conn) is PooledConnection
+    assert db.get_slow_statements() == []
+
+
+def test_other_threads_and_log_file(db, tmp_path):
+    log_path = tmp_path / "trace.jsonl"
+    tracer = db.enable_sql_tracing(log_path=str(log_path))
+    
+    thread = threading.Thread(target=register, args=(db, 1), name="station-2")
+    thread.start()
+    thread.join()
+    db.disable_sql_tracing()
+    
+    assert {r['thread'] for r in tracer.records()} == {"station-2"}
+    logged = [json.loads(line) for line in log_path.read_text().splitlines()]
+    assert len(logged) == len(tracer.records())
+
+
+def test_ring_keeps_the_last_statements(db):
+    tracer = db.enable_sql_tracing(capacity=5)
+    for n in range(5):
+        register(db, n)
+    assert len(tracer.records()) == 5
@@ -0,0 +1,69 @@
+import sqlite3
+
+import pytest
+
+from conftest import register
+
+
+@pytest.fixture
+def ticket_filter(db):
+    # Only the miss check can pick up outside writes in these tests
+    db.ticket_filter.refresh_interval = 3600
+    db.ticket_filter.refresh()
+    return db.ticket_filter
+
+
+def insert_elsewhere(db_path, ticket_id):
+    """Write a registration as another process would"""
+    conn = sqlite3.connect(db_path)
+    try:
+        with conn:
+            conn.execute(
+                "INSERT INTO registrations (ticket_id, first_name, last_name, email) "
+                "VALUES (?, 'Other', 'Station', 'other@example.com')",
+                (ticket_id,)
+            )
+    finally:
+        conn.close()
+
+
+def test_rejects_what_no_ticket_can_match(db, ticket_filter):
+    ticket_id = register(db, 1)
+    
+    assert ticket_filter.might_match(ticket_id)
+    assert ticket_filter.might_match(ticket_id.lower())
+    assert ticket_filter.might_match(ticket_id[:-2])
+    assert ticket_filter.might_match("XYZ-" + ticket_id.split('-')[1])
+    assert not ticket_filter.might_match("RWT-00000000")
+    assert not ticket_filter.might_match("")
+    
+    stats = ticket_filter.get_stats()
+    assert (stats['passed'], stats['rejected'], stats['size']) == (4, 2, 1)
+
+
+def test_ticket_written_elsewhere_is_not_rejected(db, db_path, ticket_filter):
+    insert_elsewhere(db_path, 'RWT-0THER001')
+    
+    assert ticket_filter.might_match('RWT-0THER001')
+    assert db.quick_checkin('RWT-0THER001') == (True, ('Other', 'Station'))
+
+
+def test_miss_without_outside_writes_stays_in_memory(db, ticket_filter):
+    register(db, 1)
+    ticket_filter.might_match("RWT-00000000")
+    
+    reads = []
+    original = ticket_filter.refresh
+    ticket_filter.refresh = lambda: reads.append(1) or original()
+    
+    assert not ticket_filter.might_match("RWT-00000001")
+    assert reads == []
+
+
+def test_pruned_change_log_rebuilds_the_index(db, db_path, ticket_filter):
+    reloads = ticket_filter.get_stats()['reloads']
+    insert_elsewhere(db_path, 'RWT-0THER002')
+    db.prune_change_log(10 ** 6)
+    
+    assert ticket_filter.might_match('RWT-0THER002')
+    assert ticket_filter.get_stats()['reloads'] == reloads + 1
@@ -0,0 +1,81 @@
+import io
+
+import pytest
+import qrcode
+from PIL import Image, ImageChops
+
+from barcode_generator import EventQRGenerator, TicketTemplate
+
+
+@pytest.fixture
+def generator():
+    EventQRGenerator.clear_template_cache()
+    yield EventQRGenerator(base_url="https://tickets.example")
+    EventQRGenerator.clear_template_cache()
+
+
+def same_pixels(a, b):
+    return a.size == b.size and ImageChops.difference(a.convert('RGB'), b.convert('RGB')).getbbox() is None
+
+
+def test_cached_template_renders_like_a_fresh_one(generator):
+    first = generator.create_checkin_qr("RWT-AAAA1111")
+    generator.create_checkin_qr("RWT-BBBB2222")
+    cached = generator.create_checkin_qr("RWT-AAAA1111")
+    
+    EventQRGenerator.clear_template_cache()
+    fresh = generator.create_checkin_qr("RWT-AAAA1111")
+    
+    assert same_pixels(first, cached)
+    assert same_pixels(cached, fresh)
+    assert not same_pixels(first, generator.create_checkin_qr("RWT-BBBB2222"))
+
+
+def test_template_is_shared_per_size_and_branding(generator):
+    template = generator.ticket_template((444, 444))
+    assert generator.ticket_template((444, 444)) is template
+    assert EventQRGenerator(base_url="x").ticket_template((444, 444)) is template
+    
+    rebranded = EventQRGenerator(branding={'title': 'Other Tour'}, base_url="x")
+    assert rebranded.ticket_template((444, 444)) is not template
+    assert generator.ticket_template((300, 300)) is not template
+
+
+def test_rendering_leaves_the_template_untouched(generator):
+    template = generator.ticket_template((444, 444))
+    blank = template.image.copy()
+    mask = Image.new('1', (444, 444), 1)
+    
+    ticket = template.render(mask, "RWT-AAAA1111")
+    
+    assert same_pixels(template.image, blank)
+    assert ticket.getpixel((template.qr_box[0] + 5, template.qr_box[1] + 5)) != (255, 255, 255)
+
+
+def test_qr_modules_are_painted_where_qrcode_puts_them(generator):
+    ticket_id = "RWT-AAAA1111"
+    image = generator.create_checkin_qr(ticket_id)
+    
+    qr = qrcode.QRCode(version=3, error_correction=qrcode.constants.ERROR_CORRECT_H,
+                       box_size=12, border=4)
+    qr.add_data(generator.checkin_url(ticket_id))
+    qr.make(fit=True)
+    matrix = qr.get_matrix()
+    template = generator.ticket_template((len(matrix) * 12, len(matrix) * 12))
+    
+    left, top = template.qr_box[:2]
+    white = (255, 255, 255)
+    for y, row in enumerate(matrix):
+        for x, cell in enumerate(row):
+            pixel = image.getpixel((left + x * 12 + 6, top + y * 12 + 6))
+            assert (pixel != white) == cell
+
+
+def test_png_bytes_match_the_image(generator):
+    png = generator.render_ticket_png("RWT-AAAA1111")
+    assert same_pixels(Image.open(io.BytesIO(png)), generator.create_checkin_qr("RWT-AAAA1111"))
+
+
+def test_template_size_follows_the_qr():
+    template = TicketTemplate((300, 300), EventQRGenerator(base_url="x").branding)
+    assert template.image.size == (400, 480)
@@ -0,0 +1,76 @@
+import sqlite3
+import threading
+
+import pytest
+
+from conftest import register
+from database import EventDatabase, get_pool
+
+
+@pytest.fixture
+def queued_db(db_path):
+    database = EventDatabase(db_path, write_behind=True)
+    yield database
+    database.close()
+
+
+def test_writes_from_many_threads_all_land(queued_db):
+    results = []
+    
+    def station(n):
+        results.append(register(queued_db, n))
+    
+    threads = [threading.Thread(target=station, args=(n,)) for n in range(20)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    assert len(set(results)) == 20
+    assert all(queued_db.quick_checkin(ticket_id)[0] for ticket_id in results)
+
+
+def test_operation_error_only_fails_its_own_caller(queued_db):
+    def broken(conn):
+        conn.execute("INSERT INTO checkin_stations (station_name) VALUES ('lost')")
+        raise ValueError("boom")
+    
+    failed = queued_db.write_queue.submit(broken)
+    ticket_id = register(queued_db, 1)
+    
+    with pytest.raises(ValueError):
+        failed.result(timeout=5)
+    assert queued_db.get_attendee(ticket_id) is not None
+    # The failed operation's own writes were rolled back
+    with queued_db.connection() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM checkin_stations").fetchone()[0] == 0
+
+
+def touch(conn):
+    conn.execute("UPDATE registrations SET phone = phone")
+
+
+def test_group_failure_reaches_every_caller(db_path):
+    seeded = EventDatabase(db_path)
+    ticket_id = register(seeded, 1)
+    seeded.close()
+    
+    # Connections opened from here on give up on the lock quickly
+    get_pool(db_path).timeout = 0.2
+    db = EventDatabase(db_path, write_behind=True)
+    writer = sqlite3.connect(db_path)
+    try:
+        writer.execute("BEGIN IMMEDIATE")
+        futures = [db.write_queue.submit(touch) for _ in range(3)]
+        with pytest.raises(sqlite3.OperationalError, match="locked"):
+            db.quick_checkin(ticket_id)
+        for future in futures:
+            with pytest.raises(sqlite3.OperationalError, match="locked"):
+                future.result(timeout=5)
+        writer.rollback()
+        
+        # The writer thread survives the failed group
+        assert db.quick_checkin(ticket_id)[0] is True
+    finally:
+        writer.close()
+        db.close()
@@ -4,8 +4,11 @@ import pandas as pd
 from datetime import datetime, timedelta
 import streamlit as st
 
-def create_dashboard_charts(stats, df):
-    """Create comprehensive dashboard charts"""
+def create_dashboard_charts(stats, df, timeline=None):
+    """Create comprehensive dashboard charts
+
+    timeline is an optional EventDatabase.get_activity_timeline() frame.
+    """
     
     charts = {}
     
@@ -86,6 +89,23 @@ def create_dashboard_charts(stats, df):
         fig_status.update_traces(textposition='inside', textinfo='percent+label')
         charts['status_chart'] = fig_status
     
+    # 6. Registrations and check-ins per time bucket
+    if timeline is not None and not timeline.empty:
+        fig_activity = go.Figure(data=[
+            go.Bar(x=timeline['bucket'], y=timeline['registrations'],
+                   name='Registrations', marker_color='#2196F3'),
+            go.Bar(x=timeline['bucket'], y=timeline['checkins'],
+                   name='Check-ins', marker_color='#4CAF50')
+        ])
+        fig_activity.update_layout(
+            title="Registrations & Check-ins Over Time",
+            xaxis_title="Time",
+            yaxis_title="Count",
+            barmode='group',
+            height=300
+        )
+        charts['activity_chart'] = fig_activity
+    
     return charts
 
 def create_registration_form():
@@ -240,8 +260,11 @@ def create_sidebar():
         
         # Quick Stats
         try:
-            from database import EventDatabase
-            db = EventDatabase()
+            # The session's database, so the stats follow the active event
+            db = st.session_state.get('db')
+            if db is None:
+                from database import EventDatabase
+                db = EventDatabase()
             stats = db.get_dashboard_stats()
             
             st.markdown("### 📊 Quick Stats")